@@ -14,8 +14,11 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from app.models.schemas import BseChecklist, Company, Regulation, Pages
+from app.services.qdrant_utils import TITAN_EMBEDDING_MODEL, generate_vector
+from app.utils.splade_client import sparse_settings, splade_sparse_batch
 from baml_client import b
 from baml_py import Collector
+from DRHP_ai_processing.checklist_compiler import compile_checklist
 
 # ── env & logging ────────────────────────────────────────────────────────────
 load_dotenv()
@@ -42,6 +45,10 @@ class BseChecklistProcessor:
     using BAML (Collectors) in parallel to score each row.
     """
 
+    EXCEL_PATH = "/home/ubuntu/backend/DRHP_crud_backend/Checklists/DRHP Requirements_13_JUNE_2025_modi.xlsx"
+    # EXCEL_PATH = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
+    SHEET_NAME = "BSE Eligibility Criteria"
+
     def __init__(self, company_id: str):
         self.company_id    = company_id
         self.company       = Company.objects(id=self.company_id).first()
@@ -58,12 +65,10 @@ class BseChecklistProcessor:
         ]
 
     def _load_excel_data(self) -> List[dict]:
-        excel_path = "/home/ubuntu/backend/DRHP_crud_backend/Checklists/DRHP Requirements_13_JUNE_2025_modi.xlsx"
-        # excel_path = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
-        
+        excel_path = self.EXCEL_PATH
         
         logger.info(f"Loading Excel from {excel_path}")
-        df = pd.read_excel(excel_path, sheet_name="BSE Eligibility Criteria")
+        df = pd.read_excel(excel_path, sheet_name=self.SHEET_NAME)
         df.columns = df.columns.str.strip()
 
         column_mapping = {
@@ -84,49 +89,61 @@ class BseChecklistProcessor:
         df = df.rename(columns=column_mapping)
         return df.to_dict("records")
 
+    @staticmethod
+    def _row_query(idx: int, item: dict) -> Optional[str]:
+        """
+        Build a single query string from all parts of one row;
+        None when the row has no particulars (skipped).
+        """
+        if pd.isna(item.get("particulars", "")) or item["particulars"] == "":
+            return None
+        # values are str()-converted as the row worker always did (NaN -> "nan")
+        parts = [
+            str(item.get(key, ""))
+            for key in ("heading", "sub_heading", "particulars", "ai_search_content", "remarks")
+        ]
+        return " ".join(filter(None, parts))
+
+    def _compile_checklist(self) -> dict:
+        """
+        Rows, BAML-expanded queries and their dense/sparse vectors, compiled
+        once per checklist file hash and reused for every company.
+        """
+        compiled = compile_checklist(
+            self.EXCEL_PATH,
+            load_rows=self._load_excel_data,
+            build_query=self._row_query,
+            dense_embed=lambda texts: [generate_vector(t) for t in texts],
+            dense_model=TITAN_EMBEDDING_MODEL,
+            sparse_embed=splade_sparse_batch,
+            sparse_settings=sparse_settings(),
+            sheet_name=self.SHEET_NAME,
+        )
+        if not compiled["reused"]:
+            with _token_lock:
+                self.input_tokens  += compiled["tokens"]["input"]
+                self.output_tokens += compiled["tokens"]["output"]
+        return compiled
+
     def _get_drhp_content(
         self,
-        heading: str,
-        subheading: str,
-        drhp_info_location: str,
-        particulars: str,
-        ai_search_content: str,
-        remarks: str,
-        collector: Collector
+        compiled_query: dict,
+        compiled: dict
     ) -> tuple[str, str]:
         """
-        Retrieve relevant DRHP snippets via Section.search,
-        then tokenize with BAML to build a verdict_query.
+        Retrieve relevant DRHP snippets via Pages.search for the row's
+        compiled hypothetical facts; returns (verdict_query, chunks).
         """
-        # Build a single query string from all parts
-        parts = []
-        for part in (heading, subheading, particulars, ai_search_content, remarks):
-            if isinstance(part, float) and pd.isna(part):
-                parts.append("")
-            else:
-                parts.append(str(part))
-        query_text = " ".join(filter(None, parts))
-
-        resp = b.ExtractRetrievalAndVerdictQueries(
-            query_text,
-            baml_options={"collector": collector}
-        )
-
-        # Safely update token totals
-        in_tok  = collector.last.usage.input_tokens  or 0
-        out_tok = collector.last.usage.output_tokens or 0
-        with _token_lock:
-            self.input_tokens  += in_tok
-            self.output_tokens += out_tok
-
         # Collect page‐numbered chunks
         seen_pages = set()
         page_chunks = []
-        for sub_q in resp.hypothetical_factual_responses:
+        for sub_q in compiled_query["hypothetical_factual_responses"]:
             results = Pages.search(
                 query_text=str(sub_q),
                 company_id=str(self.company_id),
                 limit=2,
+                dense_vector=compiled["dense"].get(sub_q),
+                sparse_vector=compiled["sparse"].get(sub_q),
             )
             for r in results.points:
                 pno = r.payload["page_number_pdf"]
@@ -135,7 +152,7 @@ class BseChecklistProcessor:
                     chunk_text = r.payload["page_content"]
                     page_chunks.append(f"PAGE NUMBER : {pno}\n{chunk_text}")
 
-        return resp.verdict_query, "\n\n".join(page_chunks)
+        return compiled_query["verdict_query"], "\n\n".join(page_chunks)
 
        
 
@@ -174,6 +191,8 @@ class BseChecklistProcessor:
     def _process_single_item(
         self,
         item: dict,
+        compiled_query: Optional[dict],
+        compiled: dict,
         collector: Collector
     ) -> Optional[BseChecklist]:
         """
@@ -182,19 +201,11 @@ class BseChecklistProcessor:
          2) _get_flag_status → BAML verdict
          3) Build a BseChecklist document (or None if no particulars)
         """
-        if pd.isna(item.get("particulars", "")) or item["particulars"] == "":
+        if compiled_query is None:
             return None
 
         # 1) Retrieve DRHP content & verdict_query
-        verdict_q, drhp_chunks = self._get_drhp_content(
-            str(item.get("heading", "")),
-            str(item.get("sub_heading", "")),
-            str(item.get("drhp_info_location", "")),
-            str(item["particulars"]),
-            str(item.get("ai_search_content", "")),
-            str(item.get("remarks", "")),
-            collector,
-        )
+        verdict_q, drhp_chunks = self._get_drhp_content(compiled_query, compiled)
 
         # 2) Score compliance
         flag_status, reasoning, pages, _, _ = self._get_flag_status(
@@ -219,11 +230,12 @@ class BseChecklistProcessor:
 
     def process_bse_checklist(self) -> tuple[int, int]:
         """
-        Load the Excel rows, then spin up to five threads. Each thread
+        Load the compiled checklist rows, then spin up to five threads. Each thread
         uses its dedicated collector (from self.collectors) to process one row.
         Finally, bulk‐insert all BseChecklist documents and return token counts.
         """
-        excel_items = self._load_excel_data()
+        compiled = self._compile_checklist()
+        excel_items = compiled["rows"]
         checklist_entries: List[BseChecklist] = []
 
         # round‐robin assignment of collectors
@@ -232,7 +244,13 @@ class BseChecklistProcessor:
 
         with ThreadPoolExecutor(max_workers=5) as executor:
             futures = [
-                executor.submit(self._process_single_item, item, pick_collector(i))
+                executor.submit(
+                    self._process_single_item,
+                    item,
+                    compiled["queries"][i],
+                    compiled,
+                    pick_collector(i),
+                )
                 for i, item in enumerate(excel_items)
             ]
 
@@ -13,8 +13,11 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from app.models.schemas import SebiChecklist, Company, Regulation, Pages, CostMap
+from app.services.qdrant_utils import TITAN_EMBEDDING_MODEL, generate_vector
+from app.utils.splade_client import sparse_settings, splade_sparse_batch
 from baml_client import b
 from baml_py import Collector
+from DRHP_ai_processing.checklist_compiler import compile_checklist
 
 # ── env & logging ────────────────────────────────────────────────────────────
 load_dotenv()
@@ -38,6 +41,10 @@ class SebiChecklistProcessor:
     Now supports up-to-five parallel checklist queries.
     """
 
+    EXCEL_PATH = "/home/ubuntu/backend/DRHP_crud_backend/Checklists/DRHP Requirements_13_JUNE_2025_modi.xlsx"
+    # EXCEL_PATH = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
+    SHEET_NAME = "SEBI ICDR Eligibility Criteria"
+
     # ───────────── init ─────────────
     def __init__(self, company_id: str):
         self.company_id      = company_id
@@ -56,12 +63,11 @@ class SebiChecklistProcessor:
 
     # ───────────── private helpers ─────────────
     def _load_excel_data(self) -> List[dict]:
-        excel_path = "/home/ubuntu/backend/DRHP_crud_backend/Checklists/DRHP Requirements_13_JUNE_2025_modi.xlsx"
-        # excel_path = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
+        excel_path = self.EXCEL_PATH
         
         logger.info(f"Loading Excel from {excel_path}")
 
-        df = pd.read_excel(excel_path, sheet_name="SEBI ICDR Eligibility Criteria")
+        df = pd.read_excel(excel_path, sheet_name=self.SHEET_NAME)
         df.columns = df.columns.str.strip()
 
         column_mapping = {
@@ -81,6 +87,44 @@ class SebiChecklistProcessor:
         df = df.rename(columns=column_mapping)
         return df.to_dict("records")
 
+    @staticmethod
+    def _row_query(idx: int, item: dict) -> Optional[str]:
+        """Search text for one checklist line; None for blank rows (skipped)."""
+        if pd.isna(item["particulars"]) or item["particulars"] == "":
+            return None
+        parts = [
+            str(p) if not (isinstance(p, float) and pd.isna(p)) else ""
+            for p in (
+                item.get("heading", ""),
+                item.get("sub_heading", ""),
+                item["particulars"],
+                item.get("ai_search_content", ""),
+                item.get("remarks", ""),
+            )
+        ]
+        return " ".join(filter(None, parts))
+
+    def _compile_checklist(self) -> dict:
+        """
+        Rows, expanded queries and query vectors for the checklist file,
+        compiled once per file hash instead of once per company.
+        """
+        compiled = compile_checklist(
+            self.EXCEL_PATH,
+            load_rows=self._load_excel_data,
+            build_query=self._row_query,
+            dense_embed=lambda texts: [generate_vector(t) for t in texts],
+            dense_model=TITAN_EMBEDDING_MODEL,
+            sparse_embed=splade_sparse_batch,
+            sparse_settings=sparse_settings(),
+            sheet_name=self.SHEET_NAME,
+        )
+        if not compiled["reused"]:
+            with _token_lock:
+                self.input_tokens  += compiled["tokens"]["input"]
+                self.output_tokens += compiled["tokens"]["output"]
+        return compiled
+
     # ---------------------------------------------------------
     # NOTE: every call in this class receives *its own* collector
     #       (pulled from self.collectors by the caller)
@@ -106,41 +150,17 @@ class SebiChecklistProcessor:
             collector.last.usage.output_tokens,
         )
 
-    def _get_drhp_content(
-        self,
-        heading: str,
-        subheading: str,
-        drhp_info_location: str,
-        particulars: str,
-        ai_search_content: str,
-        remarks: str,
-        collector,
-    ):
-        parts = [
-            str(p) if not (isinstance(p, float) and pd.isna(p)) else ""
-            for p in (heading, subheading, particulars, ai_search_content, remarks)
-        ]
-        query = " ".join(filter(None, parts))
-
-        resp = b.ExtractRetrievalAndVerdictQueries(
-            query, baml_options={"collector": collector}
-        )
-
-        in_tok  = collector.last.usage.input_tokens  or 0
-        out_tok = collector.last.usage.output_tokens or 0
-
-        with _token_lock:
-            self.input_tokens  += in_tok
-            self.output_tokens += out_tok
-
-        # build DRHP snippet pool
+    def _get_drhp_content(self, compiled_query: dict, compiled: dict):
+        # build DRHP snippet pool from the compiled hypothetical facts
         seen_pages = set()
         page_chunks = []
-        for sub_q in resp.hypothetical_factual_responses:
+        for sub_q in compiled_query["hypothetical_factual_responses"]:
             results = Pages.search(
                 query_text=str(sub_q),
                 company_id=str(self.company_id),
                 limit=2,
+                dense_vector=compiled["dense"].get(sub_q),
+                sparse_vector=compiled["sparse"].get(sub_q),
             )
             for r in results.points:
                 pno = r.payload["page_number_pdf"]
@@ -149,24 +169,18 @@ class SebiChecklistProcessor:
                     chunk_text = r.payload["page_content"]
                     page_chunks.append(f"PAGE NUMBER : {pno}\n{chunk_text}")
 
-        return resp.verdict_query, "\n\n".join(page_chunks)
+        return compiled_query["verdict_query"], "\n\n".join(page_chunks)
 
     # ───────────── parallel worker ─────────────
-    def _process_single_item(self, item: dict, collector):
+    def _process_single_item(
+        self, item: dict, compiled_query: Optional[dict], compiled: dict, collector
+    ):
         """Run one checklist line; returns a SebiChecklist doc or None."""
-        if pd.isna(item["particulars"]) or item["particulars"] == "":
+        if compiled_query is None:
             return None  # skip blank rows
 
         # 1) fetch relevant DRHP chunks
-        verdict_q, drhp_content = self._get_drhp_content(
-            item.get("heading", ""),
-            item.get("sub_heading", ""),
-            item.get("drhp_info_location", ""),
-            item["particulars"],
-            item.get("ai_search_content", ""),
-            item.get("remarks", ""),
-            collector,
-        )
+        verdict_q, drhp_content = self._get_drhp_content(compiled_query, compiled)
 
         # 2) score compliance
         flag_status, summary, pages, *_ = self._get_flag_status(
@@ -187,7 +201,8 @@ class SebiChecklistProcessor:
 
     # ───────────── public API ─────────────
     def process_sebi_checklist(self):
-        excel_items = self._load_excel_data()
+        compiled = self._compile_checklist()
+        excel_items = compiled["rows"]
         checklist_entries: list[SebiChecklist] = []
 
         # round-robin assign collectors so that each worker
@@ -197,7 +212,13 @@ class SebiChecklistProcessor:
 
         with ThreadPoolExecutor(max_workers=5) as pool:
             futures = [
-                pool.submit(self._process_single_item, item, pick_collector(i))
+                pool.submit(
+                    self._process_single_item,
+                    item,
+                    compiled["queries"][i],
+                    compiled,
+                    pick_collector(i),
+                )
                 for i, item in enumerate(excel_items)
             ]
 
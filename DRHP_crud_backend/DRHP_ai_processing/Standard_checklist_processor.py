@@ -6,6 +6,8 @@ StandardChecklistProcessor
 * Five parallel workers, each with its own Collector
 * Leaves *all* checklist-number–specific branches (QR extraction, link check, etc.)
   intact – they are now executed inside each worker based on the original row index
+* Query expansion and query vectors come from the compiled checklist
+  (DRHP_ai_processing.checklist_compiler), computed once per checklist file
 """
 
 import sys, os, logging, threading
@@ -21,8 +23,11 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from app.models.schemas import Company, Pages, StandardChecklist
+from app.services.qdrant_utils import TITAN_EMBEDDING_MODEL, generate_vector
+from app.utils.splade_client import sparse_settings, splade_sparse_batch
 from baml_client import b
 from baml_py import Collector
+from DRHP_ai_processing.checklist_compiler import compile_checklist
 
 # utilities that some checklist rows rely on
 from DRHP_ai_processing.qr_extractor import QRCodeProcessor
@@ -52,6 +57,12 @@ class StandardChecklistProcessor:
     Parallel BAML-powered standard-checklist scorer.
     """
 
+    EXCEL_PATH = r"C:\Users\himan\OnFinance\drhp-analyser\DRHP_crud_backend\Checklists\DRHP Requirements_13_JUNE_2025_modi.xlsx"
+    # EXCEL_PATH = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
+    SHEET_NAME = "Standard Questionnaire"
+    # rows (1-based count) answered without DRHP retrieval: QR code, website links, blank
+    NON_RETRIEVAL_ROWS = {3, 4, 5}
+
     def __init__(self, company_id: str):
         self.company_id = company_id
         self.company = Company.objects(id=self.company_id).first()
@@ -68,14 +79,13 @@ class StandardChecklistProcessor:
 
     # ── Excel loader ────────────────────────────────────────────────────────
     def _load_standard_checklist(self) -> List[dict]:
-        excel_path = r"C:\Users\himan\OnFinance\drhp-analyser\DRHP_crud_backend\Checklists\DRHP Requirements_13_JUNE_2025_modi.xlsx"
-        # excel_path = "/home/ubuntu/drhp-analyser-new/DRHP_crud_backend/Checklists/DRHP Requirements_14_MAY_2025_modi.xlsx"
+        excel_path = self.EXCEL_PATH
 
         xls = pd.ExcelFile(excel_path)
-        if "Standard Questionnaire" not in xls.sheet_names:
+        if self.SHEET_NAME not in xls.sheet_names:
             raise ValueError("Standard Questionnaire sheet not found")
 
-        df = xls.parse("Standard Questionnaire")
+        df = xls.parse(self.SHEET_NAME)
         df.columns = df.columns.str.strip()
         df = df.rename(
             columns={
@@ -87,41 +97,56 @@ class StandardChecklistProcessor:
         )
         return df.to_dict("records")
 
-    # ── DRHP content retrieval (Pages.search) ───────────────────────────────
-    def _get_drhp_content(
-        self,
-        heading: str,
-        checklist_points: str,
-        remarks: str,
-        expected_checks: str,
-        collector: Collector,
-    ) -> tuple[str, str]:
-        # Build search query
+    # ── Compiled checklist (rows, expanded queries, query vectors) ──────────
+    @classmethod
+    def _row_query(cls, idx: int, item: dict) -> Optional[str]:
+        """Search query for rows that go through DRHP retrieval, else None."""
+        if not item.get("checklist_points", "") or idx + 1 in cls.NON_RETRIEVAL_ROWS:
+            return None
         parts = []
-        for part in (heading, checklist_points, remarks, expected_checks):
+        for part in (
+            item.get("heading", ""),
+            item.get("checklist_points", ""),
+            item.get("remarks", ""),
+            item.get("expected_checks", ""),
+        ):
             if isinstance(part, float) and pd.isna(part):
                 parts.append("")
             else:
                 parts.append(str(part))
-        query_txt = " ".join(filter(None, parts))
-
-        resp = b.ExtractRetrievalAndVerdictQueries(
-            query_txt, baml_options={"collector": collector}
+        return " ".join(filter(None, parts))
+
+    def _compile_checklist(self) -> dict:
+        compiled = compile_checklist(
+            self.EXCEL_PATH,
+            load_rows=self._load_standard_checklist,
+            build_query=self._row_query,
+            dense_embed=lambda texts: [generate_vector(t) for t in texts],
+            dense_model=TITAN_EMBEDDING_MODEL,
+            sparse_embed=splade_sparse_batch,
+            sparse_settings=sparse_settings(),
+            sheet_name=self.SHEET_NAME,
         )
+        if not compiled["reused"]:
+            with _token_lock:
+                self.input_tokens += compiled["tokens"]["input"]
+                self.output_tokens += compiled["tokens"]["output"]
+        return compiled
 
-        # token bookkeeping
-        in_tok = collector.usage.input_tokens if collector.usage else 0
-        out_tok = collector.usage.output_tokens if collector.usage else 0
-        with _token_lock:
-            self.input_tokens += in_tok
-            self.output_tokens += out_tok
-
+    # ── DRHP content retrieval (Pages.search) ───────────────────────────────
+    def _get_drhp_content(
+        self, compiled_query: dict, compiled: dict
+    ) -> tuple[str, str]:
         # Build page-chunk string using Pages.search
         seen = set()
         chunks = []
-        for sub_q in resp.hypothetical_factual_responses:
+        for sub_q in compiled_query["hypothetical_factual_responses"]:
             results = Pages.search(
-                query_text=str(sub_q), company_id=self.company_id, limit=2
+                query_text=str(sub_q),
+                company_id=self.company_id,
+                limit=2,
+                dense_vector=compiled["dense"].get(sub_q),
+                sparse_vector=compiled["sparse"].get(sub_q),
             )
             for r in results.points:
                 pno = r.payload["page_number_pdf"]
@@ -129,7 +154,7 @@ class StandardChecklistProcessor:
                     seen.add(pno)
                     chunks.append(f"PAGE NUMBER : {pno}\n{r.payload['page_content']}")
 
-        return resp.verdict_query, "\n\n".join(chunks)
+        return compiled_query["verdict_query"], "\n\n".join(chunks)
 
     # ── Flag status via BAML.ExtractFinalVerdict ────────────────────────────
     def _get_flag_status(
@@ -150,7 +175,12 @@ class StandardChecklistProcessor:
 
     # ── Worker for one checklist row ────────────────────────────────────────
     def _process_single_item(
-        self, idx: int, item: dict, collector: Collector
+        self,
+        idx: int,
+        item: dict,
+        compiled_query: Optional[dict],
+        compiled: dict,
+        collector: Collector,
     ) -> Optional[StandardChecklist]:
         """
         idx is 0-based → original checklist 'count' = idx + 1
@@ -166,13 +196,9 @@ class StandardChecklistProcessor:
         verdict_query = item.get("checklist_points", "")
 
         # Special cases exactly as original numbering logic
-        if count not in {3, 4, 5}:
+        if count not in self.NON_RETRIEVAL_ROWS:
             verdict_query, drhp_content = self._get_drhp_content(
-                item.get("heading", ""),
-                item.get("checklist_points", ""),
-                item.get("remarks", ""),
-                item.get("expected_checks", ""),
-                collector,
+                compiled_query, compiled
             )
 
         elif count == 3:
@@ -224,7 +250,8 @@ class StandardChecklistProcessor:
 
     # ── Public API ──────────────────────────────────────────────────────────
     def process_standard_checklist(self) -> tuple[int, int]:
-        items = self._load_standard_checklist()
+        compiled = self._compile_checklist()
+        items = compiled["rows"]
         entries: List[StandardChecklist] = []
 
         def pick_collector(i: int) -> Collector:
@@ -232,7 +259,14 @@ class StandardChecklistProcessor:
 
         with ThreadPoolExecutor(max_workers=5) as pool:
             futures = [
-                pool.submit(self._process_single_item, i, item, pick_collector(i))
+                pool.submit(
+                    self._process_single_item,
+                    i,
+                    item,
+                    compiled["queries"][i],
+                    compiled,
+                    pick_collector(i),
+                )
                 for i, item in enumerate(items)
             ]
             for fut in as_completed(futures):
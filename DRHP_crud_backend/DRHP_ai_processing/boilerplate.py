@@ -0,0 +1,134 @@
+import re
+import logging
+from collections import Counter
+from typing import Iterable
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# A line is boilerplate when it repeats on more than this share of the pages
+# that have a text layer (running headers, footers, disclaimers)
+BOILERPLATE_MIN_PAGE_FRACTION = 0.3
+# Documents shorter than this are left alone; repetition means nothing there
+MIN_BOILERPLATE_PAGES = 5
+# Normalized lines shorter than this ("#", "page#") are only stripped from the
+# first/last EDGE_LINES lines of a page, so table rows and list numbers survive
+MIN_ANYWHERE_CHARS = 12
+EDGE_LINES = 2
+# Only lines within this share of the page height from the top or bottom edge
+# are candidates; body text that happens to repeat (table captions) is not
+EDGE_BAND_FRACTION = 0.1
+# Words whose tops are this close (pt) belong to one line, as in pdfplumber
+LINE_Y_TOLERANCE = 3
+
+# Per-document counters stream_pdf_pages records; kept with cached extractions
+BOILERPLATE_STATS = (
+    "boilerplate_lines",
+    "boilerplate_lines_removed",
+    "boilerplate_tokens_removed",
+    "page_tokens_raw",
+)
+
+# Sections appended after the text layer are never stripped
+_APPENDED_SECTIONS = re.compile(r"\n\n\[(?:TABLES|OCR)\]\n")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_line(line: str) -> str:
+    """
+    Comparison key for a line: lowercase, whitespace removed (extractors
+    space words differently) and digit runs collapsed to "#" so running
+    page numbers and dates still match across pages.
+    """
+    return _DIGITS.sub("#", "".join(line.split()).lower())
+
+
+def band_lines(words: list, rect: fitz.Rect, band: float = EDGE_BAND_FRACTION) -> set[str]:
+    """
+    Normalized lines in the top/bottom bands of one page, from its
+    get_text("words") tuples, as both text backends split them: PyMuPDF's
+    own lines plus words regrouped by top the way pdfplumber does it.
+    """
+    if not words:
+        return set()
+    top_limit = rect.height * band
+    bottom_limit = rect.height * (1 - band)
+
+    def add(line_words):
+        if min(w[1] for w in line_words) <= top_limit or max(w[3] for w in line_words) >= bottom_limit:
+            keys.add(normalize_line(" ".join(w[4] for w in sorted(line_words))))
+
+    keys: set[str] = set()
+    native = {}
+    for w in words:
+        native.setdefault((w[5], w[6]), []).append(w)
+    for line_words in native.values():
+        add(line_words)
+
+    line_words, top = [], None
+    for w in sorted(words, key=lambda w: (w[1], w[0])):
+        if line_words and abs(w[1] - top) > LINE_Y_TOLERANCE:
+            add(line_words)
+            line_words = []
+        if not line_words:
+            top = w[1]
+        line_words.append(w)
+    add(line_words)
+
+    keys.discard("")
+    return keys
+
+
+def detect_boilerplate(
+    page_lines: Iterable[set[str] | None],
+    min_fraction: float = BOILERPLATE_MIN_PAGE_FRACTION,
+) -> set[str]:
+    """
+    Given band_lines() of every page (None for pages without a text layer),
+    return the normalized keys (see normalize_line) of top/bottom-band lines
+    that appear on more than `min_fraction` of the pages with text.
+    """
+    counts = Counter()
+    text_pages = 0
+    for keys in page_lines:
+        if keys is not None:
+            text_pages += 1
+            counts.update(keys)
+
+    if text_pages < MIN_BOILERPLATE_PAGES:
+        return set()
+    min_pages = max(2, int(text_pages * min_fraction) + 1)
+    boilerplate = {key for key, n in counts.items() if n >= min_pages}
+    logger.info(
+        f"🧹 {len(boilerplate)} boilerplate lines repeat on >{min_fraction:.0%} of {text_pages} pages"
+    )
+    return boilerplate
+
+
+def strip_boilerplate(text: str, boilerplate: set[str]) -> tuple[str, list[str]]:
+    """
+    Remove boilerplate lines from a page's text layer; [TABLES] / [OCR]
+    sections are kept as they are. Returns (cleaned_text, removed_lines).
+    """
+    if not boilerplate or not text:
+        return text, []
+
+    match = _APPENDED_SECTIONS.search(text)
+    body, appended = (text[: match.start()], text[match.start() :]) if match else (text, "")
+
+    lines = body.split("\n")
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(filled[:EDGE_LINES] + filled[-EDGE_LINES:])
+
+    kept, removed = [], []
+    for i, line in enumerate(lines):
+        key = normalize_line(line)
+        if key in boilerplate and (len(key) >= MIN_ANYWHERE_CHARS or i in edges):
+            removed.append(line)
+        else:
+            kept.append(line)
+    if not removed:
+        return text, []
+    return "\n".join(kept).strip("\n") + appended, removed
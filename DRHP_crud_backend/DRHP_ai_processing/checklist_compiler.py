@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from baml_client import b
+from baml_py import Collector
+
+from app.utils.file_hash import compute_file_hash
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the compiled layout or the query expansion prompt changes, so
+# artifacts written by older code stop matching
+CHECKLIST_COMPILE_VERSION = "2"
+CHECKLIST_CACHE_DIR = os.getenv(
+    "DRHP_CHECKLIST_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "drhp_checklists"),
+)
+COMPILE_MAX_WORKERS = 10
+
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+def _artifact_path(
+    file_hash: str, sheet_name: Optional[str], dense_model: str, sparse_settings: Optional[dict]
+) -> str:
+    name = "-".join(
+        _SLUG.sub("_", part).strip("_") or "default"
+        for part in (sheet_name or "", dense_model)
+    )
+    if sparse_settings is not None:
+        settings = json.dumps(sparse_settings, sort_keys=True)
+        name += "-sparse_" + hashlib.sha256(settings.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(
+        CHECKLIST_CACHE_DIR, file_hash, f"v{CHECKLIST_COMPILE_VERSION}-{name}.json"
+    )
+
+
+def _expand_query(query: str) -> tuple[Optional[dict], int, int]:
+    """ExtractRetrievalAndVerdictQueries for one row; (None, 0, 0) on failure."""
+    collector = Collector(name="checklist-compile")
+    try:
+        resp = b.ExtractRetrievalAndVerdictQueries(
+            query, baml_options={"collector": collector}
+        )
+    except Exception as e:
+        logger.error(f"❌ Query expansion failed for '{query[:80]}': {e}")
+        return None, 0, 0
+    usage = collector.last.usage if collector.last else None
+    return (
+        {
+            "hypothetical_factual_responses": [
+                str(fact) for fact in resp.hypothetical_factual_responses or []
+            ],
+            "verdict_query": resp.verdict_query,
+        },
+        (usage.input_tokens or 0) if usage else 0,
+        (usage.output_tokens or 0) if usage else 0,
+    )
+
+
+def compile_checklist(
+    path: str,
+    load_rows: Callable[[], list[dict]],
+    build_query: Callable[[int, dict], Optional[str]],
+    dense_embed: Callable[[list[str]], list],
+    dense_model: str,
+    sparse_embed: Optional[Callable[[list[str]], list[dict]]] = None,
+    sparse_settings: Optional[dict] = None,
+    sheet_name: Optional[str] = None,
+) -> dict:
+    """
+    Everything about a checklist that does not depend on the DRHP, computed
+    once per checklist file and reused by every company run:
+
+        {"rows": [row dict, ...],                      # load_rows() output
+         "queries": [{"search_query", "hypothetical_factual_responses",
+                      "verdict_query"} | None, ...],   # per row, None = skipped
+         "dense": {text: vector}, "sparse": {text: {"indices", "values"}},
+         "tokens": {"input", "output"},               # LLM cost of compiling
+         "reused": bool}                               # loaded from a stored artifact
+
+    Rows whose build_query(index, row) returns a falsy value are skipped. Vectors are
+    computed for every hypothetical fact (dense_embed: texts -> vectors,
+    sparse_embed: texts -> [{token_id: weight}]); failed or empty vectors
+    are left out so callers embed those texts on demand.
+
+    Artifacts are stored under CHECKLIST_CACHE_DIR keyed by the checklist
+    file's SHA-256, the sheet, the dense model and `sparse_settings` (whatever
+    changes sparse_embed's output, e.g. splade_client.sparse_settings()).
+    A compile in which any query expansion failed is returned but not stored.
+    """
+    file_hash = compute_file_hash(path)
+    artifact_path = _artifact_path(file_hash, sheet_name, dense_model, sparse_settings)
+    if os.path.exists(artifact_path):
+        try:
+            with open(artifact_path, "r", encoding="utf-8") as f:
+                compiled = json.load(f)
+            compiled["reused"] = True
+            logger.info(
+                f"♻️ Using compiled checklist {os.path.basename(path)} ({file_hash[:12]}…)"
+            )
+            return compiled
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable compiled checklist {artifact_path}: {e}")
+
+    start = time.perf_counter()
+    rows = load_rows()
+    search_queries = [build_query(i, row) for i, row in enumerate(rows)]
+    queries: list[Optional[dict]] = [None] * len(rows)
+    tokens = {"input": 0, "output": 0}
+    failures = 0
+    lock = threading.Lock()
+
+    def expand(i: int) -> None:
+        nonlocal failures
+        expanded, in_tok, out_tok = _expand_query(search_queries[i])
+        with lock:
+            tokens["input"] += in_tok
+            tokens["output"] += out_tok
+            if expanded is None:
+                failures += 1
+                # same fallback the processors used: search with the row text
+                expanded = {
+                    "hypothetical_factual_responses": [],
+                    "verdict_query": search_queries[i],
+                }
+            if not expanded["hypothetical_factual_responses"]:
+                expanded["hypothetical_factual_responses"] = [search_queries[i]]
+            queries[i] = {"search_query": search_queries[i], **expanded}
+
+    with ThreadPoolExecutor(max_workers=COMPILE_MAX_WORKERS) as ex:
+        list(ex.map(expand, [i for i, query in enumerate(search_queries) if query]))
+
+    facts = list(
+        dict.fromkeys(
+            fact for entry in queries if entry for fact in entry["hypothetical_factual_responses"]
+        )
+    )
+    dense = {
+        fact: vector
+        for fact, vector in zip(facts, dense_embed(facts) if facts else [])
+        if vector is not None and any(vector)
+    }
+    sparse = {}
+    if sparse_embed is not None:
+        for fact, weights in zip(facts, sparse_embed(facts) if facts else []):
+            if weights:
+                sparse[fact] = {
+                    "indices": [int(k) for k in weights],
+                    "values": [float(v) for v in weights.values()],
+                }
+
+    compiled = {
+        "checklist_hash": file_hash,
+        "sheet_name": sheet_name,
+        "dense_model": dense_model,
+        "sparse_settings": sparse_settings,
+        "rows": rows,
+        "queries": queries,
+        "dense": dense,
+        "sparse": sparse,
+        "tokens": tokens,
+        "reused": False,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    logger.info(
+        f"📦 Compiled checklist {os.path.basename(path)}: {sum(q is not None for q in queries)} rows, "
+        f"{len(facts)} facts, {len(dense)} dense / {len(sparse)} sparse vectors "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    if failures:
+        logger.warning(
+            f"⚠️ {failures} query expansions failed; compiled checklist not stored"
+        )
+        return compiled
+    try:
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(artifact_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(compiled, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, artifact_path)
+        logger.info(f"💾 Stored compiled checklist at {artifact_path}")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not store compiled checklist: {e}")
+    return compiled
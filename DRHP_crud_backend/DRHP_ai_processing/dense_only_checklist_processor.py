@@ -21,6 +21,7 @@ sys.path.append(project_root)
 
 from baml_client import b
 from baml_py import Collector
+from DRHP_ai_processing.embedding_cache import cached_embedding
 
 # ── env & logging ────────────────────────────────────────────────────────────
 load_dotenv()
@@ -52,6 +53,11 @@ class DenseOnlyChecklistProcessor:
         self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
     def _generate_dense_embedding(self, text: str):
+        return cached_embedding(
+            text, "text-embedding-3-small", self._create_dense_embedding
+        )
+
+    def _create_dense_embedding(self, text: str):
         for attempt in range(5):  # Retry up to 5 times
             try:
                 response = self.openai_client.embeddings.create(
@@ -0,0 +1,142 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from DRHP_ai_processing.embedding_cache import cached_embeddings
+from DRHP_ai_processing.token_counting import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# OpenAI limits: 8191 tokens per input, 2048 inputs and 300k tokens per request
+EMBED_MAX_TOKENS_PER_ITEM = 8191
+EMBED_MAX_ITEMS_PER_REQUEST = 2048
+EMBED_MAX_TOKENS_PER_REQUEST = 300_000
+# Requests are packed well below the hard limits so several run in parallel
+EMBED_BATCH_TOKEN_BUDGET = int(os.getenv("DRHP_EMBED_BATCH_TOKENS", "100000"))
+EMBED_BATCH_MAX_ITEMS = 256
+EMBED_MAX_CONCURRENCY = int(os.getenv("DRHP_EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = 3
+
+
+def plan_embedding_batches(
+    token_counts: list[int],
+    token_budget: int = EMBED_BATCH_TOKEN_BUDGET,
+    max_items: int = EMBED_BATCH_MAX_ITEMS,
+) -> list[list[int]]:
+    """Group input indices, in order, into batches under the token and item limits."""
+    token_budget = min(token_budget, EMBED_MAX_TOKENS_PER_REQUEST)
+    max_items = min(max_items, EMBED_MAX_ITEMS_PER_REQUEST)
+    batches, current, current_tokens = [], [], 0
+    for i, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _create_with_retries(client, model: str, inputs: list[str], retries: int):
+    for attempt in range(retries):
+        try:
+            response = client.embeddings.create(model=model, input=inputs)
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            logger.warning(
+                f"⚠️ Embedding request of {len(inputs)} inputs failed (attempt {attempt + 1}): {e}"
+            )
+            time.sleep(2**attempt)
+
+
+def embed_texts(
+    client,
+    texts: list[str],
+    model: str = EMBEDDING_MODEL,
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    stats: dict | None = None,
+) -> list[list[float] | None]:
+    """
+    Dense embeddings for `texts`, in the same order, through the OpenAI
+    client's embeddings endpoint. Texts already in the shared embedding cache
+    (see embedding_cache) are not sent again.
+
+    Inputs are truncated to the model's per-input token limit and packed into
+    token-budgeted batches (see plan_embedding_batches), at most
+    `max_concurrency` requests in flight. A batch that still fails after
+    EMBED_MAX_RETRIES is retried one input at a time, so one bad input does
+    not sink its neighbours. Empty texts and inputs that fail alone get None.
+
+    If `stats` is given, embedding_requests / embedding_tokens /
+    embedding_failures / embedding_cache_hits are accumulated into it.
+    """
+    sent = []
+
+    def embed_missing(missing: list[str]) -> list[list[float] | None]:
+        sent.append(len(missing))
+        return _embed_uncached(client, missing, model, max_concurrency, stats)
+
+    vectors = cached_embeddings(texts, model, embed_missing)
+    if stats is not None:
+        requested = sum(1 for text in texts if text and text.strip())
+        stats["embedding_cache_hits"] = stats.get("embedding_cache_hits", 0) + max(
+            requested - sum(sent), 0
+        )
+    return vectors
+
+
+def _embed_uncached(
+    client, texts: list[str], model: str, max_concurrency: int, stats: dict | None
+) -> list[list[float] | None]:
+    vectors: list[list[float] | None] = [None] * len(texts)
+    indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not indices:
+        return vectors
+
+    inputs = [truncate_to_tokens(texts[i], EMBED_MAX_TOKENS_PER_ITEM) for i in indices]
+    token_counts = [count_tokens(text) for text in inputs]
+    batches = plan_embedding_batches(token_counts)
+    counters = {"embedding_requests": 0, "embedding_tokens": sum(token_counts), "embedding_failures": 0}
+    counters_lock = threading.Lock()
+
+    def count(key: str) -> None:
+        with counters_lock:
+            counters[key] += 1
+
+    def run_batch(batch: list[int]):
+        count("embedding_requests")
+        try:
+            return batch, _create_with_retries(
+                client, model, [inputs[j] for j in batch], EMBED_MAX_RETRIES
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"❌ Embedding failed for input {indices[batch[0]]}: {e}")
+                count("embedding_failures")
+                return batch, [None]
+            logger.warning(f"⚠️ Embedding batch of {len(batch)} failed ({e}); retrying inputs one by one")
+            results = [run_batch([j])[1][0] for j in batch]
+            return batch, results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as ex:
+        for batch, batch_vectors in ex.map(run_batch, batches):
+            for j, vector in zip(batch, batch_vectors):
+                vectors[indices[j]] = vector
+
+    logger.info(
+        f"🔢 Embedded {len(indices) - counters['embedding_failures']}/{len(indices)} texts "
+        f"({counters['embedding_tokens']} tokens) in {counters['embedding_requests']} requests, "
+        f"{time.perf_counter() - start:.1f}s"
+    )
+    if stats is not None:
+        for key, n in counters.items():
+            stats[key] = stats.get(key, 0) + n
+    return vectors
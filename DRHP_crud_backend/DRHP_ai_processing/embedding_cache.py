@@ -0,0 +1,234 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Dense vectors are cached by (model, dimensions, normalized text) in one
+# SQLite file shared by every processor on the host
+EMBEDDING_CACHE_ENABLED = os.getenv("DRHP_EMBEDDING_CACHE", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv(
+    "DRHP_EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "drhp_embeddings", "embeddings.sqlite"),
+)
+# Least recently used vectors are evicted once the stored vectors exceed this
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("DRHP_EMBEDDING_CACHE_MAX_MB", "2048")) * 1024 * 1024
+# Evict down to this share of the limit, so eviction does not run on every put
+EVICT_TO_FRACTION = 0.9
+# Lookup latencies kept for the p50/p99 figures
+LATENCY_WINDOW = 10_000
+# SQLite caps host parameters per statement; lookups are chunked under it
+_SQL_CHUNK = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of an embedding input; case is kept."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    payload = f"{model}\x00{dimensions or ''}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent dense-embedding cache in a SQLite file (WAL mode, so the spawn
+    worker processes and threads of one host can share it).
+
+    Table vectors: key (sha256 of model/dimensions/normalized text), model,
+    float32 vector blob, its size and a last_used timestamp that drives LRU
+    eviction once EMBEDDING_CACHE_MAX_BYTES is exceeded.
+
+    Counters (hits, misses, lookup latencies) are per process; bytes stored
+    is read from the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or EMBEDDING_CACHE_PATH
+        self.max_bytes = EMBEDDING_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL,"
+            " bytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)")
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def get_many(
+        self, model: str, texts: list[str], dimensions: Optional[int] = None
+    ) -> list[Optional[list[float]]]:
+        """Cached vectors for `texts`, in order; None for misses."""
+        start = time.perf_counter()
+        keys = [cache_key(model, dimensions, text) for text in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[i : i + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE vectors SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            vectors = [
+                np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+                for key in keys
+            ]
+            hits = sum(v is not None for v in vectors)
+            self._hits += hits
+            self._misses += len(keys) - hits
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        return vectors
+
+    def put_many(
+        self,
+        model: str,
+        texts: list[str],
+        vectors: list[Optional[list[float]]],
+        dimensions: Optional[int] = None,
+    ) -> None:
+        """Store vectors for `texts`; None vectors (failed embeddings) are skipped."""
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            if vector is None:
+                continue
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((cache_key(model, dimensions, text), model, blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (key, model, vector, bytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _evict_if_needed(self) -> None:
+        stored = self._bytes_stored()
+        if stored <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TO_FRACTION)
+        evicted = 0
+        cursor = self._conn.execute("SELECT key, bytes FROM vectors ORDER BY last_used")
+        victims = []
+        for key, size in cursor:
+            if stored - evicted <= target:
+                break
+            victims.append((key,))
+            evicted += size
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", victims)
+        self._conn.commit()
+        logger.info(f"🧹 Embedding cache evicted {len(victims)} vectors ({evicted} bytes)")
+
+    def _bytes_stored(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM vectors").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Hit rate, size on disk and lookup latency percentiles for this process."""
+        with self._lock:
+            entries, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM vectors"
+            ).fetchone()
+            latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "bytes_stored": stored,
+                "lookup_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "lookup_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            }
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache, or None when disabled or the file cannot be opened."""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    try:
+        return EmbeddingCache()
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding cache disabled: {e}")
+        return None
+
+
+def cached_embeddings(
+    texts: list[str],
+    model: str,
+    embed_fn: Callable[[list[str]], list[Optional[list[float]]]],
+    dimensions: Optional[int] = None,
+) -> list[Optional[list[float]]]:
+    """
+    Vectors for `texts` through the shared cache: hits are served from it and
+    only the misses go to `embed_fn` (texts -> vectors, None for failures),
+    whose results are stored. Without a cache this is just embed_fn(texts).
+    """
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return embed_fn(texts)
+    try:
+        vectors = cache.get_many(model, texts, dimensions)
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding cache lookup failed: {e}")
+        return embed_fn(texts)
+
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        fresh = embed_fn([texts[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+        try:
+            cache.put_many(model, [texts[i] for i in missing], fresh, dimensions)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache write failed: {e}")
+    return vectors
+
+
+def cached_embedding(
+    text: str,
+    model: str,
+    embed_one: Callable[[str], Optional[list[float]]],
+    dimensions: Optional[int] = None,
+) -> Optional[list[float]]:
+    """Single-text form of cached_embeddings."""
+    return cached_embeddings(
+        [text], model, lambda texts: [embed_one(texts[0])], dimensions
+    )[0]
+
+
+def embedding_cache_stats() -> dict:
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+from typing import Optional
+
+from app.utils.file_hash import compute_file_hash
+from DRHP_ai_processing.text_extraction_backends import (
+    DEFAULT_TABLE_MODE,
+    DEFAULT_TEXT_BACKEND,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever text/table, page-number or TOC extraction changes its output,
+# so entries written by older code stop matching
+EXTRACTION_VERSION = "6"
+EXTRACTION_CACHE_DIR = os.getenv(
+    "DRHP_EXTRACTION_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "drhp_extraction"),
+)
+# Mirror entries to Azure Blob Storage so other hosts/containers can reuse them
+EXTRACTION_CACHE_BLOB = os.getenv("DRHP_EXTRACTION_CACHE_BLOB", "false").lower() == "true"
+EXTRACTION_CACHE_BLOB_PREFIX = "extraction_cache"
+
+_PAGES_FILE = "pages.jsonl"
+_META_FILE = "meta.json"
+
+
+def compute_pdf_hash(pdf_path: str) -> str:
+    return compute_file_hash(pdf_path)
+
+
+def extractor_key(dpi: int, threshold: int, text_backend: Optional[str] = None) -> str:
+    """Everything besides the PDF bytes that changes what extraction produces."""
+    backend = (text_backend or DEFAULT_TEXT_BACKEND).lower()
+    return f"v{EXTRACTION_VERSION}-{backend}-{DEFAULT_TABLE_MODE.lower()}-dpi{dpi}-t{threshold}"
+
+
+class ExtractionCache:
+    """
+    Content-addressed store of per-page extraction results (page text, printed
+    page number) plus the detected TOC, keyed by (PDF SHA-256, extractor key).
+    The same DRHP uploaded again under a different blob name maps to the same
+    entry.
+
+    Layout: <cache_dir>/<pdf sha256>/<extractor key>/
+        pages.jsonl   one {"page_no", "page_info"} line per page, in page order
+        meta.json     total_pages, toc_page and per-document stats (boilerplate
+                      token savings); written last, marks the entry complete
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, use_blob: Optional[bool] = None):
+        self.cache_dir = cache_dir or EXTRACTION_CACHE_DIR
+        self.use_blob = EXTRACTION_CACHE_BLOB if use_blob is None else use_blob
+        self._blob_storage = None
+
+    def entry_dir(self, pdf_hash: str, key: str) -> str:
+        return os.path.join(self.cache_dir, pdf_hash, key)
+
+    def _blob_name(self, pdf_hash: str, key: str, filename: str) -> str:
+        return f"{EXTRACTION_CACHE_BLOB_PREFIX}/{pdf_hash}/{key}/{filename}"
+
+    def _get_blob_storage(self):
+        if not self.use_blob:
+            return None
+        if self._blob_storage is None:
+            try:
+                from azure_blob_utils import get_blob_storage
+
+                self._blob_storage = get_blob_storage()
+            except Exception as e:
+                logger.warning(f"⚠️ Extraction cache blob mirror disabled: {e}")
+                self.use_blob = False
+                return None
+        return self._blob_storage
+
+    def _fetch_from_blob(self, pdf_hash: str, key: str) -> bool:
+        """Download a complete blob entry into the local cache dir."""
+        blob_storage = self._get_blob_storage()
+        if blob_storage is None:
+            return False
+        try:
+            if not blob_storage.blob_exists(self._blob_name(pdf_hash, key, _META_FILE)):
+                return False
+            download_dir = tempfile.mkdtemp(dir=self._ensure_parent(pdf_hash))
+            for filename in (_PAGES_FILE, _META_FILE):
+                blob_storage.download_file(
+                    self._blob_name(pdf_hash, key, filename),
+                    os.path.join(download_dir, filename),
+                )
+            self._publish(download_dir, self.entry_dir(pdf_hash, key))
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not fetch extraction cache entry from blob: {e}")
+            return False
+
+    def _ensure_parent(self, pdf_hash: str) -> str:
+        parent = os.path.join(self.cache_dir, pdf_hash)
+        os.makedirs(parent, exist_ok=True)
+        return parent
+
+    @staticmethod
+    def _publish(staging_dir: str, entry_dir: str) -> None:
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging_dir, entry_dir)
+
+    def load(self, pdf_hash: str, key: str) -> Optional[dict]:
+        """
+        Returns {"pages": {page_no: page_info}, "toc_page": dict|None,
+        "stats": dict} for a complete entry, or None on a miss (or an
+        unreadable/partial entry).
+        """
+        entry_dir = self.entry_dir(pdf_hash, key)
+        meta_path = os.path.join(entry_dir, _META_FILE)
+        if not os.path.exists(meta_path) and not self._fetch_from_blob(pdf_hash, key):
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            pages = {}
+            with open(os.path.join(entry_dir, _PAGES_FILE), "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    pages[int(record["page_no"])] = record["page_info"]
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable extraction cache entry {entry_dir}: {e}")
+            return None
+
+        if sorted(pages) != list(range(1, meta["total_pages"] + 1)):
+            logger.warning(f"⚠️ Ignoring incomplete extraction cache entry {entry_dir}")
+            return None
+        return {
+            "pages": pages,
+            "toc_page": meta.get("toc_page"),
+            "stats": meta.get("stats", {}),
+        }
+
+    def writer(self, pdf_hash: str, key: str) -> "ExtractionCacheWriter":
+        return ExtractionCacheWriter(self, pdf_hash, key)
+
+
+class ExtractionCacheWriter:
+    """
+    Writes one cache entry page by page as extraction streams, into a staging
+    directory that only replaces the real entry on commit().
+    """
+
+    def __init__(self, cache: ExtractionCache, pdf_hash: str, key: str):
+        self.cache = cache
+        self.pdf_hash = pdf_hash
+        self.key = key
+        self.pages_written = 0
+        self._staging_dir = tempfile.mkdtemp(dir=cache._ensure_parent(pdf_hash))
+        self._pages_file = open(
+            os.path.join(self._staging_dir, _PAGES_FILE), "w", encoding="utf-8"
+        )
+
+    def add_page(self, page_no: int, page_info: dict) -> None:
+        self._pages_file.write(
+            json.dumps({"page_no": page_no, "page_info": page_info}, ensure_ascii=False)
+            + "\n"
+        )
+        self.pages_written += 1
+
+    def commit(self, toc_page: Optional[dict], stats: Optional[dict] = None) -> None:
+        self._pages_file.close()
+        with open(os.path.join(self._staging_dir, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "total_pages": self.pages_written,
+                    "toc_page": toc_page,
+                    "stats": stats or {},
+                    "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                },
+                f,
+                ensure_ascii=False,
+            )
+        entry_dir = self.cache.entry_dir(self.pdf_hash, self.key)
+        self.cache._publish(self._staging_dir, entry_dir)
+        logger.info(
+            f"💾 Cached extraction of {self.pages_written} pages for {self.pdf_hash[:12]}… ({self.key})"
+        )
+
+        blob_storage = self.cache._get_blob_storage()
+        if blob_storage is not None:
+            # meta.json last, so a blob entry is only visible once complete
+            for filename in (_PAGES_FILE, _META_FILE):
+                try:
+                    blob_storage.upload_file(
+                        os.path.join(entry_dir, filename),
+                        self.cache._blob_name(self.pdf_hash, self.key, filename),
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to mirror extraction cache to blob: {e}")
+                    break
+
+    def abort(self) -> None:
+        if not self._pages_file.closed:
+            self._pages_file.close()
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
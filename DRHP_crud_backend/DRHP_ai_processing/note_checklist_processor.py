@@ -33,9 +33,11 @@ import tiktoken
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
-from baml_client import b
 from baml_py import Collector
 from azure_blob_utils import get_blob_storage
+from DRHP_ai_processing.checklist_compiler import compile_checklist
+from DRHP_ai_processing.embedding_batcher import EMBEDDING_MODEL, embed_texts
+from DRHP_ai_processing.embedding_cache import cached_embedding
 
 # ── env & logging ────────────────────────────────────────────────────────────
 load_dotenv()
@@ -173,6 +175,11 @@ class DRHPNoteChecklistProcessor:
                 logging.warning(f"Failed to delete temp checklist file: {e}")
 
     def _generate_dense_embedding(self, text: str):
+        return cached_embedding(
+            text, "text-embedding-3-small", self._create_dense_embedding
+        )
+
+    def _create_dense_embedding(self, text: str):
         for attempt in range(5):  # Retry up to 5 times
             try:
                 response = self.openai_client.embeddings.create(
@@ -282,12 +289,40 @@ class DRHPNoteChecklistProcessor:
                 time.sleep(2**attempt)
         return "No Commentary"
 
-    def process(self):
+    def _load_checklist_rows(self) -> List[dict]:
         # Support both Excel and CSV files
         if self.excel_path.lower().endswith(".csv"):
             df = pd.read_csv(self.excel_path)
         else:
             df = pd.read_excel(self.excel_path)
+        return df.to_dict("records")
+
+    @staticmethod
+    def _row_search_query(idx: int, row: dict) -> Optional[str]:
+        topic = str(row.get("Topic", ""))
+        section = str(row.get("Section for search", ""))
+        keywords = str(row.get("Keywords", ""))
+        ai_prompt = str(row.get("AI Prompts", ""))
+        if not ai_prompt:
+            return None
+        return " ".join([topic, section, keywords]).strip()
+
+    def compile(self) -> dict:
+        """
+        Parsed rows, hypothetical facts and their embeddings for this
+        checklist file; computed once per file hash and shared by all companies.
+        """
+        return compile_checklist(
+            self.excel_path,
+            load_rows=self._load_checklist_rows,
+            build_query=self._row_search_query,
+            dense_embed=lambda texts: embed_texts(self.openai_client, texts),
+            dense_model=EMBEDDING_MODEL,
+        )
+
+    def process(self):
+        compiled = self.compile()
+        df = pd.DataFrame(compiled["rows"])
         output_column_name = "AI Outputs"
         citations_column_name = "Citations"
         commentary_column_name = "Commentary"
@@ -299,57 +334,27 @@ class DRHPNoteChecklistProcessor:
         commentary_results = [None] * len(df)
         # --- Profiling ---
         t0 = time.time()
-        # --- Step 1: Prepare all search queries (for batch embedding) ---
+        # --- Step 1: Hypothetical facts per row, from the compiled checklist ---
         all_facts = []
         fact_row_map = []  # (row_idx, fact_idx_in_row)
-        row_facts = [None] * len(df)
-
-        def baml_query_worker(idx, row):
-            topic = str(row.get("Topic", ""))
-            section = str(row.get("Section for search", ""))
-            keywords = str(row.get("Keywords", ""))
-            ai_prompt = str(row.get("AI Prompts", ""))
-            if not ai_prompt:
-                return idx, []
-            search_query = " ".join([topic, section, keywords]).strip()
-            try:
-                baml_resp = b.ExtractRetrievalAndVerdictQueries(search_query)
-                hypo_facts = baml_resp.hypothetical_factual_responses
-                if not hypo_facts:
-                    hypo_facts = [search_query]
-            except Exception:
-                hypo_facts = [search_query]
-            return idx, hypo_facts
-
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            futures = [
-                executor.submit(baml_query_worker, idx, row)
-                for idx, row in df.iterrows()
-            ]
-            for future in as_completed(futures):
-                idx, hypo_facts = future.result()
-                row_facts[idx] = hypo_facts
+        row_facts = [
+            entry["hypothetical_factual_responses"] if entry else []
+            for entry in compiled["queries"]
+        ]
         for idx, facts in enumerate(row_facts):
             for fact in facts:
                 all_facts.append(fact)
                 fact_row_map.append(idx)
         t1 = time.time()
-        print(f"[PROFILE] BAML + query prep: {t1-t0:.2f}s")
-        # --- Step 2: Batch OpenAI embedding for all facts ---
-        embeddings = []
-        batch_size = 1000  # OpenAI supports up to 2048
-        for i in range(0, len(all_facts), batch_size):
-            batch = all_facts[i : i + batch_size]
-            for attempt in range(5):
-                try:
-                    response = self.openai_client.embeddings.create(
-                        model="text-embedding-3-small", input=batch
-                    )
-                    embeddings.extend([e.embedding for e in response.data])
-                    break
-                except Exception as e:
-                    print(f"[OpenAI] Embedding batch error (attempt {attempt+1}): {e}")
-                    time.sleep(2**attempt)
+        print(f"[PROFILE] Compiled checklist + query prep: {t1-t0:.2f}s")
+        # --- Step 2: Fact embeddings, compiled ones first (cached facts are reused) ---
+        embeddings = [compiled["dense"].get(fact) for fact in all_facts]
+        missing = [i for i, vector in enumerate(embeddings) if vector is None]
+        if missing:
+            for i, vector in zip(
+                missing, embed_texts(self.openai_client, [all_facts[i] for i in missing])
+            ):
+                embeddings[i] = vector
         t2 = time.time()
         print(f"[PROFILE] OpenAI embedding: {t2-t1:.2f}s")
         # --- Step 3: Batch Qdrant search for all facts ---
@@ -358,6 +363,8 @@ class DRHPNoteChecklistProcessor:
         def qdrant_worker(start, end):
             for i in range(start, end):
                 dense_vec = embeddings[i]
+                if dense_vec is None:
+                    continue
                 for attempt in range(5):
                     try:
                         results = self.qdrant.query_points(
@@ -0,0 +1,374 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from baml_client import b
+from baml_client.types import PageText
+from baml_py import Collector
+
+from DRHP_ai_processing.token_counting import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+# "eager": facts/queries are generated for every page at ingestion.
+# "lazy": pages are indexed on their raw content and facts/queries are only
+# generated for pages that come back in retrieval hits. Opt-in until its
+# effect on retrieval quality has been measured.
+ENRICHMENT_MODE = os.getenv("DRHP_ENRICHMENT_MODE", "eager").lower()
+# Bump when the facts/queries prompts change, so cached results stop matching
+ENRICHMENT_VERSION = "1"
+ENRICHMENT_CACHE_DIR = os.getenv(
+    "DRHP_ENRICHMENT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "drhp_enrichment"),
+)
+# Batched GetFactsAndQueriesForPages calls run concurrently
+ENRICH_MAX_WORKERS = 5
+# Consecutive pages are packed into one call up to this many page-text tokens
+# (cl100k_base); a page over the budget goes alone
+ENRICH_BATCH_TOKEN_BUDGET = int(os.getenv("DRHP_ENRICH_BATCH_TOKENS", "6000"))
+# ...and at most this many pages, so the structured output stays reliable
+ENRICH_BATCH_MAX_PAGES = 8
+# Lazy back-fills run off the search path on this many threads
+BACKFILL_MAX_WORKERS = int(os.getenv("DRHP_ENRICH_BACKFILL_WORKERS", "2"))
+
+_stats_lock = threading.Lock()
+_stats = {
+    "pages_enriched": 0,
+    "enrichment_cache_hits": 0,
+    "enrichment_llm_calls": 0,
+    "enrichment_batch_retries": 0,
+    "enrichment_tokens_in": 0,
+    "enrichment_tokens_out": 0,
+}
+
+
+def enrichment_stats() -> dict[str, int]:
+    """Counters for every page enriched in this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _record(**counts: int) -> None:
+    with _stats_lock:
+        for key, n in counts.items():
+            _stats[key] += n
+
+
+def is_lazy() -> bool:
+    return ENRICHMENT_MODE != "eager"
+
+
+def enrichment_key(page_content: str) -> str:
+    """Pages with the same text share facts/queries, whatever document they are in."""
+    return hashlib.sha256(f"{ENRICHMENT_VERSION}:{page_content}".encode("utf-8")).hexdigest()
+
+
+def _cache_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def _read_cached(cache_dir: str, key: str) -> dict | None:
+    try:
+        with open(_cache_path(cache_dir, key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached(cache_dir: str, key: str, enrichment: dict) -> None:
+    path = _cache_path(cache_dir, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(enrichment, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache page enrichment: {e}")
+
+
+def generate_facts_and_queries(page_text: str, label: str = "page"):
+    """
+    Run GetFactsFromPages + GetQueriesFromPages on one page's text.
+    Returns (facts, queries, token_in, token_out); a failed call leaves its list empty.
+    """
+    facts, queries = [], []
+    total_in, total_out = 0, 0
+
+    try:
+        c_facts = Collector(name=f"facts-{label}")
+        facts = b.GetFactsFromPages(page_text, baml_options={"collector": c_facts}).facts
+        total_in += c_facts.last.usage.input_tokens or 0
+        total_out += c_facts.last.usage.output_tokens or 0
+    except Exception as e:
+        logger.error(f"BAML facts error {label}: {e}")
+
+    try:
+        c_q = Collector(name=f"queries-{label}")
+        queries = b.GetQueriesFromPages(page_text, baml_options={"collector": c_q}).Queries
+        total_in += c_q.last.usage.input_tokens or 0
+        total_out += c_q.last.usage.output_tokens or 0
+    except Exception as e:
+        logger.error(f"BAML queries error {label}: {e}")
+
+    return facts, queries, total_in, total_out
+
+
+def plan_enrichment_batches(
+    pages: list[tuple[int, str]],
+    token_budget: int = ENRICH_BATCH_TOKEN_BUDGET,
+    max_pages: int = ENRICH_BATCH_MAX_PAGES,
+) -> list[list[tuple[int, str]]]:
+    """Group (page_no, text) pages, in the order given, into token-budgeted batches."""
+    batches, current, current_tokens = [], [], 0
+    for page_no, text in pages:
+        tokens = count_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_pages):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((page_no, text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _enrich_batch(batch: list[tuple[int, str]]) -> tuple[dict[int, dict], int, int]:
+    """
+    One GetFactsAndQueriesForPages call for a batch. If the call fails, the
+    batch is split in half and each half retried; a single page falls back to
+    the two per-page calls. Pages the model leaves out are retried alone.
+    Returns ({page_no: {"facts", "queries"}}, token_in, token_out).
+    """
+    if len(batch) == 1:
+        page_no, text = batch[0]
+        facts, queries, in_tok, out_tok = generate_facts_and_queries(text, f"p{page_no}")
+        _record(enrichment_llm_calls=2)
+        return {page_no: {"facts": list(facts), "queries": list(queries)}}, in_tok, out_tok
+
+    label = f"p{batch[0][0]}-{batch[-1][0]}"
+    try:
+        collector = Collector(name=f"enrich-{label}")
+        _record(enrichment_llm_calls=1)
+        response = b.GetFactsAndQueriesForPages(
+            [PageText(page=page_no, text=text) for page_no, text in batch],
+            baml_options={"collector": collector},
+        )
+        total_in = collector.last.usage.input_tokens or 0
+        total_out = collector.last.usage.output_tokens or 0
+    except Exception as e:
+        logger.warning(f"⚠️ Batched enrichment failed for {label} ({e}); splitting")
+        _record(enrichment_batch_retries=1)
+        mid = len(batch) // 2
+        results, total_in, total_out = {}, 0, 0
+        for half in (batch[:mid], batch[mid:]):
+            half_results, in_tok, out_tok = _enrich_batch(half)
+            results.update(half_results)
+            total_in += in_tok
+            total_out += out_tok
+        return results, total_in, total_out
+
+    wanted = {page_no for page_no, _ in batch}
+    results = {
+        item.page: {"facts": list(item.facts), "queries": list(item.queries)}
+        for item in response
+        if item.page in wanted and (item.facts or item.queries)
+    }
+    missing = [(page_no, text) for page_no, text in batch if page_no not in results]
+    if missing:
+        logger.warning(f"⚠️ Batched enrichment {label} skipped pages {[p for p, _ in missing]}; retrying alone")
+        _record(enrichment_batch_retries=len(missing))
+        for page in missing:
+            page_results, in_tok, out_tok = _enrich_batch([page])
+            results.update(page_results)
+            total_in += in_tok
+            total_out += out_tok
+    return results, total_in, total_out
+
+
+def enrich_pages(
+    pages: list[tuple[int, str]],
+    max_workers: int = ENRICH_MAX_WORKERS,
+    cache_dir: str = ENRICHMENT_CACHE_DIR,
+) -> tuple[dict[int, dict], int, int]:
+    """
+    Facts/queries for many (page_no, page_content) pages at once: cached pages
+    are served from disk, the rest are packed into token-budgeted
+    GetFactsAndQueriesForPages calls (see plan_enrichment_batches) run
+    concurrently. Pages with no text get empty lists.
+    Returns ({page_no: {"facts", "queries"}}, token_in, token_out).
+    """
+    results: dict[int, dict] = {}
+    uncached = []
+    for page_no, text in pages:
+        if not text.strip():
+            results[page_no] = {"facts": [], "queries": []}
+            continue
+        cached = _read_cached(cache_dir, enrichment_key(text))
+        if cached is not None:
+            results[page_no] = cached
+            _record(pages_enriched=1, enrichment_cache_hits=1)
+        else:
+            uncached.append((page_no, text))
+    if not uncached:
+        return results, 0, 0
+
+    batches = plan_enrichment_batches(uncached)
+    logger.info(
+        f"🧠 Enriching {len(uncached)} pages in {len(batches)} batched calls "
+        f"({len(pages) - len(uncached)} from cache)"
+    )
+    texts = dict(uncached)
+    total_in, total_out = 0, 0
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as ex:
+        for batch_results, in_tok, out_tok in ex.map(_enrich_batch, batches):
+            total_in += in_tok
+            total_out += out_tok
+            for page_no, enrichment in batch_results.items():
+                results[page_no] = enrichment
+                if enrichment["facts"] or enrichment["queries"]:
+                    _write_cached(cache_dir, enrichment_key(texts[page_no]), enrichment)
+    _record(
+        pages_enriched=len(uncached),
+        enrichment_tokens_in=total_in,
+        enrichment_tokens_out=total_out,
+    )
+    return results, total_in, total_out
+
+
+def _is_enriched(payload: dict) -> bool:
+    """Marked by lazy enrichment, or indexed eagerly with facts/queries."""
+    return bool(
+        payload.get("enriched") or payload.get("facts") or payload.get("queries")
+    )
+
+
+def enrich_hits(
+    qdrant,
+    collection_name: str,
+    points,
+    sparse_embed=None,
+    sparse_vector_name: str = "sparse",
+    dense_embed=None,
+    dense_vector_name: str = "dense",
+) -> int:
+    """
+    Lazily enrich retrieval hits: every point whose payload is neither marked
+    "enriched" nor already carries facts/queries (points indexed eagerly,
+    e.g. before lazy mode existed) gets facts/queries (cached by content
+    hash), which are back-filled into its Qdrant payload and into
+    `point.payload` in place.
+
+    If `sparse_embed(enrichment) -> SparseVector` / `dense_embed(enrichment)
+    -> list[float]` are given, the point's vectors are re-computed from the
+    new facts/queries the same way eager ingestion builds them; an embed
+    returning None leaves that vector as it is.
+    Returns the number of points back-filled.
+    """
+    from qdrant_client import models as qmodels
+
+    pending = [
+        p
+        for p in points
+        if p is not None
+        and p.payload
+        and not _is_enriched(p.payload)
+        and str(p.payload.get("page_content", "")).strip()
+    ]
+    if not pending:
+        return 0
+
+    # hits from one search are usually few, so they go out as one batched call,
+    # labelled by PDF page number unless those are missing or repeated
+    labels = [str(p.payload.get("page_number_pdf", "")) for p in pending]
+    if all(label.isdigit() for label in labels) and len(set(labels)) == len(labels):
+        labels = [int(label) for label in labels]
+    else:
+        labels = list(range(1, len(pending) + 1))
+    enrichments, _, _ = enrich_pages(
+        [(label, str(p.payload["page_content"])) for label, p in zip(labels, pending)]
+    )
+
+    backfilled = 0
+    for label, point in zip(labels, pending):
+        enrichment = enrichments[label]
+        if not (enrichment["facts"] or enrichment["queries"]):
+            continue
+        payload = {**enrichment, "enriched": True}
+        point.payload.update(payload)
+        try:
+            qdrant.set_payload(
+                collection_name=collection_name, payload=payload, points=[point.id]
+            )
+            vectors = {}
+            for name, embed in ((sparse_vector_name, sparse_embed), (dense_vector_name, dense_embed)):
+                vector = embed(enrichment) if embed is not None else None
+                if vector is not None:
+                    vectors[name] = vector
+            if vectors:
+                qdrant.update_vectors(
+                    collection_name=collection_name,
+                    points=[qmodels.PointVectors(id=point.id, vector=vectors)],
+                )
+            backfilled += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Could not back-fill enrichment for point {point.id}: {e}")
+
+    logger.info(
+        f"🧠 Lazily enriched {len(pending)} retrieved pages, back-filled {backfilled} into {collection_name}"
+    )
+    return backfilled
+
+
+_backfill_lock = threading.Lock()
+_backfill_executor: ThreadPoolExecutor | None = None
+_backfill_in_flight: set[str] = set()
+
+
+def enrich_hits_in_background(qdrant, collection_name: str, points, **embeds) -> int:
+    """
+    enrich_hits() on a background thread, so retrieval does not wait on the
+    LLM. Works on copies of the hits (their payloads are left as they are)
+    and skips pages whose content is already being enriched by an earlier
+    search. `embeds` are passed on to enrich_hits.
+    Returns the number of points queued.
+    """
+    global _backfill_executor
+    queued, keys = [], []
+    with _backfill_lock:
+        for p in points:
+            if p is None or not p.payload or _is_enriched(p.payload):
+                continue
+            content = str(p.payload.get("page_content", ""))
+            if not content.strip():
+                continue
+            key = enrichment_key(content)
+            if key in _backfill_in_flight:
+                continue
+            _backfill_in_flight.add(key)
+            keys.append(key)
+            queued.append(SimpleNamespace(id=p.id, payload=dict(p.payload)))
+        if not queued:
+            return 0
+        if _backfill_executor is None:
+            _backfill_executor = ThreadPoolExecutor(
+                max_workers=BACKFILL_MAX_WORKERS, thread_name_prefix="enrich-backfill"
+            )
+
+    def run():
+        try:
+            enrich_hits(qdrant, collection_name, queued, **embeds)
+        except Exception as e:
+            logger.error(f"❌ Background enrichment failed for {collection_name}: {e}")
+        finally:
+            with _backfill_lock:
+                _backfill_in_flight.difference_update(keys)
+
+    _backfill_executor.submit(run)
+    return len(queued)
@@ -0,0 +1,110 @@
+import re
+import logging
+from collections import Counter
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# Fraction of the page height (from the bottom) treated as the footer region
+FOOTER_REGION_FRACTION = 0.15
+# How many pages either side may vouch for a page's printed-number offset
+SUPPORT_WINDOW = 3
+# Longest run of unread pages that may be filled between two agreeing anchors
+MAX_FILL_GAP = 5
+
+_NUMBER_TOKEN = re.compile(r"^\W*(\d{1,4})\W*$")
+_PAGE_PREFIXED = re.compile(r"\bpage\s*(?:no\.?\s*)?(\d{1,4})\b", re.IGNORECASE)
+
+
+def footer_number_candidates(
+    words: list, rect: fitz.Rect, footer_fraction: float = FOOTER_REGION_FRACTION
+) -> set[int]:
+    """
+    Read the footer region of a page's text layer (its get_text("words")
+    tuples) and return every integer that could be the printed page number
+    ("12", "- 12 -", "Page 12", ...).
+    Returns an empty set for scanned pages without a text layer.
+    """
+    footer_top = rect.y1 - rect.height * footer_fraction
+
+    lines: dict[tuple[int, int], list[str]] = {}
+    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+        if y0 >= footer_top:
+            lines.setdefault((block_no, line_no), []).append(word)
+
+    candidates = set()
+    for words in lines.values():
+        for word in words:
+            m = _NUMBER_TOKEN.match(word)
+            if m:
+                candidates.add(int(m.group(1)))
+        for m in _PAGE_PREFIXED.finditer(" ".join(words)):
+            candidates.add(int(m.group(1)))
+    return {c for c in candidates if c > 0}
+
+
+def fit_page_numbers(
+    candidates: dict[int, set[int]],
+    window: int = SUPPORT_WINDOW,
+    max_gap: int = MAX_FILL_GAP,
+) -> dict[int, int]:
+    """
+    Fit monotone runs of printed page numbers to PDF page indices.
+
+    Printed numbers inside a run share a constant offset (printed - pdf page),
+    the same idea as compute_modal_offset in toc_pdf_extraction.py. A page's
+    candidate is accepted only if a nearby page agrees on the offset; pages
+    without an accepted candidate are filled arithmetically when the nearest
+    accepted pages on both sides belong to the same run.
+
+    Returns {pdf_page: printed_number} for the pages that could be resolved.
+    """
+    offsets = {p: {c - p for c in cands} for p, cands in candidates.items()}
+
+    resolved: dict[int, int] = {}
+    for p, page_offsets in offsets.items():
+        support = Counter()
+        for o in page_offsets:
+            for q in range(p - window, p + window + 1):
+                if q != p and o in offsets.get(q, ()):
+                    support[o] += 1
+        if not support:
+            continue
+        ranked = support.most_common(2)
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            continue  # two runs agree equally well, leave it to the fallback
+        resolved[p] = ranked[0][0]
+
+    anchors = sorted(resolved)
+    for left, right in zip(anchors, anchors[1:]):
+        gap = right - left - 1
+        if 0 < gap <= max_gap and resolved[left] == resolved[right]:
+            for p in range(left + 1, right):
+                resolved[p] = resolved[left]
+
+    return {p: p + o for p, o in resolved.items()}
+
+
+def infer_page_numbers(
+    candidates: dict[int, set[int]],
+) -> tuple[dict[int, str], list[int]]:
+    """
+    Infer printed DRHP page numbers from the footer_number_candidates() of
+    every 1-based PDF page.
+
+    Returns:
+        (page_numbers, ambiguous_pages) where page_numbers maps 1-based PDF page
+        numbers to the printed number (as a string, like page_number_drhp) and
+        ambiguous_pages lists the pages that still need the vision fallback.
+    """
+    fitted = fit_page_numbers(candidates)
+    page_numbers = {p: str(n) for p, n in fitted.items()}
+    ambiguous = [p for p in sorted(candidates) if p not in page_numbers]
+
+    logger.info(
+        f"🔢 Inferred page numbers from text layer for {len(page_numbers)}/{len(candidates)} pages "
+        f"({len(ambiguous)} need OCR)"
+    )
+    return page_numbers, ambiguous
@@ -3,31 +3,31 @@ import shutil
 import json
 import logging
 
-import pdfplumber
 import fitz  # PyMuPDF
 import numpy as np
-from PIL import Image
 
 # import pytesseract
 
 from dotenv import load_dotenv
 import cv2
-import base64
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 from app.models.schemas import Pages
-from multiprocessing import get_context
+from DRHP_ai_processing.page_processor_local import (
+    extract_page_text,  # noqa: F401  (re-exported, see drhp_notes_test.py)
+    iter_page_texts,
+    ocr_page_numbers,
+)
+from DRHP_ai_processing.text_layer_scan import scan_text_layer
+from DRHP_ai_processing.vision_images import encode_vision_image
+from DRHP_ai_processing.page_enrichment import enrich_pages, is_lazy
 
 import subprocess, shutil
 
 
-import time
-
-
 load_dotenv()
 
 from baml_client import b
-from baml_py import Collector
 from baml_py import Image as baml_image_import
 
 
@@ -46,20 +46,10 @@ from baml_py import Image as BamlImage
 
 def strip_to_baml_image(strip_gray: np.ndarray) -> BamlImage:
     """
-    Encode a grayscale numpy array as PNG‐bytes and then Base64-encode it
-    to create a BAML Image object.
+    Encode a grayscale footer strip as a BAML Image object, trimmed to its
+    content and losslessly compressed (see vision_images "page_number" profile).
     """
-    if strip_gray.size == 0:
-        raise ValueError("Strip image is empty; nothing to send to BAML.")
-
-    # Save to a temporary PNG in memory
-    success, png_buf = cv2.imencode(".png", strip_gray)
-    if not success:
-        raise RuntimeError("Could not encode strip to PNG")
-
-    png_bytes = png_buf.tobytes()
-    b64_str = base64.b64encode(png_bytes).decode("utf-8")
-    return BamlImage.from_base64("image/png", b64_str)
+    return encode_vision_image(strip_gray, "page_number")
 
 
 def read_strip_text(img_path: str) -> str:
@@ -95,104 +85,6 @@ def read_strip_text(img_path: str) -> str:
     return page_str
 
 
-def process_single_page_full(page_num, pdf_path, dpi, threshold, images_dir, page_text):
-    """
-    Render page → OCR footer → GetFactsFromPages + GetQueriesFromPages (BAML)
-    Returns: page_num, ocr_text, facts, queries, token_in, token_out
-    """
-
-    ocr_text, facts, queries = "", [], []
-    total_in, total_out = 0, 0  # token tallies
-
-    # -------- OCR bottom strip exactly as before --------
-    try:
-        doc = fitz.open(pdf_path)
-        page = doc.load_page(page_num - 1)
-        pix = page.get_pixmap(dpi=dpi)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples).convert("L")
-        doc.close()
-
-        np_img = np.array(img)
-        h, w = np_img.shape
-        y_start = y_end = None
-        scanning = False
-        for y in range(h - 1, -1, -1):
-            row = np_img[y, :]
-            if not scanning and np.any(row < threshold):
-                y_end, scanning = y, True
-            elif scanning and np.all(row > threshold):
-                y_start = y + 1
-                break
-
-        if y_start is not None and y_end is not None and y_end >= y_start:
-            # strip = gray[y_start : y_end + 1, :]
-            tmp_png = os.path.join(images_dir, f"page_{page_num}.png")
-            Image.fromarray(np_img[y_start : y_end + 1, :]).save(tmp_png)
-            try:
-                ocr_text = read_strip_text(tmp_png)
-                print(f"page number: {ocr_text}")
-            finally:
-                try:
-                    os.remove(tmp_png)
-                except OSError:
-                    pass
-    except Exception as e:
-        logger.error(f"OCR failure p.{page_num}: {e}")
-
-    # -------- BAML GetFactsFromPages --------
-    try:
-        c_facts = Collector(name=f"facts-p{page_num}")
-        facts = b.GetFactsFromPages(
-            page_text, baml_options={"collector": c_facts}
-        ).facts
-        total_in += c_facts.last.usage.input_tokens or 0
-        total_out += c_facts.last.usage.output_tokens or 0
-    except Exception as e:
-        logger.error(f"BAML facts error p.{page_num}: {e}")
-
-    # -------- BAML GetQueriesFromPages --------
-    try:
-        c_q = Collector(name=f"queries-p{page_num}")
-        queries = b.GetQueriesFromPages(
-            page_text, baml_options={"collector": c_q}
-        ).Queries
-        total_in += c_q.last.usage.input_tokens or 0
-        total_out += c_q.last.usage.output_tokens or 0
-    except Exception as e:
-        logger.error(f"BAML queries error p.{page_num}: {e}")
-
-    return page_num, ocr_text, facts, queries, total_in, total_out
-
-
-def extract_page_text(pdf_path: str, page_no: int) -> tuple[int, str]:
-    """
-    Worker function for extracting text+tables from a single page.
-    Returns (page_no, combined_text).
-    """
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            page = pdf.pages[page_no - 1]  # pdfplumber pages are 0-based internally
-            text = page.extract_text() or ""
-
-            # Gather tables if any
-            tables = page.extract_tables()
-            if tables:
-                tables_text = ""
-                for table in tables:
-                    for row in table:
-                        row_text = " | ".join(
-                            cell.strip() if cell else "" for cell in row
-                        )
-                        tables_text += row_text + "\n"
-                if tables_text.strip():
-                    text += "\n\n[TABLES]\n" + tables_text.strip()
-
-            return page_no, text
-    except Exception as e:
-        logger.error(f"Failed to extract text from page {page_no}: {e}")
-        return page_no, ""
-
-
 def process_pdf(
     pdf_path, company_name, company, dpi=200, threshold=245, max_workers=10
 ):
@@ -209,7 +101,6 @@ def process_pdf(
 
     Directory structure created under the current working directory:
         <company_name>/
-            temp_stripped_bottom_images/      ← temporary folder to hold cropped bottom‐strip images
             temp_pages_json/                  ← folder to hold the final JSON file
 
     Output:
@@ -235,94 +126,93 @@ def process_pdf(
     os.makedirs(base_dir, exist_ok=True)
     logger.debug(f"Created/verified base directory: {base_dir}")
 
-    # Create a temp directory for cropped bottom‐strip images
-    images_dir = os.path.join(base_dir, "temp_stripped_bottom_images")
-    os.makedirs(images_dir, exist_ok=True)
-    logger.debug(f"Created/verified images directory: {images_dir}")
-
     # Create a directory for the final JSON
     json_dir = os.path.join(base_dir, "temp_pages_json")
     os.makedirs(json_dir, exist_ok=True)
     logger.debug(f"Created/verified JSON directory: {json_dir}")
 
     # pages_to_process = range(1, 150)
-    logger.info("Starting Step 1: text+table extraction with 20 workers…")
+    logger.info("Starting Step 1: text+table extraction…")
     pages_data: dict[str, dict] = {}
-    # We'll submit one task per page_no
 
     doc = fitz.open(pdf_path)
     total_pages = doc.page_count
     doc.close()
 
-    with ProcessPoolExecutor(max_workers=20) as text_executor:
-        future_to_pageno = {
-            text_executor.submit(extract_page_text, pdf_path, pno): pno
-            for pno in range(1, total_pages + 1)
-            # for pno in range(1, 20)
+    table_stats: dict[str, int] = {}
+    for page_no, combined_text in iter_page_texts(
+        pdf_path, total_pages, stats=table_stats
+    ):
+        # Store the skeleton of pages_data; facts/queries/ocr fields will be filled later
+        pages_data[str(page_no)] = {
+            "page_content": combined_text,
+            "page_number_drhp": "",
+            "facts": [],
+            "queries": [],
         }
+        logger.info(f"Extracted text for page {page_no}")
 
-        for future in as_completed(future_to_pageno):
-            pno = future_to_pageno[future]
-            try:
-                page_no, combined_text = future.result()
-            except Exception as e:
-                logger.error(f"Exception extracting page {pno}: {e}")
-                page_no, combined_text = pno, ""
-            # Store the skeleton of pages_data; facts/queries/ocr fields will be filled later
-            pages_data[str(page_no)] = {
-                "page_content": combined_text,
-                "page_number_drhp": "",
-                "facts": [],
-                "queries": [],
-            }
-            logger.info(f"Extracted text for page {page_no}")
-
-    logger.info("Completed all text+table extraction. Now sleeping for 3 seconds…")
-    time.sleep(3)
+    logger.info(
+        f"📊 Table extraction ran on {table_stats.get('table_pages_extracted', 0)} pages, "
+        f"skipped {table_stats.get('table_pages_skipped', 0)} pages without ruling lines"
+    )
+    logger.info("Completed all text+table extraction.")
 
     logger.info(f"Total pages to process: {total_pages}")
 
-    # Launch a pool of worker processes
-    futures = {}
-    ctx = get_context("spawn")
-    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as ex:
-        futures = {
-            ex.submit(
-                process_single_page_full,
-                pno,
-                pdf_path,
-                dpi,
-                threshold,
-                images_dir,
-                pages_data[str(pno)]["page_content"],  # pass page text
-            ): pno
-            for pno in range(1, total_pages + 1)
-            # for pno in range(1, 20)
-        }
+    # Resolve page numbers from the text layer; OCR only what it can't fit
+    inferred_numbers, ocr_pages, _, _ = scan_text_layer(pdf_path)
+    logger.info(
+        f"✅ Avoided {len(inferred_numbers)} ExtractPageNumber calls; OCR needed for {len(ocr_pages)} pages"
+    )
 
-        for fut in as_completed(futures):
-            (pno, ocr_text, facts, queries, in_tok, out_tok) = (
-                fut.result()
-            )  # NEW tuple unpack
-            total_in += in_tok
-            total_out += out_tok  # accumulate tokens
-
-            # update JSON + Mongo exactly as before …
-            pages_data[str(pno)].update(
-                {
-                    "page_number_drhp": ocr_text,
-                    "facts": facts,
-                    "queries": queries,
-                }
+    # Eager enrichment runs as token-budgeted multi-page calls in the background
+    # while the footer OCR below resolves the remaining page numbers
+    enrichments = {}
+    with ThreadPoolExecutor(max_workers=1) as enrich_executor:
+        enrichment_future = None
+        if is_lazy():
+            logger.info("🧠 Lazy enrichment: facts/queries are generated when pages are retrieved")
+        else:
+            enrichment_future = enrich_executor.submit(
+                enrich_pages,
+                [(pno, pages_data[str(pno)]["page_content"]) for pno in range(1, total_pages + 1)],
+            )
+
+        # Footer OCR only for the pages the text layer could not number,
+        # read in stitched batches
+        ocr_numbers, ocr_in, ocr_out = ocr_page_numbers(
+            pdf_path, ocr_pages, dpi, threshold, max_workers
+        )
+        total_in += ocr_in
+        total_out += ocr_out
+        for pno in range(1, total_pages + 1):
+            pages_data[str(pno)]["page_number_drhp"] = inferred_numbers.get(
+                pno, ocr_numbers.get(pno, "")
             )
-            page_doc = Pages.objects(company=company, page_number_pdf=pno).first()
-            page_doc.page_content = pages_data[str(pno)]["page_content"]
-            page_doc.page_number_drhp = ocr_text
-            page_doc.facts = facts
-            page_doc.queries = queries
-            page_doc.save(update_qdrant=True)
-
-            logger.info(f"Completed full processing for page {pno}")
+
+        if enrichment_future is not None:
+            enrichments, in_tok, out_tok = enrichment_future.result()
+            total_in += in_tok
+            total_out += out_tok
+
+    # update JSON + Mongo exactly as before …
+    page_docs = []
+    for pno in range(1, total_pages + 1):
+        enrichment = enrichments.get(pno, {"facts": [], "queries": []})
+        pages_data[str(pno)].update(enrichment)
+        page_doc = Pages.objects(company=company, page_number_pdf=pno).first()
+        page_doc.page_content = pages_data[str(pno)]["page_content"]
+        page_doc.page_number_drhp = pages_data[str(pno)]["page_number_drhp"]
+        page_doc.facts = enrichment["facts"]
+        page_doc.queries = enrichment["queries"]
+        page_doc.save()
+        page_docs.append(page_doc)
+
+        logger.info(f"Completed full processing for page {pno}")
+
+    # Qdrant points for all pages, sparse vectors in batched SPLADE calls
+    Pages.upsert_many(page_docs)
 
     output = {pdf_name: pages_data}
     output_filename = f"{os.path.splitext(pdf_name)[0]}_pages.json"
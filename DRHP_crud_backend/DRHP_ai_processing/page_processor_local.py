@@ -1,8 +1,9 @@
 import os
 import json
 import logging
-import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import math
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from multiprocessing import get_context
 
 import pdfplumber
@@ -10,12 +11,18 @@ import fitz  # PyMuPDF
 import numpy as np
 from PIL import Image
 import cv2
-import base64
 
 from dotenv import load_dotenv
 from baml_client import b
 from baml_py import Collector, Image as baml_image_import
 
+from DRHP_ai_processing.text_extraction_backends import get_text_backend
+from DRHP_ai_processing.text_layer_scan import scan_text_layer
+from DRHP_ai_processing.vision_images import encode_vision_image, trim_whitespace
+from DRHP_ai_processing.scanned_page_ocr import iter_ocr_scanned_pages, merge_ocr_text
+from DRHP_ai_processing.boilerplate import strip_boilerplate
+from DRHP_ai_processing.token_counting import count_tokens
+
 load_dotenv()
 
 # Configure logging
@@ -25,133 +32,584 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Fraction of the page height (from the bottom) rendered when looking for the footer strip
+FOOTER_CLIP_FRACTION = 0.2
+# Footer strips stitched into one composite image per ExtractPageNumbersBatch call
+PAGE_NUMBER_BATCH_SIZE = 20
+# Strips taller than this (in px) are not stitched and go through ExtractPageNumber alone
+MAX_STITCH_STRIP_HEIGHT = 120
+# Text extraction: smallest page range worth its own document open, and
+# how many ranges each worker gets so uneven pages still balance out
+MIN_PAGES_PER_CHUNK = 8
+CHUNKS_PER_WORKER = 4
+
+
+def locate_footer_strip(
+    page: fitz.Page, dpi: int, threshold: int, clip_fraction: float = FOOTER_CLIP_FRACTION
+) -> np.ndarray | None:
+    """
+    Return the bottom-most band of rows containing dark pixels (the footer
+    strip) as a grayscale array, or None when the footer area is blank.
+
+    Only the bottom `clip_fraction` of the page is rendered, directly in
+    grayscale, and the pixmap buffer is read in place. The whole page is only
+    rendered when the strip runs into the top edge of the clip.
+    """
+    rect = page.rect
+    footer_clip = fitz.Rect(
+        rect.x0, rect.y1 - rect.height * clip_fraction, rect.x1, rect.y1
+    )
+    for clip in (footer_clip, None):
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, clip=clip, alpha=False)
+        gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(
+            pix.height, pix.stride
+        )[:, : pix.width]
+
+        # A row is "dark" if any pixel is below threshold and "blank" if all
+        # pixels are above it, so the row minimum answers both questions
+        row_min = gray.min(axis=1)
+        dark_rows = np.flatnonzero(row_min < threshold)
+        if dark_rows.size == 0:
+            return None
+        y_end = dark_rows[-1]
+        blank_rows = np.flatnonzero(row_min[:y_end] > threshold)
+        if blank_rows.size:
+            y_start = blank_rows[-1] + 1
+            return gray[y_start : y_end + 1].copy()
+    return None
+
+
 def strip_to_baml_image(strip_gray: np.ndarray) -> baml_image_import:
     """
-    Encode a grayscale numpy array as PNG‐bytes and then Base64-encode it
-    to create a BAML Image object.
+    Encode a grayscale footer strip as a BAML Image object, trimmed to its
+    content and losslessly compressed (see vision_images "page_number" profile).
     """
-    if strip_gray.size == 0:
-        raise ValueError("Strip image is empty; nothing to send to BAML.")
+    return encode_vision_image(strip_gray, "page_number")
 
-    # Save to a temporary PNG in memory
-    success, png_buf = cv2.imencode(".png", strip_gray)
-    if not success:
-        raise RuntimeError("Could not encode strip to PNG")
 
-    png_bytes = png_buf.tobytes()
-    b64_str = base64.b64encode(png_bytes).decode("utf-8")
-    return baml_image_import.from_base64("image/png", b64_str)
+def read_strip_array(strip_gray: np.ndarray) -> str:
+    """
+    OCR a footer strip held in memory (grayscale numpy array) with BAML's
+    ExtractPageNumber. Returns the page number string, or "" if none.
+    """
+    result = b.ExtractPageNumber(strip_to_baml_image(strip_gray))
+    if result.is_page_number:
+        return result.page_number
+    else:
+        return ""
 
 
 def read_strip_text(img_path: str) -> str:
     """
     OCR for very-short-height, very-wide images that contain a single line of
     text (page numbers, headers, footers, etc.), using BAML's ExtractPageNumber.
-
-    Steps:
-      1. Load the image from disk (as grayscale).
-      2. If needed, convert to a 2D numpy array of type uint8.
-      3. Turn that numpy array into a BAML Image via strip_to_baml_image().
-      4. Call BAML's ExtractPageNumber on it (via call_baml_llm_on_strip()).
-      5. Return the extracted string (e.g. "5" for page 5).
+    Loads the strip from disk (as grayscale) and defers to read_strip_array();
+    the pipeline itself passes strips in memory.
     """
-
-    # 1) Read the image in grayscale
     gray = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
     if gray is None:
         raise FileNotFoundError(f"Could not load image at {img_path}")
+    return read_strip_array(gray)
 
-    # 2) (Optional) If your strip is colored (3‐channel), uncomment and convert:
-    # if len(gray.shape) == 3 and gray.shape[2] == 3:
-    #     gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
 
-    # 3) Encode to BAMLImage and send to BAML
-    baml_img = strip_to_baml_image(gray)
-    result = b.ExtractPageNumber(baml_img)
-    if result.is_page_number:
-        return result.page_number
-    else:
-        return ""
+def render_footer_strip(page_num, pdf_path, dpi, threshold):
+    """
+    Worker function: open the PDF and return (page_num, footer strip or None).
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return page_num, locate_footer_strip(doc.load_page(page_num - 1), dpi, threshold)
+    finally:
+        doc.close()
 
 
-def process_single_page_full(page_num, pdf_path, dpi, threshold, images_dir, page_text):
+def stitch_strips(
+    labelled_strips: list[tuple[int, np.ndarray]], label_width: int = 160, gap: int = 12
+) -> np.ndarray:
+    """
+    Stack footer strips into one grayscale composite. Each row carries a
+    "[label]" tag in a left margin and rows are split by a grey rule, so the
+    model can report results per label.
     """
-    Render page → OCR footer → Only extract page content and page numbers.
-    Returns: page_num, ocr_text, total_in, total_out
+    width = label_width + max(strip.shape[1] for _, strip in labelled_strips)
+    separator = np.full((gap, width), 255, dtype=np.uint8)
+    separator[gap // 2, :] = 128
+
+    rows = []
+    for label, strip in labelled_strips:
+        height = max(strip.shape[0], 40)
+        row = np.full((height, width), 255, dtype=np.uint8)
+        row[: strip.shape[0], label_width : label_width + strip.shape[1]] = strip
+        cv2.putText(
+            row,
+            f"[{label}]",
+            (6, min(height - 8, 30)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            0,
+            2,
+        )
+        rows.extend([row, separator])
+    return np.vstack(rows[:-1])
+
+
+def read_strips_batch(
+    labelled_strips: list[tuple[int, np.ndarray]],
+) -> tuple[dict[int, str], int, int]:
     """
-    ocr_text = ""
-    total_in, total_out = 0, 0  # token tallies
+    Read the page numbers of several footer strips with one
+    ExtractPageNumbersBatch call on a stitched composite. Labels the model
+    skipped are retried one strip at a time with ExtractPageNumber.
 
-    # -------- OCR bottom strip exactly as before --------
-    try:
-        doc = fitz.open(pdf_path)
-        page = doc.load_page(page_num - 1)
-        pix = page.get_pixmap(dpi=dpi)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples).convert("L")
-        doc.close()
+    Returns: ({label: page_number}, token_in, token_out)
+    """
+    results: dict[int, str] = {}
+    total_in = total_out = 0
 
-        np_img = np.array(img)
-        h, w = np_img.shape
-        y_start = y_end = None
-        scanning = False
-        for y in range(h - 1, -1, -1):
-            row = np_img[y, :]
-            if not scanning and np.any(row < threshold):
-                y_end, scanning = y, True
-            elif scanning and np.all(row > threshold):
-                y_start = y + 1
-                break
-
-        if y_start is not None and y_end is not None and y_end >= y_start:
-            tmp_png = os.path.join(images_dir, f"page_{page_num}.png")
-            Image.fromarray(np_img[y_start : y_end + 1, :]).save(tmp_png)
-            try:
-                ocr_text = read_strip_text(tmp_png)
-                print(f"page number: {ocr_text}")
-            finally:
-                try:
-                    os.remove(tmp_png)
-                except OSError:
-                    pass
+    try:
+        collector = Collector(name=f"page-numbers-{labelled_strips[0][0]}")
+        composite = encode_vision_image(
+            stitch_strips([(l, trim_whitespace(s)) for l, s in labelled_strips]),
+            "page_number_batch",
+        )
+        batch = b.ExtractPageNumbersBatch(
+            composite, baml_options={"collector": collector}
+        )
+        total_in += collector.last.usage.input_tokens or 0
+        total_out += collector.last.usage.output_tokens or 0
+
+        labels = {label for label, _ in labelled_strips}
+        for item in batch:
+            if item.label in labels:
+                results[item.label] = item.page_number if item.is_page_number else ""
     except Exception as e:
-        logger.error(f"OCR failure p.{page_num}: {e}")
+        logger.error(
+            f"Batch page-number OCR failed for pages {[l for l, _ in labelled_strips]}: {e}"
+        )
+
+    for label, strip in labelled_strips:
+        if label in results:
+            continue
+        try:
+            results[label] = read_strip_array(strip)
+        except Exception as e:
+            logger.error(f"OCR failure p.{label}: {e}")
+            results[label] = ""
 
-    return page_num, ocr_text, total_in, total_out
+    return results, total_in, total_out
 
 
-def extract_page_text(pdf_path: str, page_no: int) -> tuple[int, str]:
+def extract_page_text(
+    pdf_path: str, page_no: int, backend: str | None = None
+) -> tuple[int, str]:
     """
     Worker function for extracting text+tables from a single page.
     Returns (page_no, combined_text).
     """
+    text_backend = get_text_backend(backend)
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            page = pdf.pages[page_no - 1]  # pdfplumber pages are 0-based internally
-            text = page.extract_text() or ""
-
-            # Gather tables if any
-            tables = page.extract_tables()
-            if tables:
-                tables_text = ""
-                for table in tables:
-                    for row in table:
-                        row_text = " | ".join(
-                            cell.strip() if cell else "" for cell in row
-                        )
-                        tables_text += row_text + "\n"
-                if tables_text.strip():
-                    text += "\n\n[TABLES]\n" + tables_text.strip()
-
-            return page_no, text
+        doc = text_backend.open(pdf_path)
+        try:
+            return page_no, text_backend.page_text(doc, page_no)
+        finally:
+            text_backend.close(doc)
     except Exception as e:
         logger.error(f"Failed to extract text from page {page_no}: {e}")
         return page_no, ""
 
 
-def process_pdf_local(pdf_path, company_name, dpi=200, threshold=245, max_workers=10):
+def extract_page_range_text(
+    pdf_path: str, first_page: int, last_page: int, backend: str | None = None
+) -> tuple[list[tuple[int, str]], dict[str, int]]:
+    """
+    Worker function: open the PDF once and extract text+tables for the
+    contiguous 1-based range [first_page, last_page] with the named backend.
+    Returns ([(page_no, combined_text), ...] in page order, table gate counters).
+    """
+    text_backend = get_text_backend(backend)
+    results = []
+    try:
+        doc = text_backend.open(pdf_path)
+        try:
+            for page_no in range(first_page, last_page + 1):
+                try:
+                    results.append((page_no, text_backend.page_text(doc, page_no)))
+                except Exception as e:
+                    logger.error(f"Failed to extract text from page {page_no}: {e}")
+                    results.append((page_no, ""))
+        finally:
+            text_backend.close(doc)
+    except Exception as e:
+        logger.error(
+            f"Failed to open {pdf_path} for pages {first_page}-{last_page}: {e}"
+        )
+        done = {page_no for page_no, _ in results}
+        results += [
+            (page_no, "")
+            for page_no in range(first_page, last_page + 1)
+            if page_no not in done
+        ]
+    table_counts = {
+        "table_pages_extracted": text_backend.table_pages_extracted,
+        "table_pages_skipped": text_backend.table_pages_skipped,
+        "table_chars_masked": text_backend.table_chars_masked,
+    }
+    return results, table_counts
+
+
+def plan_page_chunks(
+    total_pages: int, max_workers: int | None = None
+) -> tuple[int, list[tuple[int, int]]]:
+    """
+    Split pages 1..total_pages into contiguous ranges for the text workers.
+    The worker count is capped by the CPU count and by how many chunks of at
+    least MIN_PAGES_PER_CHUNK pages the document has.
+    Returns (workers, [(first_page, last_page), ...]).
+    """
+    cpu_workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(cpu_workers, math.ceil(total_pages / MIN_PAGES_PER_CHUNK)))
+    chunk_size = max(
+        MIN_PAGES_PER_CHUNK, math.ceil(total_pages / (workers * CHUNKS_PER_WORKER))
+    )
+    chunks = [
+        (first, min(first + chunk_size - 1, total_pages))
+        for first in range(1, total_pages + 1, chunk_size)
+    ]
+    return workers, chunks
+
+
+def iter_page_texts(
+    pdf_path: str,
+    total_pages: int,
+    max_workers: int | None = None,
+    backend: str | None = None,
+    stats: dict | None = None,
+):
+    """
+    Extract text+tables for every page with chunked worker processes and
+    yield (page_no, combined_text) in page order as chunks complete.
+    `backend` names a text_extraction_backends backend (default: PDF_TEXT_BACKEND).
+    If `stats` is given, the table pre-check counters (table_pages_extracted,
+    table_pages_skipped, table_chars_masked) are accumulated into it.
+    """
+    backend = get_text_backend(backend).name
+    workers, chunks = plan_page_chunks(total_pages, max_workers)
+    logger.info(
+        f"Extracting text for {total_pages} pages in {len(chunks)} chunks with {workers} workers ({backend})…"
+    )
+    with ProcessPoolExecutor(max_workers=workers) as text_executor:
+        futures = [
+            text_executor.submit(
+                extract_page_range_text, pdf_path, first, last, backend
+            )
+            for first, last in chunks
+        ]
+        for (first, last), future in zip(chunks, futures):
+            try:
+                results, table_counts = future.result()
+            except Exception as e:
+                logger.error(f"Exception extracting pages {first}-{last}: {e}")
+                results, table_counts = [(pno, "") for pno in range(first, last + 1)], {}
+            if stats is not None:
+                for key, count in table_counts.items():
+                    stats[key] = stats.get(key, 0) + count
+            yield from results
+
+
+def extract_front_matter_text(pdf_path: str, max_pages: int = 10) -> str:
+    """
+    Extract plain text from only the first `max_pages` pages of the PDF.
+    Used to identify the company (name, CIN) before committing to a full
+    extraction run. Tables are skipped since the cover pages only need prose.
+    """
+    texts = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            try:
+                texts.append(page.extract_text() or "")
+            except Exception as e:
+                logger.error(
+                    f"Failed to extract front matter text from page {page.page_number}: {e}"
+                )
+    return "\n".join(texts)
+
+
+def iter_ocr_page_numbers(
+    pdf_path, page_nos, dpi=200, threshold=245, max_workers=10, stats=None, images_dir=None
+):
+    """
+    Vision fallback for printed page numbers: render the footer strips of
+    `page_nos` in worker processes and read them with stitched batch OCR,
+    yielding ({page_no: page_number_drhp}, token_in, token_out) for each
+    batch as soon as it is read. Pages without a footer strip come first,
+    with empty numbers. Strips are also written to `images_dir` when one is
+    given (debugging).
+    """
+    if not page_nos:
+        return
+
+    # Render the footer strips in a pool of worker processes
+    strips: dict[int, np.ndarray] = {}
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as ex:
+        futures = {
+            ex.submit(render_footer_strip, pno, pdf_path, dpi, threshold): pno
+            for pno in page_nos
+        }
+
+        for fut in as_completed(futures):
+            pno = futures[fut]
+            try:
+                _, strip = fut.result()
+            except Exception as e:
+                logger.error(f"Footer render failure p.{pno}: {e}")
+                strip = None
+            if strip is not None:
+                strips[pno] = strip
+                if images_dir:
+                    Image.fromarray(strip).save(
+                        os.path.join(images_dir, f"page_{pno}.png")
+                    )
+
+    no_strip = {pno: "" for pno in page_nos if pno not in strips}
+    if no_strip:
+        yield no_strip, 0, 0
+
+    # Stitch short strips into composites; tall ones are sent on their own
+    stitchable = [
+        (pno, strips[pno])
+        for pno in sorted(strips)
+        if strips[pno].shape[0] <= MAX_STITCH_STRIP_HEIGHT
+    ]
+    batches = [
+        stitchable[i : i + PAGE_NUMBER_BATCH_SIZE]
+        for i in range(0, len(stitchable), PAGE_NUMBER_BATCH_SIZE)
+    ]
+    batches += [
+        [(pno, strip)]
+        for pno, strip in sorted(strips.items())
+        if strip.shape[0] > MAX_STITCH_STRIP_HEIGHT
+    ]
+    logger.info(
+        f"🔄 Reading {len(strips)} footer strips in {len(batches)} page-number OCR calls"
+    )
+    if stats is not None:
+        stats["page_number_llm_calls"] = len(batches)
+        stats["page_number_llm_calls_avoided"] = (
+            stats.get("page_number_llm_calls_avoided", 0) + len(page_nos) - len(batches)
+        )
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = [ex.submit(read_strips_batch, batch) for batch in batches]
+            for fut in as_completed(futures):
+                yield fut.result()
+
+
+def ocr_page_numbers(
+    pdf_path, page_nos, dpi=200, threshold=245, max_workers=10, stats=None, images_dir=None
+):
+    """
+    iter_ocr_page_numbers() for callers that need every page at once.
+
+    Returns: ({page_no: page_number_drhp}, token_in, token_out)
+    """
+    total_in = total_out = 0
+    numbers = {pno: "" for pno in page_nos}
+    for batch_numbers, in_tok, out_tok in iter_ocr_page_numbers(
+        pdf_path, page_nos, dpi, threshold, max_workers, stats, images_dir
+    ):
+        total_in += in_tok
+        total_out += out_tok  # accumulate tokens
+        numbers.update(batch_numbers)
+    return numbers, total_in, total_out
+
+
+def stream_pdf_pages(
+    pdf_path,
+    dpi=200,
+    threshold=245,
+    max_workers=10,
+    stats=None,
+    text_backend=None,
+    images_dir=None,
+):
+    """
+    Extract a PDF page by page and yield (page_no, page_info) as soon as each
+    page is complete, so downstream stages (Mongo, embeddings) can start
+    before the whole document is done.
+
+    page_info = {"page_content", "page_content_raw", "page_number_pdf", "page_number_drhp"}
+
+    One fast pass over the whole text layer (scan_text_layer) runs before
+    streaming starts. It infers printed page numbers, finds scanned pages and
+    finds lines repeating on most pages (running headers, footers,
+    disclaimers). Those lines are removed from page_content, which is what
+    gets embedded and prompted; page_content_raw keeps the text as extracted.
+
+    Pages whose printed number was inferred from the text layer are yielded
+    in page order straight off the text workers. The vision OCR for the rest
+    runs concurrently in the background; those pages are held back (text
+    only) and yielded as soon as the OCR batch holding their footer is read.
+
+    Pages with an empty or near-empty text layer (scanned annexures) are
+    OCRed locally with Tesseract in the background too, held back the same
+    way until their chunk is done, and get the OCR text merged into
+    page_content under [OCR].
+
+    If `stats` is given, the page-number, table pre-check, Tesseract fallback,
+    boilerplate (boilerplate_lines, boilerplate_lines_removed,
+    boilerplate_tokens_removed, page_tokens_raw) and OCR token counters
+    (ocr_tokens_in / ocr_tokens_out) are written into it.
+    """
+    doc = fitz.open(pdf_path)
+    total_pages = doc.page_count
+    doc.close()
+    logger.info(f"Total pages to process: {total_pages}")
+
+    # Resolve page numbers from the text layer; OCR only what it can't fit
+    inferred_numbers, ocr_pages, scanned_pages, boilerplate = scan_text_layer(pdf_path)
+    logger.info(
+        f"✅ Avoided {len(inferred_numbers)} ExtractPageNumber calls; OCR needed for {len(ocr_pages)} pages"
+    )
+    run_stats = {
+        "page_numbers_inferred": len(inferred_numbers),
+        "page_number_llm_calls_avoided": len(inferred_numbers),
+        "ocr_tokens_in": 0,
+        "ocr_tokens_out": 0,
+    }
+
+    scanned_set = set(scanned_pages)
+    if scanned_pages:
+        logger.info(f"🔤 {len(scanned_pages)} pages have no usable text layer")
+
+    run_stats.update(
+        boilerplate_lines=len(boilerplate),
+        boilerplate_lines_removed=0,
+        boilerplate_tokens_removed=0,
+        page_tokens_raw=0,
+    )
+
+    def page_info_for(page_no, raw_text, page_number_drhp):
+        content, removed = strip_boilerplate(raw_text, boilerplate)
+        run_stats["page_tokens_raw"] += count_tokens(raw_text)
+        if removed:
+            run_stats["boilerplate_lines_removed"] += len(removed)
+            run_stats["boilerplate_tokens_removed"] += count_tokens("\n".join(removed))
+        return {
+            "page_content": content,
+            "page_content_raw": raw_text,
+            "page_number_pdf": page_no,
+            "page_number_drhp": page_number_drhp,
+        }
+
+    # Both OCR stages report batch by batch through `events`; None marks the end
+    events: queue.Queue = queue.Queue()
+
+    def produce(kind, results):
+        try:
+            for item in results:
+                events.put((kind, item))
+        except Exception as e:
+            logger.error(f"❌ {kind} OCR failed: {e}")
+        finally:
+            events.put((kind, None))
+
+    ocr_numbers: dict[int, str] = {}
+    scanned_texts: dict[int, str] = {}
+    running = {"page_numbers", "scanned"}
+    held_back: dict[int, str] = {}
+
+    def handle(kind, item):
+        if item is None:
+            running.discard(kind)
+        elif kind == "page_numbers":
+            numbers, in_tok, out_tok = item
+            ocr_numbers.update(numbers)
+            run_stats["ocr_tokens_in"] += in_tok
+            run_stats["ocr_tokens_out"] += out_tok
+        else:
+            scanned_texts.update(item)
+
+    def release():
+        """Yield the held-back pages whose OCR results are all in."""
+        for page_no in sorted(held_back):
+            if "page_numbers" in running and page_no not in inferred_numbers and page_no not in ocr_numbers:
+                continue
+            if "scanned" in running and page_no in scanned_set and page_no not in scanned_texts:
+                continue
+            yield page_no, page_info_for(
+                page_no,
+                merge_ocr_text(held_back.pop(page_no), scanned_texts.get(page_no, "")),
+                inferred_numbers.get(page_no, ocr_numbers.get(page_no, "")),
+            )
+
+    ocr_executor = ThreadPoolExecutor(max_workers=2)
+    ocr_executor.submit(
+        produce, "scanned", iter_ocr_scanned_pages(pdf_path, scanned_pages, None, run_stats)
+    )
+    ocr_executor.submit(
+        produce,
+        "page_numbers",
+        iter_ocr_page_numbers(
+            pdf_path, ocr_pages, dpi, threshold, max_workers, run_stats, images_dir
+        ),
+    )
+    try:
+        for page_no, combined_text in iter_page_texts(
+            pdf_path, total_pages, backend=text_backend, stats=run_stats
+        ):
+            if page_no in inferred_numbers and page_no not in scanned_set:
+                yield page_no, page_info_for(
+                    page_no, combined_text, inferred_numbers[page_no]
+                )
+            else:
+                held_back[page_no] = combined_text
+            while True:
+                try:
+                    handle(*events.get_nowait())
+                except queue.Empty:
+                    break
+            yield from release()
+
+        logger.info(
+            f"📊 Table extraction ran on {run_stats.get('table_pages_extracted', 0)} pages, "
+            f"skipped {run_stats.get('table_pages_skipped', 0)} pages without ruling lines, "
+            f"kept {run_stats.get('table_chars_masked', 0)} chars of table text out of the prose"
+        )
+
+        while running:
+            handle(*events.get())
+            yield from release()
+        yield from release()
+
+        tokens_raw = run_stats["page_tokens_raw"]
+        tokens_removed = run_stats["boilerplate_tokens_removed"]
+        logger.info(
+            f"🧹 Stripped {run_stats['boilerplate_lines_removed']} boilerplate lines: "
+            f"{tokens_removed} of {tokens_raw} tokens "
+            f"({tokens_removed / max(tokens_raw, 1):.1%}) saved per embedding/prompt pass"
+        )
+    finally:
+        ocr_executor.shutdown(wait=True)
+        if stats is not None:
+            stats.update(run_stats)
+
+
+def process_pdf_local(
+    pdf_path,
+    company_name,
+    dpi=200,
+    threshold=245,
+    max_workers=10,
+    stats=None,
+    text_backend=None,
+    save_strips=False,
+):
     """
     Processes a PDF to extract per-page text and bottom‐strip page‐number OCR, saving results as JSON.
     This version is completely MongoDB-free and saves everything locally.
+    Pipelines that ingest pages directly should consume stream_pdf_pages() instead.
 
     Args:
         pdf_path (str): Path to the source PDF file.
@@ -159,20 +617,24 @@ def process_pdf_local(pdf_path, company_name, dpi=200, threshold=245, max_worker
         dpi (int, optional): DPI for rendering pages with PyMuPDF. Default is 200.
         threshold (int, optional): Grayscale threshold for detecting dark pixels in the bottom strip. Default is 245.
         max_workers (int, optional): Number of parallel processes to use for OCR. Default is 10.
+        stats (dict, optional): If given, page-number inference and table pre-check counters are written into it.
+        text_backend (str, optional): Text extraction backend ("pdfplumber" or "pymupdf").
+            Defaults to the PDF_TEXT_BACKEND env var, else pdfplumber.
+        save_strips (bool, optional): Also write the footer strips as PNGs to
+            temp_stripped_bottom_images (debugging only; OCR always reads them from memory).
+
+    Printed page numbers are first inferred from the PDF text layer; only the pages
+    where that fit is ambiguous are sent to the ExtractPageNumber vision call.
 
     Directory structure created under the current working directory:
         <company_name>/
-            temp_stripped_bottom_images/      ← temporary folder to hold cropped bottom‐strip images
+            temp_stripped_bottom_images/      ← cropped bottom‐strip images (only with save_strips)
             temp_pages_json/                  ← folder to hold the final JSON file
 
     Output:
         A JSON file saved to:
             <company_name>/temp_pages_json/<pdf_filename>_pages.json
     """
-    # Initialize token counters
-    total_in = 0
-    total_out = 0
-
     logger.info(f"Starting PDF processing for {pdf_path}")
 
     # Ensure the PDF exists
@@ -188,87 +650,43 @@ def process_pdf_local(pdf_path, company_name, dpi=200, threshold=245, max_worker
     os.makedirs(base_dir, exist_ok=True)
     logger.debug(f"Created/verified base directory: {base_dir}")
 
-    # Create a temp directory for cropped bottom‐strip images
-    images_dir = os.path.join(base_dir, "temp_stripped_bottom_images")
-    os.makedirs(images_dir, exist_ok=True)
-    logger.debug(f"Created/verified images directory: {images_dir}")
+    # Cropped bottom‐strip images are only written to disk when debugging
+    images_dir = None
+    if save_strips:
+        images_dir = os.path.join(base_dir, "temp_stripped_bottom_images")
+        os.makedirs(images_dir, exist_ok=True)
+        logger.debug(f"Created/verified images directory: {images_dir}")
 
     # Create a directory for the final JSON
     json_dir = os.path.join(base_dir, "temp_pages_json")
     os.makedirs(json_dir, exist_ok=True)
     logger.debug(f"Created/verified JSON directory: {json_dir}")
 
-    logger.info("Starting Step 1: text+table extraction with 20 workers…")
-    pages_data: dict[str, dict] = {}
-    # We'll submit one task per page_no
-
-    doc = fitz.open(pdf_path)
-    total_pages = doc.page_count
-    doc.close()
-
-    with ProcessPoolExecutor(max_workers=20) as text_executor:
-        future_to_pageno = {
-            text_executor.submit(extract_page_text, pdf_path, pno): pno
-            for pno in range(1, total_pages + 1)
-        }
-
-        for future in as_completed(future_to_pageno):
-            pno = future_to_pageno[future]
-            try:
-                page_no, combined_text = future.result()
-            except Exception as e:
-                logger.error(f"Exception extracting page {pno}: {e}")
-                page_no, combined_text = pno, ""
-            # Store the skeleton of pages_data
-            pages_data[str(page_no)] = {
-                "page_content": combined_text,
-                "page_number_drhp": "",
-            }
-            logger.info(f"Extracted text for page {page_no}")
-
-    logger.info("Completed all text+table extraction. Now sleeping for 3 seconds…")
-    time.sleep(3)
-
-    logger.info(f"Total pages to process: {total_pages}")
-
-    # Launch a pool of worker processes
-    futures = {}
-    ctx = get_context("spawn")
-    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as ex:
-        futures = {
-            ex.submit(
-                process_single_page_full,
-                pno,
-                pdf_path,
-                dpi,
-                threshold,
-                images_dir,
-                pages_data[str(pno)]["page_content"],  # pass page text
-            ): pno
-            for pno in range(1, total_pages + 1)
-        }
-
-        for fut in as_completed(futures):
-            (pno, ocr_text, in_tok, out_tok) = fut.result()
-            total_in += in_tok
-            total_out += out_tok  # accumulate tokens
-
-            # update JSON (NO MongoDB operations)
-            pages_data[str(pno)].update(
-                {
-                    "page_number_pdf": pno,
-                    "page_number_drhp": ocr_text,
-                }
-            )
-
-            logger.info(f"Completed full processing for page {pno}")
-
-    output = {pdf_name: pages_data}
+    run_stats: dict = {}
+    pages_data: dict[int, dict] = {}
+    for page_no, page_info in stream_pdf_pages(
+        pdf_path,
+        dpi=dpi,
+        threshold=threshold,
+        max_workers=max_workers,
+        stats=run_stats,
+        text_backend=text_backend,
+        images_dir=images_dir,
+    ):
+        pages_data[page_no] = page_info
+        logger.info(f"Completed full processing for page {page_no}")
+
+    total_in = run_stats.pop("ocr_tokens_in", 0)
+    total_out = run_stats.pop("ocr_tokens_out", 0)
+    if stats is not None:
+        stats.update(run_stats)
+
+    output = {pdf_name: {str(pno): pages_data[pno] for pno in sorted(pages_data)}}
     output_filename = f"{os.path.splitext(pdf_name)[0]}_pages.json"
     output_path = os.path.join(json_dir, output_filename)
 
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4, ensure_ascii=False)
+        json.dump(output, f, ensure_ascii=False)
 
     logger.info(f"Successfully Processed PDF")
     return total_in, total_out
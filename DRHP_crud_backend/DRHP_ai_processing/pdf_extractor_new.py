@@ -1,7 +1,6 @@
 import sys
 import os
 import logging
-import pdfplumber
 import fitz  # PyMuPDF
 import numpy as np
 import cv2
@@ -9,6 +8,8 @@ import base64
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from DRHP_ai_processing.page_processor_local import iter_page_texts
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,7 +44,9 @@ def pdf_page_to_cv2_image(pdf_path, page_num, dpi=200):
         raise
 
 
-def extract_all_pages_local(pdf_path, company_name, dpi=200, max_workers=3):
+def extract_all_pages_local(
+    pdf_path, company_name, dpi=200, max_workers=3, text_backend=None
+):
     logger.info("Starting local page extraction...")
     base_dir = os.path.join(os.getcwd(), company_name)
     images_dir = os.path.join(base_dir, "temp_stripped_bottom_images")
@@ -51,29 +54,26 @@ def extract_all_pages_local(pdf_path, company_name, dpi=200, max_workers=3):
     os.makedirs(images_dir, exist_ok=True)
     os.makedirs(json_dir, exist_ok=True)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
+    doc = fitz.open(pdf_path)
+    total_pages = doc.page_count
+    doc.close()
+
+    # Extract text and tables with chunked workers (one PDF open per chunk)
+    table_stats = {}
+    page_texts = dict(
+        iter_page_texts(pdf_path, total_pages, backend=text_backend, stats=table_stats)
+    )
+    logger.info(
+        f"Table extraction ran on {table_stats.get('table_pages_extracted', 0)} pages, "
+        f"skipped {table_stats.get('table_pages_skipped', 0)} pages without ruling lines"
+    )
 
     pages_data = {}
 
     def process_page(idx):
         page_num = idx + 1
+        text = page_texts.get(page_num, "")
         try:
-            # Extract text and tables
-            with pdfplumber.open(pdf_path) as pdf:
-                page = pdf.pages[idx]
-                text = page.extract_text() or ""
-                tables = page.extract_tables()
-                if tables:
-                    tables_text = ""
-                    for table in tables:
-                        for row in table:
-                            row_text = " | ".join(
-                                cell.strip() if cell else "" for cell in row
-                            )
-                            tables_text += row_text + "\n"
-                    if tables_text.strip():
-                        text += "\n\n[TABLES]\n" + tables_text.strip()
             # Save bottom strip image
             cv2_img = pdf_page_to_cv2_image(pdf_path, page_num, dpi=dpi)
             img_bytes = img_to_bytes(cv2_img)
@@ -84,7 +84,7 @@ def extract_all_pages_local(pdf_path, company_name, dpi=200, max_workers=3):
             return str(page_num), {"page_content": text, "image_path": img_path}
         except Exception as e:
             logger.error(f"Error processing page {page_num}: {e}")
-            return str(page_num), {"page_content": "", "image_path": ""}
+            return str(page_num), {"page_content": text, "image_path": ""}
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [executor.submit(process_page, idx) for idx in range(total_pages)]
@@ -113,6 +113,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--max_workers", type=int, default=3, help="Number of parallel workers"
     )
+    parser.add_argument(
+        "--text_backend",
+        choices=["pdfplumber", "pymupdf"],
+        default=None,
+        help="Text extraction backend (defaults to PDF_TEXT_BACKEND or pdfplumber)",
+    )
     args = parser.parse_args()
 
     extract_all_pages_local(
@@ -120,6 +126,7 @@ if __name__ == "__main__":
         company_name=args.company_name,
         dpi=args.dpi,
         max_workers=args.max_workers,
+        text_backend=args.text_backend,
     )
     print("Extraction complete!")
     print(
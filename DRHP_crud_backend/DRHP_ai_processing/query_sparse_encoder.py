@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import math
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.splade_client import splade_sparse
+
+logger = logging.getLogger(__name__)
+
+
+# Inference-free query-side sparse encoding: a query is tokenized with the
+# SPLADE model's own tokenizer (so token ids match the "sparse" index) and
+# each distinct token is weighted by a precomputed IDF table, instead of a
+# round trip to the SPLADE service for a forward pass.
+#   "splade"  full SPLADE query encoding via the service (default)
+#   "idf"     in-process tokenizer + IDF weights; falls back to "splade"
+#             when the tokenizer or weight table is unavailable
+QUERY_SPARSE_MODE = os.getenv("DRHP_QUERY_SPARSE_MODE", "splade")
+SPLADE_MODEL_ID = os.getenv("SPLADE_MODEL_ID", "naver/splade-cocondenser-ensembledistil")
+# tokenizer.json of the SPLADE model; downloaded from the HF hub when unset
+SPLADE_TOKENIZER_PATH = os.getenv("SPLADE_TOKENIZER_PATH")
+QUERY_WEIGHTS_PATH = os.getenv(
+    "DRHP_QUERY_WEIGHTS_PATH",
+    os.path.join(
+        os.path.expanduser("~"),
+        ".cache",
+        "drhp_query_sparse",
+        re.sub(r"[^A-Za-z0-9]+", "_", SPLADE_MODEL_ID) + "-idf.npz",
+    ),
+)
+
+
+def load_tokenizer():
+    from tokenizers import Tokenizer
+
+    if SPLADE_TOKENIZER_PATH:
+        return Tokenizer.from_file(SPLADE_TOKENIZER_PATH)
+    return Tokenizer.from_pretrained(SPLADE_MODEL_ID)
+
+
+def build_query_weights(texts: Iterable[str], tokenizer) -> tuple[np.ndarray, int]:
+    """
+    BM25-style IDF per vocabulary token over a corpus of page texts:
+        idf = log(1 + (N - df + 0.5) / (df + 0.5))
+    Tokens never seen get the maximum IDF; special tokens get 0.
+    Returns (weights[vocab_size], number of documents).
+    """
+    vocab_size = tokenizer.get_vocab_size(with_added_tokens=True)
+    df = np.zeros(vocab_size, dtype=np.int64)
+    documents = 0
+    batch: List[str] = []
+
+    def count(batch: List[str]) -> None:
+        for encoding in tokenizer.encode_batch(batch, add_special_tokens=False):
+            df[np.unique(np.asarray(encoding.ids, dtype=np.int64))] += 1
+
+    for text in texts:
+        if not text or not text.strip():
+            continue
+        documents += 1
+        batch.append(text)
+        if len(batch) == 256:
+            count(batch)
+            batch = []
+    if batch:
+        count(batch)
+
+    weights = np.log1p((documents - df + 0.5) / (df + 0.5)).astype(np.float32)
+    for token_id, token in tokenizer.get_added_tokens_decoder().items():
+        if token.special and token_id < vocab_size:
+            weights[token_id] = 0.0
+    return weights, documents
+
+
+class QuerySparseEncoder:
+    """{token_id: idf} for the distinct tokens of a query; no model involved."""
+
+    def __init__(self, tokenizer, weights: np.ndarray):
+        self.tokenizer = tokenizer
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path: str = QUERY_WEIGHTS_PATH) -> "QuerySparseEncoder":
+        with np.load(path) as data:
+            weights = data["weights"].astype(np.float32)
+        return cls(load_tokenizer(), weights)
+
+    def save(self, path: str = QUERY_WEIGHTS_PATH, **meta) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, weights=self.weights, meta=json.dumps(meta))
+
+    def encode(self, text: str) -> Dict[int, float]:
+        ids = self.tokenizer.encode(text, add_special_tokens=False).ids
+        return {
+            token_id: float(self.weights[token_id])
+            for token_id in dict.fromkeys(ids)
+            if token_id < len(self.weights) and self.weights[token_id] > 0
+        }
+
+
+_encoder: Optional[QuerySparseEncoder] = None
+_encoder_failed = False
+_encoder_lock = threading.Lock()
+
+
+def get_query_encoder() -> Optional[QuerySparseEncoder]:
+    """Process-wide encoder, loaded on first use; None if it cannot be loaded."""
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        with _encoder_lock:
+            if _encoder is None and not _encoder_failed:
+                try:
+                    _encoder = QuerySparseEncoder.load()
+                    logger.info(f"✅ Loaded query IDF weights from {QUERY_WEIGHTS_PATH}")
+                except Exception as e:
+                    _encoder_failed = True
+                    logger.warning(
+                        f"⚠️ Query sparse encoder unavailable ({e}); using the SPLADE service"
+                    )
+    return _encoder
+
+
+def query_sparse(
+    text: str, *, in_docker: bool = False, url: Optional[str] = None
+) -> Dict[int, float]:
+    """
+    Sparse {token_id: weight} vector for a search query, per
+    DRHP_QUERY_SPARSE_MODE. Only for queries: documents are always indexed
+    with full SPLADE (splade_sparse / splade_sparse_batch).
+    """
+    if QUERY_SPARSE_MODE == "idf":
+        encoder = get_query_encoder()
+        if encoder is not None:
+            return encoder.encode(text)
+    return splade_sparse(text, in_docker=in_docker, url=url)
+
+
+def iter_page_texts(paths: List[str]) -> Iterable[str]:
+    """page_content of every page in pages JSON files ({pdf: {page_no: {"page_content"}}})."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for pages in data.values():
+            for page in pages.values():
+                yield page.get("page_content", "") if isinstance(page, dict) else str(page)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the query IDF weight table")
+    parser.add_argument("pages_json", nargs="+", help="Pages JSON files to compute IDF over")
+    parser.add_argument("--out", default=QUERY_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tokenizer = load_tokenizer()
+    weights, documents = build_query_weights(iter_page_texts(args.pages_json), tokenizer)
+    QuerySparseEncoder(tokenizer, weights).save(
+        args.out, model_id=SPLADE_MODEL_ID, documents=documents, sources=args.pages_json
+    )
+    print(
+        f"💾 IDF weights over {documents} pages ({len(weights)} tokens, "
+        f"max idf {math.log1p((documents + 0.5) / 0.5):.2f}) saved to {args.out} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
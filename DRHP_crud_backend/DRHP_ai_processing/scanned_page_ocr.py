@@ -0,0 +1,178 @@
+import os
+import math
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+try:
+    import pytesseract
+except ImportError:  # optional: without it scanned pages simply stay empty
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+
+# Pages whose text layer has fewer non-whitespace characters than this are
+# treated as scanned (headers/footers alone stay under it)
+MIN_TEXT_CHARS = 50
+OCR_DPI = 300
+TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng")
+OCR_CACHE_DIR = os.getenv(
+    "DRHP_OCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "drhp_ocr")
+)
+# Marker appended before OCR text, like [TABLES] for extracted tables
+OCR_TEXT_MARKER = "[OCR]"
+
+
+def needs_ocr(text: str, min_chars: int = MIN_TEXT_CHARS) -> bool:
+    return len("".join(text.split())) < min_chars
+
+
+def page_content_hash(doc: fitz.Document, page: fitz.Page, dpi: int, lang: str) -> str:
+    """
+    Hash of what the OCR would see: the page's content stream and raw image
+    streams plus the OCR settings. The same scanned annexure in another
+    DRHP/RHP hashes the same even though the PDF bytes differ.
+    """
+    h = hashlib.sha256(
+        f"{dpi}:{lang}:{page.rect.width:.0f}x{page.rect.height:.0f}:{page.rotation}".encode()
+    )
+    h.update(page.read_contents())
+    for img in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    return h.hexdigest()
+
+
+def _cache_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.txt")
+
+
+def _read_cached(cache_dir: str, key: str) -> str | None:
+    try:
+        with open(_cache_path(cache_dir, key), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cached(cache_dir: str, key: str, text: str) -> None:
+    path = _cache_path(cache_dir, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache OCR text: {e}")
+
+
+def ocr_page_range(
+    pdf_path: str, page_nos: list[int], dpi: int, lang: str, cache_dir: str
+) -> list[tuple[int, str, bool]]:
+    """
+    Worker function: OCR several pages with one document open.
+    Returns [(page_no, text, cache_hit)]; pages that fail are left out.
+    """
+    # one Tesseract thread per worker; the pool already fills the cores
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    results = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_no in page_nos:
+            try:
+                page = doc.load_page(page_no - 1)
+                key = page_content_hash(doc, page, dpi, lang)
+                cached = _read_cached(cache_dir, key)
+                if cached is not None:
+                    results.append((page_no, cached, True))
+                    continue
+
+                pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+                img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                text = pytesseract.image_to_string(img, lang=lang).strip()
+                _write_cached(cache_dir, key, text)
+                results.append((page_no, text, False))
+            except Exception as e:
+                logger.error(f"Tesseract OCR failed on page {page_no}: {e}")
+    finally:
+        doc.close()
+    return results
+
+
+def tesseract_available() -> bool:
+    if pytesseract is None:
+        logger.warning("⚠️ pytesseract is not installed; scanned pages will not be OCRed")
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Tesseract binary not available ({e}); scanned pages will not be OCRed")
+        return False
+
+
+def iter_ocr_scanned_pages(
+    pdf_path: str,
+    page_nos: list[int],
+    max_workers: int | None = None,
+    stats: dict | None = None,
+    dpi: int = OCR_DPI,
+    lang: str = TESSERACT_LANG,
+    cache_dir: str = OCR_CACHE_DIR,
+):
+    """
+    OCR the given pages locally with Tesseract in a process pool sized to the
+    host (OCR is CPU-bound) and yield {page_no: text} for each chunk of pages
+    as soon as it is done. Results are cached on disk by page_content_hash.
+
+    If `stats` is given, ocr_fallback_pages / ocr_fallback_cache_hits are
+    written into it once every chunk is done. Yields nothing if Tesseract is
+    missing; pages that fail are left out.
+    """
+    if not page_nos or not tesseract_available():
+        return
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(page_nos)))
+    chunk_size = max(1, math.ceil(len(page_nos) / (workers * 2)))
+    chunks = [page_nos[i : i + chunk_size] for i in range(0, len(page_nos), chunk_size)]
+    logger.info(
+        f"🔤 Tesseract OCR for {len(page_nos)} scanned pages with {workers} workers…"
+    )
+
+    pages_done = cache_hits = 0
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        futures = [
+            ex.submit(ocr_page_range, pdf_path, chunk, dpi, lang, cache_dir)
+            for chunk in chunks
+        ]
+        for fut in as_completed(futures):
+            try:
+                results = fut.result()
+            except Exception as e:
+                logger.error(f"Tesseract OCR worker failed: {e}")
+                continue
+            pages_done += len(results)
+            cache_hits += sum(cache_hit for _, _, cache_hit in results)
+            yield {page_no: text for page_no, text, _ in results}
+
+    logger.info(
+        f"✅ OCRed {pages_done}/{len(page_nos)} scanned pages locally ({cache_hits} from cache)"
+    )
+    if stats is not None:
+        stats["ocr_fallback_pages"] = pages_done
+        stats["ocr_fallback_cache_hits"] = cache_hits
+
+
+def merge_ocr_text(page_content: str, ocr_text: str) -> str:
+    """Append OCR text to whatever the text layer had, under [OCR]."""
+    if not ocr_text.strip():
+        return page_content
+    base = page_content.strip()
+    return (base + "\n\n" if base else "") + f"{OCR_TEXT_MARKER}\n" + ocr_text.strip()
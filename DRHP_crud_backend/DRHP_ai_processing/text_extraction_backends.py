@@ -0,0 +1,268 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+
+import pdfplumber
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# Backend used when a run does not ask for one explicitly
+DEFAULT_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "pdfplumber")
+# How tables end up in the page text:
+#   "append"  full page text, then every table again as " | "-joined rows
+#   "masked"  table regions are masked out of the page text and each table is
+#             emitted once as TSV, so table-heavy pages don't carry numbers twice
+TABLE_MODES = ("append", "masked")
+DEFAULT_TABLE_MODE = os.getenv("PDF_TABLE_MODE", "masked")
+# Both table finders use the "lines" strategy by default, which needs at least
+# two horizontal and two vertical ruling edges to form a single cell
+MIN_RULING_EDGES = 2
+
+
+def _format_tables(tables) -> str:
+    """Render extracted tables as " | "-joined rows, one row per line."""
+    tables_text = ""
+    for table in tables:
+        for row in table:
+            row_text = " | ".join(cell.strip() if cell else "" for cell in row)
+            tables_text += row_text + "\n"
+    return tables_text.strip()
+
+
+def _format_tables_tsv(tables) -> str:
+    """
+    Render extracted tables as TSV, one row per line and a blank line between
+    tables. Whitespace inside cells is collapsed; empty rows are dropped.
+    """
+    rendered = []
+    for table in tables:
+        rows = []
+        for row in table:
+            cells = [" ".join(cell.split()) if cell else "" for cell in row]
+            if any(cells):
+                rows.append("\t".join(cells))
+        if rows:
+            rendered.append("\n".join(rows))
+    return "\n\n".join(rendered)
+
+
+def _has_cells(table_rows) -> bool:
+    return any(cell and cell.strip() for row in table_rows for cell in row)
+
+
+def _enough_rulings(horizontal: int, vertical: int) -> bool:
+    return horizontal >= MIN_RULING_EDGES and vertical >= MIN_RULING_EDGES
+
+
+class TextExtractionBackend(ABC):
+    """
+    Interface for per-page text+table extraction. A backend opens a document
+    once and then extracts any number of its pages, so chunked workers can
+    reuse the parsed document.
+
+    Table extraction only runs on pages whose vector graphics contain enough
+    horizontal and vertical ruling lines to form a table; the counters below
+    record how many pages were skipped by that check, and in "masked" mode how
+    many characters of table text were kept out of the prose.
+    """
+
+    name = ""
+
+    def __init__(self, table_mode: str | None = None):
+        self.table_mode = (table_mode or DEFAULT_TABLE_MODE).lower()
+        if self.table_mode not in TABLE_MODES:
+            raise ValueError(
+                f"Unknown table mode {self.table_mode!r}; choose from {list(TABLE_MODES)}"
+            )
+        self.table_pages_extracted = 0
+        self.table_pages_skipped = 0
+        self.table_chars_masked = 0
+
+    def _should_extract_tables(self, has_rulings: bool) -> bool:
+        if has_rulings:
+            self.table_pages_extracted += 1
+        else:
+            self.table_pages_skipped += 1
+        return has_rulings
+
+    @abstractmethod
+    def open(self, pdf_path: str):
+        raise NotImplementedError
+
+    def close(self, doc) -> None:
+        doc.close()
+
+    @abstractmethod
+    def page_count(self, doc) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def page_text(self, doc, page_no: int) -> str:
+        """Text of the 1-based page `page_no`, tables appended under [TABLES]."""
+        raise NotImplementedError
+
+    def _join_tables(self, text: str, tables) -> str:
+        if self.table_mode == "masked":
+            tables_text = _format_tables_tsv(tables)
+        else:
+            tables_text = _format_tables(tables)
+        if tables_text:
+            text += "\n\n[TABLES]\n" + tables_text
+        return text
+
+
+class PdfplumberBackend(TextExtractionBackend):
+    name = "pdfplumber"
+
+    def open(self, pdf_path: str):
+        return pdfplumber.open(pdf_path)
+
+    def page_count(self, doc) -> int:
+        return len(doc.pages)
+
+    @staticmethod
+    def has_ruling_lines(page) -> bool:
+        """Cheap check on the page's line/rect/curve edges before extract_tables."""
+        horizontal = vertical = 0
+        for edge in page.edges:
+            if edge["orientation"] == "h":
+                horizontal += 1
+            else:
+                vertical += 1
+            if _enough_rulings(horizontal, vertical):
+                return True
+        return False
+
+    def page_text(self, doc, page_no: int) -> str:
+        page = doc.pages[page_no - 1]  # pdfplumber pages are 0-based internally
+        try:
+            if not self._should_extract_tables(self.has_ruling_lines(page)):
+                return page.extract_text() or ""
+            if self.table_mode != "masked":
+                return self._join_tables(
+                    page.extract_text() or "", page.extract_tables() or []
+                )
+
+            found = [(t.bbox, t.extract()) for t in page.find_tables()]
+            found = [(bbox, rows) for bbox, rows in found if _has_cells(rows)]
+            bboxes = [bbox for bbox, _ in found]
+
+            def outside_tables(obj) -> bool:
+                if obj.get("object_type") != "char":
+                    return True
+                cx = (obj["x0"] + obj["x1"]) / 2
+                cy = (obj["top"] + obj["bottom"]) / 2
+                return not any(
+                    x0 <= cx <= x1 and top <= cy <= bottom
+                    for x0, top, x1, bottom in bboxes
+                )
+
+            if bboxes:
+                self.table_chars_masked += sum(
+                    1 for c in page.chars if not c["text"].isspace() and not outside_tables(c)
+                )
+                text = page.filter(outside_tables).extract_text() or ""
+            else:
+                text = page.extract_text() or ""
+            return self._join_tables(text, [rows for _, rows in found])
+        finally:
+            page.close()  # drop cached layout objects as we go
+
+
+class PyMuPDFBackend(TextExtractionBackend):
+    name = "pymupdf"
+
+    def open(self, pdf_path: str):
+        return fitz.open(pdf_path)
+
+    def page_count(self, doc) -> int:
+        return doc.page_count
+
+    @staticmethod
+    def has_ruling_lines(page: fitz.Page) -> bool:
+        """Cheap check on the page's vector drawings before find_tables."""
+        horizontal = vertical = 0
+        for drawing in page.get_drawings():
+            for item in drawing["items"]:
+                if item[0] == "l":
+                    p1, p2 = item[1], item[2]
+                    if abs(p1.y - p2.y) < 1:
+                        horizontal += 1
+                    elif abs(p1.x - p2.x) < 1:
+                        vertical += 1
+                elif item[0] in ("re", "qu"):
+                    # a rectangle/quad contributes two edges in each direction
+                    horizontal += 2
+                    vertical += 2
+                if _enough_rulings(horizontal, vertical):
+                    return True
+        return False
+
+    def _masked_text(self, page: fitz.Page, rects: list[fitz.Rect]) -> str:
+        """Block text in reading order, leaving out lines centred inside `rects`."""
+        block_texts = []
+        for block in page.get_text("dict", sort=True)["blocks"]:
+            if block["type"] != 0:
+                continue
+            lines = []
+            for line in block["lines"]:
+                line_text = "".join(span["text"] for span in line["spans"])
+                x0, y0, x1, y1 = line["bbox"]
+                center = fitz.Point((x0 + x1) / 2, (y0 + y1) / 2)
+                if any(center in rect for rect in rects):
+                    self.table_chars_masked += len("".join(line_text.split()))
+                else:
+                    lines.append(line_text)
+            block_text = "\n".join(lines).strip()
+            if block_text:
+                block_texts.append(block_text)
+        return "\n".join(block_texts)
+
+    def page_text(self, doc, page_no: int) -> str:
+        page = doc.load_page(page_no - 1)
+
+        # Gather tables if any
+        tables = []
+        if self._should_extract_tables(self.has_ruling_lines(page)):
+            try:
+                tables = [
+                    (fitz.Rect(table.bbox), table.extract())
+                    for table in page.find_tables().tables
+                ]
+            except Exception as e:
+                logger.warning(f"Table detection failed on page {page_no}: {e}")
+
+        if self.table_mode == "masked" and tables:
+            tables = [(rect, rows) for rect, rows in tables if _has_cells(rows)]
+            text = self._masked_text(page, [rect for rect, _ in tables])
+        else:
+            # Text blocks (type 0) in reading order; image blocks are skipped
+            blocks = page.get_text("blocks", sort=True)
+            text = "\n".join(
+                block[4].strip() for block in blocks if block[6] == 0 and block[4].strip()
+            )
+        return self._join_tables(text, [rows for _, rows in tables])
+
+
+TEXT_EXTRACTION_BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PyMuPDFBackend.name: PyMuPDFBackend,
+}
+
+
+def get_text_backend(
+    name: str | None = None, table_mode: str | None = None
+) -> TextExtractionBackend:
+    """
+    Return the backend registered under `name` (default: PDF_TEXT_BACKEND),
+    rendering tables per `table_mode` (default: PDF_TABLE_MODE, else "masked").
+    """
+    name = (name or DEFAULT_TEXT_BACKEND).lower()
+    if name not in TEXT_EXTRACTION_BACKENDS:
+        raise ValueError(
+            f"Unknown text extraction backend {name!r}; "
+            f"choose from {sorted(TEXT_EXTRACTION_BACKENDS)}"
+        )
+    return TEXT_EXTRACTION_BACKENDS[name](table_mode)
@@ -0,0 +1,39 @@
+import fitz  # PyMuPDF
+
+from DRHP_ai_processing.boilerplate import band_lines, detect_boilerplate
+from DRHP_ai_processing.page_number_inference import (
+    footer_number_candidates,
+    infer_page_numbers,
+)
+from DRHP_ai_processing.scanned_page_ocr import needs_ocr
+
+
+def scan_text_layer(
+    pdf_path: str,
+) -> tuple[dict[int, str], list[int], list[int], set[str]]:
+    """
+    Fast PyMuPDF pass over the whole text layer before extraction starts.
+    Each page's words are read once and feed every up-front decision.
+
+    Returns (page_numbers, ocr_pages, scanned_pages, boilerplate):
+        page_numbers   {pdf_page: printed number} fitted from the footers
+                       (see infer_page_numbers)
+        ocr_pages      pages whose printed number needs the vision fallback
+        scanned_pages  pages without a usable text layer (see needs_ocr)
+        boilerplate    normalized repeating header/footer lines
+                       (see detect_boilerplate)
+    """
+    candidates: dict[int, set[int]] = {}
+    scanned_pages: list[int] = []
+    page_lines: list[set[str] | None] = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            page_no = page.number + 1
+            words = page.get_text("words")
+            candidates[page_no] = footer_number_candidates(words, page.rect)
+            if needs_ocr("".join(w[4] for w in words)):
+                scanned_pages.append(page_no)
+            page_lines.append(band_lines(words, page.rect) if words else None)
+
+    page_numbers, ocr_pages = infer_page_numbers(candidates)
+    return page_numbers, ocr_pages, scanned_pages, detect_boilerplate(page_lines)
@@ -0,0 +1,134 @@
+import re
+import logging
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# A page with a TOC heading scoring at least this is accepted as the TOC
+# without any vision call
+TOC_CONCLUSIVE_SCORE = 6.0
+# Pages scoring below this are never sent for vision confirmation
+TOC_MIN_CANDIDATE_SCORE = 1.5
+# How many of the best-scoring pages are confirmed concurrently
+TOC_CONFIRM_TOP_K = 3
+# A page needs this many lines before its trailing-number density counts
+MIN_ENTRY_LINES = 5
+
+# Standard DRHP section titles (see app/utils/extract_table_of_contents.py)
+DRHP_SECTION_TITLES = (
+    "DEFINITIONS AND ABBREVIATIONS",
+    "FORWARD LOOKING STATEMENTS",
+    "RISK FACTORS",
+    "THE ISSUE",
+    "GENERAL INFORMATION",
+    "CAPITAL STRUCTURE",
+    "OBJECTS OF THE ISSUE",
+    "BASIS FOR ISSUE PRICE",
+    "INDUSTRY OVERVIEW",
+    "OUR BUSINESS",
+    "OUR MANAGEMENT",
+    "OUR PROMOTERS",
+    "DIVIDEND POLICY",
+    "FINANCIAL INFORMATION",
+    "OUTSTANDING LITIGATION",
+    "GOVERNMENT AND OTHER APPROVALS",
+    "ISSUE PROCEDURE",
+    "DECLARATION",
+)
+
+_TOC_HEADING = re.compile(
+    r"^\s*(TABLE\s+OF\s+CONTENTS?|CONTENTS|INDEX)\s*$", re.IGNORECASE | re.MULTILINE
+)
+_SECTION_MARKER = re.compile(
+    r"^\s*(SECTION\s+[IVXL\d]+|[IVX]{1,4}\.)\s", re.IGNORECASE | re.MULTILINE
+)
+_DOT_LEADER = re.compile(r"(?:\.\s?){4,}|…{2,}")
+_TRAILING_NUMBER = re.compile(r"^(.*?)(?:\s*(?:\.\s?){2,}|\s+|…+)(\d{1,4})\s*$")
+
+
+def score_toc_text(text: str) -> float:
+    """
+    Score how much a page's text layer looks like a DRHP table of contents.
+    Signals: a "TABLE OF CONTENTS" heading, SECTION / roman-numeral markers,
+    dot leaders, a high share of lines ending in a page number, and standard
+    DRHP section titles. Returns 0 for pages without a text layer.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 0.0
+
+    score = 0.0
+    if _TOC_HEADING.search(text):
+        score += 3.0
+    score += min(len(_SECTION_MARKER.findall(text)) * 0.5, 3.0)
+
+    leader_lines = sum(1 for line in lines if _DOT_LEADER.search(line))
+    score += min(leader_lines * 0.5, 3.0)
+
+    # two-column layouts put the page number on a line of its own
+    numbered = sum(
+        1 for line in lines if line.isdigit() or _TRAILING_NUMBER.match(line)
+    )
+    if len(lines) >= MIN_ENTRY_LINES:
+        score += 4.0 * numbered / len(lines)
+
+    upper = text.upper()
+    score += min(sum(0.25 for t in DRHP_SECTION_TITLES if t in upper), 2.0)
+    return round(score, 2)
+
+
+def is_conclusive_toc(text: str, score: float) -> bool:
+    """A TOC heading plus a high score; numeric tables alone can't qualify."""
+    return score >= TOC_CONCLUSIVE_SCORE and bool(_TOC_HEADING.search(text))
+
+
+def toc_entries_from_text(text: str) -> list[str]:
+    """
+    Pull "Section Name - Page Number" entries (the ExtractTocContent format)
+    out of a TOC page's text layer. A bare number on its own line closes the
+    title on the line before it.
+    """
+    entries = []
+    pending_title = ""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.isdigit() and pending_title:
+            entries.append(f"{pending_title} - {line}")
+            pending_title = ""
+            continue
+        m = _TRAILING_NUMBER.match(line)
+        title = _DOT_LEADER.sub(" ", m.group(1)).strip(" .…") if m else ""
+        if m and title:
+            entries.append(f"{title} - {m.group(2)}")
+            pending_title = ""
+        else:
+            pending_title = _DOT_LEADER.sub(" ", line).strip(" .…")
+    return entries
+
+
+def rank_toc_candidates(
+    pdf_path: str, max_pages: int
+) -> tuple[list[tuple[int, float]], dict[int, str]]:
+    """
+    Score the first `max_pages` pages from the text layer (no LLM calls).
+
+    Returns:
+        (ranked, texts) where ranked is [(page_no, score)] best first (ties
+        go to the earlier page) and texts maps page_no to its text.
+    """
+    texts = {}
+    with fitz.open(pdf_path) as doc:
+        for page_no in range(1, min(max_pages, doc.page_count) + 1):
+            texts[page_no] = doc.load_page(page_no - 1).get_text()
+
+    scores = {page_no: score_toc_text(text) for page_no, text in texts.items()}
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    logger.info(
+        "🔍 TOC text-layer scores: "
+        + ", ".join(f"p{p}={s}" for p, s in ranked[:TOC_CONFIRM_TOP_K + 2])
+    )
+    return ranked, texts
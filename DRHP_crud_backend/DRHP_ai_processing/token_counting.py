@@ -0,0 +1,38 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Without tiktoken, token counts are estimated at this many characters per token
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    try:
+        import tiktoken
+
+        # text-embedding-3-small and the GPT-4 family share cl100k_base
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken unavailable ({e}); estimating tokens as chars/{CHARS_PER_TOKEN}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _token_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` down to at most `max_tokens` tokens (estimated without tiktoken)."""
+    encoding = _token_encoding()
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,191 @@
+import base64
+import logging
+import threading
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+from baml_py import Image as BamlImage
+
+logger = logging.getLogger(__name__)
+
+
+# How the image for each kind of BAML vision call is prepared:
+#   dpi        render resolution for whole pages (strips arrive pre-rendered)
+#   max_side   longest edge in px; Claude downsamples anything past ~1568px anyway
+#   grayscale  none of these calls need colour
+#   codec      "webp" / "jpeg" / "png"; webp quality > 100 means lossless
+#   trim       crop blank margins around the content first
+# Footer strips are two-tone text, where lossless WebP is ~3x smaller than PNG;
+# whole pages compress best as lossy WebP at a quality that keeps small print legible.
+VISION_IMAGE_PROFILES = {
+    "toc_detect": {
+        "dpi": 100,
+        "max_side": 1100,
+        "grayscale": True,
+        "codec": "webp",
+        "quality": 75,
+        "trim": False,
+    },
+    "toc_content": {
+        "dpi": 150,
+        "max_side": 1568,
+        "grayscale": True,
+        "codec": "webp",
+        "quality": 85,
+        "trim": False,
+    },
+    "page_number": {
+        "dpi": None,
+        "max_side": 1568,
+        "grayscale": True,
+        "codec": "webp",
+        "quality": 101,
+        "trim": True,
+    },
+    "page_number_batch": {
+        "dpi": None,
+        "max_side": 1568,
+        "grayscale": True,
+        "codec": "webp",
+        "quality": 101,
+        "trim": False,
+    },
+}
+
+_CODECS = {
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "png": (".png", "image/png", None),
+}
+
+# Pixels at or above this are treated as blank paper when trimming
+TRIM_THRESHOLD = 250
+TRIM_PADDING = 8
+# Trimmed images are padded back out to at least this many px per side, so a
+# lone page number is not sent as a postage stamp
+MIN_TRIMMED_SIDE = 64
+
+_payload_lock = threading.Lock()
+_payload_stats: dict[str, dict[str, int]] = {}
+
+
+def vision_payload_stats() -> dict[str, dict[str, int]]:
+    """{call_type: {"calls", "bytes"}} for every image encoded in this process."""
+    with _payload_lock:
+        return {k: dict(v) for k, v in _payload_stats.items()}
+
+
+def _record_payload(call_type: str, nbytes: int) -> None:
+    with _payload_lock:
+        entry = _payload_stats.setdefault(call_type, {"calls": 0, "bytes": 0})
+        entry["calls"] += 1
+        entry["bytes"] += nbytes
+
+
+def trim_whitespace(
+    gray: np.ndarray, threshold: int = TRIM_THRESHOLD, padding: int = TRIM_PADDING
+) -> np.ndarray:
+    """Crop blank columns/rows around the content of a grayscale image."""
+    dark = gray < threshold
+    cols = np.flatnonzero(dark.any(axis=0))
+    rows = np.flatnonzero(dark.any(axis=1))
+    if cols.size == 0 or rows.size == 0:
+        return gray
+    y0, y1 = max(rows[0] - padding, 0), min(rows[-1] + padding + 1, gray.shape[0])
+    x0, x1 = max(cols[0] - padding, 0), min(cols[-1] + padding + 1, gray.shape[1])
+    trimmed = gray[y0:y1, x0:x1]
+
+    pad_y = max(MIN_TRIMMED_SIDE - trimmed.shape[0], 0)
+    pad_x = max(MIN_TRIMMED_SIDE - trimmed.shape[1], 0)
+    if pad_y or pad_x:
+        trimmed = cv2.copyMakeBorder(
+            trimmed,
+            pad_y // 2,
+            pad_y - pad_y // 2,
+            pad_x // 2,
+            pad_x - pad_x // 2,
+            cv2.BORDER_CONSTANT,
+            value=255,
+        )
+    return trimmed
+
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def _limit_size(img: np.ndarray, max_side: int | None) -> np.ndarray:
+    longest = max(img.shape[:2])
+    if not max_side or longest <= max_side:
+        return img
+    scale = max_side / longest
+    size = (max(1, round(img.shape[1] * scale)), max(1, round(img.shape[0] * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_vision_image(img: np.ndarray, call_type: str) -> BamlImage:
+    """
+    Prepare an image (grayscale or BGR numpy array) for the BAML vision call
+    `call_type` using its VISION_IMAGE_PROFILES entry, and log the payload size.
+    Falls back to PNG if this OpenCV build cannot write the profile's codec.
+    """
+    profile = VISION_IMAGE_PROFILES[call_type]
+    if img.size == 0:
+        raise ValueError(f"{call_type} image is empty; nothing to send to BAML.")
+
+    if profile["grayscale"]:
+        img = _to_gray(img)
+    if profile["trim"]:
+        img = trim_whitespace(_to_gray(img))
+    img = _limit_size(img, profile["max_side"])
+
+    codec = profile["codec"]
+    ext, mime, quality_flag = _CODECS[codec]
+    params = [quality_flag, profile["quality"]] if quality_flag is not None else []
+    try:
+        success, buf = cv2.imencode(ext, img, params)
+    except cv2.error:
+        success = False
+    if not success:
+        logger.warning(f"⚠️ Could not encode {call_type} image as {codec}; using PNG")
+        codec = "png"
+        ext, mime, _ = _CODECS[codec]
+        success, buf = cv2.imencode(ext, img)
+        if not success:
+            raise RuntimeError(f"Could not encode {call_type} image")
+
+    nbytes = len(buf)
+    _record_payload(call_type, nbytes)
+    logger.info(
+        f"🖼️ {call_type} image {img.shape[1]}x{img.shape[0]} {codec}: {nbytes / 1024:.1f} KB"
+    )
+    return BamlImage.from_base64(mime, base64.b64encode(buf.tobytes()).decode("utf-8"))
+
+
+def render_page_image(page: fitz.Page, call_type: str) -> np.ndarray:
+    """
+    Render a page at the profile's DPI, capped so the longest edge fits
+    max_side, directly in grayscale when the profile asks for it.
+    """
+    profile = VISION_IMAGE_PROFILES[call_type]
+    dpi = profile["dpi"] or 200
+    if profile["max_side"]:
+        longest_pt = max(page.rect.width, page.rect.height)
+        dpi = min(dpi, int(profile["max_side"] * 72 / longest_pt))
+
+    colorspace = fitz.csGRAY if profile["grayscale"] else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return img[:, :, 0]
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+def page_to_vision_image(page: fitz.Page, call_type: str) -> BamlImage:
+    """Render + encode a whole page for the BAML vision call `call_type`."""
+    return encode_vision_image(render_page_image(page, call_type), call_type)
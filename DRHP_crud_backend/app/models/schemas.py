@@ -22,7 +22,9 @@ from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 from qdrant_client.http.models import SparseIndexParams
 import requests
 
-from app.utils.splade_client import splade_sparse
+from app.utils.splade_client import splade_sparse, splade_sparse_batch
+from DRHP_ai_processing.page_enrichment import enrich_hits_in_background, is_lazy
+from DRHP_ai_processing.query_sparse_encoder import query_sparse
 
 
 
@@ -214,24 +216,36 @@ class Pages(DynamicDocument):
             pass
         logging.info(f"[Qdrant] Created collection `{PAGES_COLLECTION_NAME}` with required indexes")
 
-    def _make_point(self,in_docker: bool = False):
+    def _sparse_text(self) -> str:
+        facts_text = " ".join(self.facts) if isinstance(self.facts, (list, tuple)) else str(self.facts)
+        if not facts_text.strip():
+            facts_text = str(self.page_content)
+        return facts_text
+
+    def _make_point(self,in_docker: bool = False, sparse_dict=None):
         """
-        Build the Qdrant PointStruct (dense + sparse embeds + payload)
+        Build the Qdrant PointStruct (dense + sparse embeds + payload).
+        sparse_dict: precomputed SPLADE weights (batched upserts), if any
         """
         
         # ----- Dense embedding on queries -------------------------------------------------------
         query_text = " ".join(self.queries) if isinstance(self.queries, (list, tuple)) else str(self.queries)
+        # lazy enrichment: index on the raw page until retrieval fills facts/queries in
+        # (search() then re-embeds it on the queries, as here)
+        if not query_text.strip():
+            query_text = str(self.page_content)
         dense = generate_vector(query_text)
 
         # ----- Sparse embedding on facts --------------------------------------------------------
-        facts_text = " ".join(self.facts) if isinstance(self.facts, (list, tuple)) else str(self.facts)
+        facts_text = self._sparse_text()
         # sparse_model = SparseTextEmbedding(model_name="Qdrant/bm25")
         # sparse_emb = list(sparse_model.embed(facts_text))[0]    # returns CSR-like structure
         # sparse_vec = rest_models.SparseVector(
         #     indices=sparse_emb.indices.tolist(),
         #     values=sparse_emb.values.tolist()
         # )
-        sparse_dict = splade_sparse(facts_text, in_docker=in_docker)
+        if sparse_dict is None:
+            sparse_dict = splade_sparse(facts_text, in_docker=in_docker)
 
         sparse_vec = rest_models.SparseVector(
             indices=list(sparse_dict.keys()),
@@ -253,6 +267,7 @@ class Pages(DynamicDocument):
                 "page_content":        str(self.page_content),
                 "facts":               self.facts,
                 "queries":             self.queries,
+                "enriched":            bool(self.facts or self.queries),
             }
         )
 
@@ -275,9 +290,36 @@ class Pages(DynamicDocument):
 
         return self
 
+    @classmethod
+    def upsert_many(cls, pages, in_docker=False, batch_size=64):
+        """
+        Upsert already-saved pages to Qdrant, with their sparse vectors from
+        one /embed_batch call per batch instead of one SPLADE call per page.
+        """
+        if not pages:
+            return
+        start = time.time()
+        pages[0]._ensure_collection()
+        for i in range(0, len(pages), batch_size):
+            batch = pages[i : i + batch_size]
+            try:
+                sparse_dicts = splade_sparse_batch(
+                    [page._sparse_text() for page in batch], in_docker=in_docker
+                )
+                points = [
+                    page._make_point(in_docker=in_docker, sparse_dict=sparse_dict)
+                    for page, sparse_dict in zip(batch, sparse_dicts)
+                ]
+                qdrant_client.upsert(collection_name=PAGES_COLLECTION_NAME, points=points)
+            except Exception as exc:
+                logging.error(f"[Qdrant] Failed to upsert {len(batch)} pages "
+                              f"(company={batch[0].company.id}): {exc}", exc_info=True)
+        logging.info(f"[Qdrant] Upserted {len(pages)} pages in {time.time() - start:.2f}s")
+
 
     @classmethod
-    def search(cls, query_text: str, company_id: str, limit: int = 5, in_docker=False):
+    def search(cls, query_text: str, company_id: str, limit: int = 5, in_docker=False,
+               dense_vector=None, sparse_vector=None):
         """
         Hybrid dense+sparse search against the same Qdrant collection used by `.save()`.
         Returns a list of ScoredPoint (from `qdrant_client.http.models.ScoredPoint`).
@@ -290,6 +332,9 @@ class Pages(DynamicDocument):
             The Company ID to filter on (must match the payload field "company_id").
         limit : int
             How many final hits to return (after fusion).
+        dense_vector, sparse_vector : optional
+            Precomputed query vectors (compiled checklists); sparse_vector is
+            {"indices": [...], "values": [...]}. Missing ones are embedded here.
 
         Example
         -------
@@ -303,14 +348,17 @@ class Pages(DynamicDocument):
     
 
         # 1) Dense embedding of the query
-        dense_vec = generate_vector(query_text)
-
-        # 2) Sparse (BM25) embedding of the query
-        sparse_dict = splade_sparse(query_text, in_docker=in_docker)
-        sparse_vec = rest_models.SparseVector(
-            indices=list(sparse_dict.keys()),
-            values=list(sparse_dict.values())
-        )
+        dense_vec = dense_vector if dense_vector is not None else generate_vector(query_text)
+
+        # 2) Sparse embedding of the query (SPLADE, or in-process IDF weights)
+        if sparse_vector is not None:
+            sparse_vec = rest_models.SparseVector(**sparse_vector)
+        else:
+            sparse_dict = query_sparse(query_text, in_docker=in_docker)
+            sparse_vec = rest_models.SparseVector(
+                indices=list(sparse_dict.keys()),
+                values=list(sparse_dict.values())
+            )
         
 
         must_conditions = [
@@ -342,7 +390,31 @@ class Pages(DynamicDocument):
             with_payload=True,
             limit=limit,          # final top-K after fusion
         )
-        
+
+        # 5) Lazy enrichment: facts/queries for hits that were indexed on raw content,
+        #    back-filled in the background with both vectors rebuilt as _make_point builds them
+        if is_lazy():
+            def facts_sparse(enrichment):
+                facts_text = " ".join(enrichment["facts"]) or " ".join(enrichment["queries"])
+                facts_dict = splade_sparse(facts_text, in_docker=in_docker)
+                return rest_models.SparseVector(
+                    indices=list(facts_dict.keys()),
+                    values=list(facts_dict.values())
+                )
+
+            def queries_dense(enrichment):
+                # no queries: _make_point embeds the page content, which the point already has
+                queries_text = " ".join(enrichment["queries"])
+                return generate_vector(queries_text) if queries_text.strip() else None
+
+            try:
+                enrich_hits_in_background(
+                    qdrant_client, PAGES_COLLECTION_NAME, hits.points,
+                    sparse_embed=facts_sparse, dense_embed=queries_dense,
+                )
+            except Exception as exc:
+                logging.error(f"[Qdrant] Lazy enrichment failed for company `{company_id}`: {exc}")
+
         return hits
 
             
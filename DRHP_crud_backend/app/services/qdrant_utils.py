@@ -3,6 +3,7 @@ from qdrant_client.http import models
 import os
 import uuid
 import litellm
+from DRHP_ai_processing.embedding_cache import cached_embedding
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -68,6 +69,23 @@ def create_qdrant_collection(qdrant_client, collection_name):
 
 
 
+TITAN_EMBEDDING_MODEL = "bedrock/amazon.titan-embed-text-v2:0"
+
+
+def _titan_embedding(text: str):
+    response = litellm.embedding(model=TITAN_EMBEDDING_MODEL, input=[text])
+    # print("this is the response",response)
+    # response.data is a list of Embedding objects with an .embedding attribute
+    if getattr(response, "data", None):
+        first = response.data[0]
+        if hasattr(first, "embedding"):
+            return first.embedding
+
+    # None is not cached, so the next call asks Bedrock again
+    logger.error(f"Unexpected response structure: {response!r}")
+    return None
+
+
 def generate_vector(query: str) -> list:
     try:
         if not query or not isinstance(query, str):
@@ -80,19 +98,10 @@ def generate_vector(query: str) -> list:
             return [0.0] * 1024
 
         
-        response = litellm.embedding(
-            model="bedrock/amazon.titan-embed-text-v2:0",
-            input=[formatted_input],
+        vector = cached_embedding(
+            formatted_input, TITAN_EMBEDDING_MODEL, _titan_embedding, dimensions=1024
         )
-        # print("this is the response",response)
-        # response.data is a list of Embedding objects with an .embedding attribute
-        if getattr(response, "data", None):
-            first = response.data[0]
-            if hasattr(first, "embedding"):
-                return first.embedding
-
-        logger.error(f"Unexpected response structure: {response!r}")
-        return [0.0] * 1024
+        return vector if vector is not None else [0.0] * 1024
 
     except Exception as e:
         logger.error(f"Error generating vector: {str(e)}")
@@ -0,0 +1,13 @@
+import hashlib
+
+
+def compute_file_hash(path: str, buf_size: int = 65536) -> str:
+    """SHA-256 hex digest of a file's bytes, read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(buf_size)
+            if not data:
+                break
+            sha256.update(data)
+    return sha256.hexdigest()
@@ -1,23 +1,158 @@
 # utils/splade_client.py
-import os, logging, requests
-from typing import Dict
+import os, struct, logging, requests
+import numpy as np
+from typing import Dict, List, Optional
 
 # You can override these with env-vars if you like
 _INTERNAL_URL = os.getenv("SPLADE_SERVICE_INTERNAL", "http://splade-service:8000/embed")
 _EXTERNAL_URL = os.getenv("SPLADE_SERVICE_EXTERNAL", "http://localhost:8000/embed")
 
-def splade_sparse(text: str, *, in_docker: bool = False) -> Dict[int, float]:
+# Pruning asked of the service: keep the TOP_K heaviest tokens (0 = all) with
+# weight >= MIN_WEIGHT. Smaller vectors mean smaller responses and a smaller
+# Qdrant sparse index. Off by default until the retrieval-quality cost of a
+# cut has been measured on DRHP pages.
+TOP_K = int(os.getenv("SPLADE_TOP_K", "0"))
+MIN_WEIGHT = float(os.getenv("SPLADE_MIN_WEIGHT", "0"))
+# "binary" (packed int32 indices + float values) or "json"; services that
+# predate the binary format answer in JSON, which is still understood
+WIRE_FORMAT = os.getenv("SPLADE_WIRE_FORMAT", "binary")
+# "float32" keeps the weights exact; "float16" halves the values but rounds
+# them (~3 significant digits), so it stays opt-in until ranking is compared
+WIRE_DTYPE = os.getenv("SPLADE_WIRE_DTYPE", "float32")
+
+# Binary layout, see splade_service/app/wire.py
+_MEDIA_TYPE = "application/x-splade-sparse"
+_MAGIC = b"SPLD"
+_HEADER = struct.Struct("<4sBBHI")
+_VALUE_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+
+
+def _options() -> dict:
+    return {
+        "top_k": TOP_K,
+        "min_weight": MIN_WEIGHT,
+        "format": WIRE_FORMAT,
+        "dtype": WIRE_DTYPE,
+    }
+
+
+def decode_sparse(payload: bytes) -> List[Dict[int, float]]:
+    """Binary /embed or /embed_batch response -> [{token_id: weight}, ...]."""
+    magic, version, dtype, _, count = _HEADER.unpack_from(payload)
+    if magic != _MAGIC or version != 1:
+        raise ValueError(f"not a SPLADE sparse payload (magic={magic!r}, version={version})")
+    offset = _HEADER.size
+    nnz = np.frombuffer(payload, dtype="<u4", count=count, offset=offset)
+    offset += nnz.nbytes
+    total = int(nnz.sum())
+    indices = np.frombuffer(payload, dtype="<i4", count=total, offset=offset)
+    offset += indices.nbytes
+    values = np.frombuffer(payload, dtype=_VALUE_DTYPES[dtype], count=total, offset=offset)
+
+    indices = indices.tolist()
+    values = values.astype(np.float32).tolist()
+    vectors, start = [], 0
+    for n in nnz.tolist():
+        vectors.append(dict(zip(indices[start : start + n], values[start : start + n])))
+        start += n
+    return vectors
+
+
+def _parse(r: requests.Response) -> List[Dict[int, float]]:
+    """Sparse vectors of a response in either wire format (JSON: one dict or a list)."""
+    if r.headers.get("content-type", "").startswith(_MEDIA_TYPE):
+        return decode_sparse(r.content)
+    data = r.json()
+    # keys come back as strings – convert to int
+    return [
+        {int(k): float(v) for k, v in (item or {}).items()}
+        for item in (data if isinstance(data, list) else [data])
+    ]
+
+
+def splade_sparse(
+    text: str, *, in_docker: bool = False, url: Optional[str] = None
+) -> Dict[int, float]:
     """
     Return a {token_id: weight} dict from the SPLADE FastAPI service.
     • in_docker=False  → host expects service on localhost
     • in_docker=True   → host is another service in the same docker-compose network
+    • url              → explicit /embed URL (overrides in_docker)
     """
-    url = _INTERNAL_URL if in_docker else _EXTERNAL_URL
+    url = url or (_INTERNAL_URL if in_docker else _EXTERNAL_URL)
     try:
-        r = requests.post(url, json={"text": text}, timeout=10)
+        r = requests.post(url, json={"text": text, **_options()}, timeout=10)
         r.raise_for_status()
-        # keys come back as strings – convert to int
-        return {int(k): float(v) for k, v in r.json().items()}
+        return _parse(r)[0]
     except Exception as exc:
         logging.error(f"[SPLADE] request failed: {exc}")
         return {}          # fall back to an empty sparse vector
+
+
+# Texts per /embed_batch call; the service coalesces them into padded batches
+BATCH_CHUNK_SIZE = int(os.getenv("SPLADE_BATCH_CHUNK_SIZE", "256"))
+
+
+def batch_url(embed_url: str) -> str:
+    """/embed_batch URL next to a service's /embed URL."""
+    return embed_url.rstrip("/") + "_batch"
+
+
+_settings_cache: Dict[str, dict] = {}
+
+
+def sparse_settings(*, in_docker: bool = False, url: Optional[str] = None) -> dict:
+    """
+    Everything that changes the vectors this client gets back: the service's
+    model, engine and window settings (GET /info) plus the pruning and value
+    type asked for. Callers that store sparse vectors key them on this.
+    The service part is "unknown" if /info cannot be reached.
+    """
+    embed_url = url or (_INTERNAL_URL if in_docker else _EXTERNAL_URL)
+    service = _settings_cache.get(embed_url)
+    if service is None:
+        info_url = embed_url.rstrip("/").rsplit("/", 1)[0] + "/info"
+        try:
+            r = requests.get(info_url, timeout=10)
+            r.raise_for_status()
+            service = _settings_cache[embed_url] = r.json()
+        except Exception as exc:
+            logging.warning(f"[SPLADE] could not read service settings ({exc})")
+            service = {"service": "unknown"}
+    return {
+        **service,
+        "top_k": TOP_K,
+        "min_weight": MIN_WEIGHT,
+        # JSON responses carry float32 weights whatever dtype is asked for
+        "dtype": WIRE_DTYPE if WIRE_FORMAT == "binary" else "float32",
+    }
+
+
+def splade_sparse_batch(
+    texts: List[str], *, in_docker: bool = False, url: Optional[str] = None
+) -> List[Dict[int, float]]:
+    """
+    {token_id: weight} dicts for many texts, in order, via /embed_batch.
+    `url` is the service's /embed URL (defaults as for splade_sparse).
+    Falls back to one /embed call per text if the batch call fails
+    (e.g. a service that predates /embed_batch).
+    """
+    embed_url = url or (_INTERNAL_URL if in_docker else _EXTERNAL_URL)
+    results: List[Dict[int, float]] = []
+    for start in range(0, len(texts), BATCH_CHUNK_SIZE):
+        chunk = texts[start : start + BATCH_CHUNK_SIZE]
+        try:
+            r = requests.post(
+                batch_url(embed_url), json={"texts": chunk, **_options()}, timeout=120
+            )
+            r.raise_for_status()
+            vectors = _parse(r)
+            if len(vectors) != len(chunk):
+                raise ValueError(f"{len(vectors)} vectors for {len(chunk)} texts")
+            results.extend(vectors)
+        except Exception as exc:
+            logging.warning(f"[SPLADE] batch request failed ({exc}); embedding one by one")
+            results.extend(
+                splade_sparse(text, url=embed_url) if text.strip() else {} for text in chunk
+            )
+    return results
@@ -208,6 +208,33 @@ class BamlAsyncClient:
       )
       return cast(types.PageNumber, raw.cast_to(types, types, partial_types, False))
     
+    async def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> List[types.LabelledPageNumber]:
+      options: BamlCallOptions = {**self.__baml_options, **(baml_options or {})}
+
+      __tb__ = options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = options.get("client_registry", None)
+      collector = options.get("collector", None)
+      collectors = collector if isinstance(collector, list) else [collector] if collector is not None else []
+      raw = await self.__runtime.call_function(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        collectors,
+      )
+      return cast(List[types.LabelledPageNumber], raw.cast_to(types, types, partial_types, False))
+    
     async def ExtractPeopleInfo(
         self,
         text: str,
@@ -370,6 +397,33 @@ class BamlAsyncClient:
       )
       return cast(types.TocContent, raw.cast_to(types, types, partial_types, False))
     
+    async def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> List[types.PageFactsAndQueries]:
+      options: BamlCallOptions = {**self.__baml_options, **(baml_options or {})}
+
+      __tb__ = options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = options.get("client_registry", None)
+      collector = options.get("collector", None)
+      collectors = collector if isinstance(collector, list) else [collector] if collector is not None else []
+      raw = await self.__runtime.call_function(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        collectors,
+      )
+      return cast(List[types.PageFactsAndQueries], raw.cast_to(types, types, partial_types, False))
+    
     async def GetFactsFromPages(
         self,
         user_query: str,
@@ -597,6 +651,39 @@ class BamlStreamClient:
         self.__ctx_manager.get(),
       )
     
+    def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.BamlStream[List[partial_types.LabelledPageNumber], List[types.LabelledPageNumber]]:
+      options: BamlCallOptions = {**self.__baml_options, **(baml_options or {})}
+      __tb__ = options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = options.get("client_registry", None)
+      collector = options.get("collector", None)
+      collectors = collector if isinstance(collector, list) else [collector] if collector is not None else []
+      raw = self.__runtime.stream_function(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        None,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        collectors,
+      )
+
+      return baml_py.BamlStream[List[partial_types.LabelledPageNumber], List[types.LabelledPageNumber]](
+        raw,
+        lambda x: cast(List[partial_types.LabelledPageNumber], x.cast_to(types, types, partial_types, True)),
+        lambda x: cast(List[types.LabelledPageNumber], x.cast_to(types, types, partial_types, False)),
+        self.__ctx_manager.get(),
+      )
+    
     def ExtractPeopleInfo(
         self,
         text: str,
@@ -795,6 +882,39 @@ class BamlStreamClient:
         self.__ctx_manager.get(),
       )
     
+    def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.BamlStream[List[partial_types.PageFactsAndQueries], List[types.PageFactsAndQueries]]:
+      options: BamlCallOptions = {**self.__baml_options, **(baml_options or {})}
+      __tb__ = options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = options.get("client_registry", None)
+      collector = options.get("collector", None)
+      collectors = collector if isinstance(collector, list) else [collector] if collector is not None else []
+      raw = self.__runtime.stream_function(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        None,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        collectors,
+      )
+
+      return baml_py.BamlStream[List[partial_types.PageFactsAndQueries], List[types.PageFactsAndQueries]](
+        raw,
+        lambda x: cast(List[partial_types.PageFactsAndQueries], x.cast_to(types, types, partial_types, True)),
+        lambda x: cast(List[types.PageFactsAndQueries], x.cast_to(types, types, partial_types, False)),
+        self.__ctx_manager.get(),
+      )
+    
     def GetFactsFromPages(
         self,
         user_query: str,
@@ -131,6 +131,29 @@ class AsyncHttpRequest:
         False,
       )
     
+    async def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return await self.__runtime.build_request(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        False,
+      )
+    
     async def ExtractPeopleInfo(
         self,
         text: str,
@@ -269,6 +292,29 @@ class AsyncHttpRequest:
         False,
       )
     
+    async def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return await self.__runtime.build_request(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        False,
+      )
+    
     async def GetFactsFromPages(
         self,
         user_query: str,
@@ -444,6 +490,29 @@ class AsyncHttpStreamRequest:
         True,
       )
     
+    async def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return await self.__runtime.build_request(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        True,
+      )
+    
     async def ExtractPeopleInfo(
         self,
         text: str,
@@ -582,6 +651,29 @@ class AsyncHttpStreamRequest:
         True,
       )
     
+    async def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return await self.__runtime.build_request(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        True,
+      )
+    
     async def GetFactsFromPages(
         self,
         user_query: str,
@@ -141,6 +141,32 @@ class LlmResponseParser:
 
       return cast(types.PageNumber, parsed)
     
+    def ExtractPageNumbersBatch(
+        self,
+        llm_response: str,
+        baml_options: BamlCallOptions = {},
+    ) -> List[types.LabelledPageNumber]:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      parsed = self.__runtime.parse_llm_response(
+        "ExtractPageNumbersBatch",
+        llm_response,
+        types,
+        types,
+        partial_types,
+        False,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+      )
+
+      return cast(List[types.LabelledPageNumber], parsed)
+    
     def ExtractPeopleInfo(
         self,
         llm_response: str,
@@ -297,6 +323,32 @@ class LlmResponseParser:
 
       return cast(types.TocContent, parsed)
     
+    def GetFactsAndQueriesForPages(
+        self,
+        llm_response: str,
+        baml_options: BamlCallOptions = {},
+    ) -> List[types.PageFactsAndQueries]:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      parsed = self.__runtime.parse_llm_response(
+        "GetFactsAndQueriesForPages",
+        llm_response,
+        types,
+        types,
+        partial_types,
+        False,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+      )
+
+      return cast(List[types.PageFactsAndQueries], parsed)
+    
     def GetFactsFromPages(
         self,
         llm_response: str,
@@ -490,6 +542,32 @@ class LlmStreamParser:
 
       return cast(partial_types.PageNumber, parsed)
     
+    def ExtractPageNumbersBatch(
+        self,
+        llm_response: str,
+        baml_options: BamlCallOptions = {},
+    ) -> List[partial_types.LabelledPageNumber]:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      parsed = self.__runtime.parse_llm_response(
+        "ExtractPageNumbersBatch",
+        llm_response,
+        types,
+        types,
+        partial_types,
+        True,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+      )
+
+      return cast(List[partial_types.LabelledPageNumber], parsed)
+    
     def ExtractPeopleInfo(
         self,
         llm_response: str,
@@ -646,6 +724,32 @@ class LlmStreamParser:
 
       return cast(partial_types.TocContent, parsed)
     
+    def GetFactsAndQueriesForPages(
+        self,
+        llm_response: str,
+        baml_options: BamlCallOptions = {},
+    ) -> List[partial_types.PageFactsAndQueries]:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      parsed = self.__runtime.parse_llm_response(
+        "GetFactsAndQueriesForPages",
+        llm_response,
+        types,
+        types,
+        partial_types,
+        True,
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+      )
+
+      return cast(List[partial_types.PageFactsAndQueries], parsed)
+    
     def GetFactsFromPages(
         self,
         llm_response: str,
@@ -58,10 +58,24 @@ class FinalVerdict(BaseModel):
 class IsTocPage(BaseModel):
     isTocPage: Optional[bool] = None
 
+class LabelledPageNumber(BaseModel):
+    label: Optional[int] = None
+    is_page_number: Optional[bool] = None
+    page_number: Optional[str] = None
+
+class PageFactsAndQueries(BaseModel):
+    page: Optional[int] = None
+    facts: List[str]
+    queries: List[str]
+
 class PageNumber(BaseModel):
     is_page_number: Optional[bool] = None
     page_number: Optional[str] = None
 
+class PageText(BaseModel):
+    page: Optional[int] = None
+    text: Optional[str] = None
+
 class PeopleInfo(BaseModel):
     name: Optional[str] = None
     designation: Optional[str] = None
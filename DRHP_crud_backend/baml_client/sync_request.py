@@ -129,6 +129,29 @@ class HttpRequest:
         False,
       )
     
+    def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return self.__runtime.build_request_sync(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        False,
+      )
+    
     def ExtractPeopleInfo(
         self,
         text: str,
@@ -267,6 +290,29 @@ class HttpRequest:
         False,
       )
     
+    def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return self.__runtime.build_request_sync(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        False,
+      )
+    
     def GetFactsFromPages(
         self,
         user_query: str,
@@ -439,6 +485,29 @@ class HttpStreamRequest:
         True,
       )
     
+    def ExtractPageNumbersBatch(
+        self,
+        image: baml_py.Image,
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return self.__runtime.build_request_sync(
+        "ExtractPageNumbersBatch",
+        {
+          "image": image,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        True,
+      )
+    
     def ExtractPeopleInfo(
         self,
         text: str,
@@ -577,6 +646,29 @@ class HttpStreamRequest:
         True,
       )
     
+    def GetFactsAndQueriesForPages(
+        self,
+        pages: List[types.PageText],
+        baml_options: BamlCallOptions = {},
+    ) -> baml_py.HTTPRequest:
+      __tb__ = baml_options.get("tb", None)
+      if __tb__ is not None:
+        tb = __tb__._tb # type: ignore (we know how to use this private attribute)
+      else:
+        tb = None
+      __cr__ = baml_options.get("client_registry", None)
+
+      return self.__runtime.build_request_sync(
+        "GetFactsAndQueriesForPages",
+        {
+          "pages": pages,
+        },
+        self.__ctx_manager.get(),
+        tb,
+        __cr__,
+        True,
+      )
+    
     def GetFactsFromPages(
         self,
         user_query: str,
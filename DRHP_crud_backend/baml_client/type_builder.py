@@ -22,7 +22,7 @@ from .globals import DO_NOT_USE_DIRECTLY_UNLESS_YOU_KNOW_WHAT_YOURE_DOING_RUNTIM
 class TypeBuilder(_TypeBuilder):
     def __init__(self):
         super().__init__(classes=set(
-          ["CompanyDetails","DirectRetrievalResponse","FactsFromPages","FinalVerdict","IsTocPage","PageNumber","PeopleInfo","QueriesFromPages","Resume","RetrievalAndVerdictQueries","RetrievalResponses","SimpleRetrievalResponse","TocContent",]
+          ["CompanyDetails","DirectRetrievalResponse","FactsFromPages","FinalVerdict","IsTocPage","LabelledPageNumber","PageFactsAndQueries","PageNumber","PageText","PeopleInfo","QueriesFromPages","Resume","RetrievalAndVerdictQueries","RetrievalResponses","SimpleRetrievalResponse","TocContent",]
         ), enums=set(
           ["FlagStatus",]
         ), runtime=DO_NOT_USE_DIRECTLY_UNLESS_YOU_KNOW_WHAT_YOURE_DOING_RUNTIME)
@@ -48,10 +48,22 @@ class TypeBuilder(_TypeBuilder):
     def IsTocPage(self) -> "IsTocPageAst":
         return IsTocPageAst(self)
 
+    @property
+    def LabelledPageNumber(self) -> "LabelledPageNumberAst":
+        return LabelledPageNumberAst(self)
+
+    @property
+    def PageFactsAndQueries(self) -> "PageFactsAndQueriesAst":
+        return PageFactsAndQueriesAst(self)
+
     @property
     def PageNumber(self) -> "PageNumberAst":
         return PageNumberAst(self)
 
+    @property
+    def PageText(self) -> "PageTextAst":
+        return PageTextAst(self)
+
     @property
     def PeopleInfo(self) -> "PeopleInfoAst":
         return PeopleInfoAst(self)
@@ -298,6 +310,98 @@ class IsTocPageProperties:
 
     
 
+class LabelledPageNumberAst:
+    def __init__(self, tb: _TypeBuilder):
+        _tb = tb._tb # type: ignore (we know how to use this private attribute)
+        self._bldr = _tb.class_("LabelledPageNumber")
+        self._properties: typing.Set[str] = set([ "label",  "is_page_number",  "page_number", ])
+        self._props = LabelledPageNumberProperties(self._bldr, self._properties)
+
+    def type(self) -> FieldType:
+        return self._bldr.field()
+
+    @property
+    def props(self) -> "LabelledPageNumberProperties":
+        return self._props
+
+
+class LabelledPageNumberViewer(LabelledPageNumberAst):
+    def __init__(self, tb: _TypeBuilder):
+        super().__init__(tb)
+
+    
+    def list_properties(self) -> typing.List[typing.Tuple[str, ClassPropertyViewer]]:
+        return [(name, ClassPropertyViewer(self._bldr.property(name))) for name in self._properties]
+
+
+
+class LabelledPageNumberProperties:
+    def __init__(self, bldr: ClassBuilder, properties: typing.Set[str]):
+        self.__bldr = bldr
+        self.__properties = properties
+
+    
+
+    @property
+    def label(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("label"))
+
+    @property
+    def is_page_number(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("is_page_number"))
+
+    @property
+    def page_number(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("page_number"))
+
+    
+
+class PageFactsAndQueriesAst:
+    def __init__(self, tb: _TypeBuilder):
+        _tb = tb._tb # type: ignore (we know how to use this private attribute)
+        self._bldr = _tb.class_("PageFactsAndQueries")
+        self._properties: typing.Set[str] = set([ "page",  "facts",  "queries", ])
+        self._props = PageFactsAndQueriesProperties(self._bldr, self._properties)
+
+    def type(self) -> FieldType:
+        return self._bldr.field()
+
+    @property
+    def props(self) -> "PageFactsAndQueriesProperties":
+        return self._props
+
+
+class PageFactsAndQueriesViewer(PageFactsAndQueriesAst):
+    def __init__(self, tb: _TypeBuilder):
+        super().__init__(tb)
+
+    
+    def list_properties(self) -> typing.List[typing.Tuple[str, ClassPropertyViewer]]:
+        return [(name, ClassPropertyViewer(self._bldr.property(name))) for name in self._properties]
+
+
+
+class PageFactsAndQueriesProperties:
+    def __init__(self, bldr: ClassBuilder, properties: typing.Set[str]):
+        self.__bldr = bldr
+        self.__properties = properties
+
+    
+
+    @property
+    def page(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("page"))
+
+    @property
+    def facts(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("facts"))
+
+    @property
+    def queries(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("queries"))
+
+    
+
 class PageNumberAst:
     def __init__(self, tb: _TypeBuilder):
         _tb = tb._tb # type: ignore (we know how to use this private attribute)
@@ -340,6 +444,48 @@ class PageNumberProperties:
 
     
 
+class PageTextAst:
+    def __init__(self, tb: _TypeBuilder):
+        _tb = tb._tb # type: ignore (we know how to use this private attribute)
+        self._bldr = _tb.class_("PageText")
+        self._properties: typing.Set[str] = set([ "page",  "text", ])
+        self._props = PageTextProperties(self._bldr, self._properties)
+
+    def type(self) -> FieldType:
+        return self._bldr.field()
+
+    @property
+    def props(self) -> "PageTextProperties":
+        return self._props
+
+
+class PageTextViewer(PageTextAst):
+    def __init__(self, tb: _TypeBuilder):
+        super().__init__(tb)
+
+    
+    def list_properties(self) -> typing.List[typing.Tuple[str, ClassPropertyViewer]]:
+        return [(name, ClassPropertyViewer(self._bldr.property(name))) for name in self._properties]
+
+
+
+class PageTextProperties:
+    def __init__(self, bldr: ClassBuilder, properties: typing.Set[str]):
+        self.__bldr = bldr
+        self.__properties = properties
+
+    
+
+    @property
+    def page(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("page"))
+
+    @property
+    def text(self) -> ClassPropertyViewer:
+        return ClassPropertyViewer(self.__bldr.property("text"))
+
+    
+
 class PeopleInfoAst:
     def __init__(self, tb: _TypeBuilder):
         _tb = tb._tb # type: ignore (we know how to use this private attribute)
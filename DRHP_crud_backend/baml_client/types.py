@@ -67,10 +67,24 @@ class FinalVerdict(BaseModel):
 class IsTocPage(BaseModel):
     isTocPage: bool
 
+class LabelledPageNumber(BaseModel):
+    label: int
+    is_page_number: bool
+    page_number: str
+
+class PageFactsAndQueries(BaseModel):
+    page: int
+    facts: List[str]
+    queries: List[str]
+
 class PageNumber(BaseModel):
     is_page_number: bool
     page_number: str
 
+class PageText(BaseModel):
+    page: int
+    text: str
+
 class PeopleInfo(BaseModel):
     name: str
     designation: str
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the page text extraction backends (pdfplumber vs PyMuPDF).
+
+For every PDF given, each backend extracts every page in a single process
+(one document open, same as a chunked worker) and we report throughput in
+pages/sec plus how close the PyMuPDF text is to the pdfplumber text.
+
+Usage:
+    python benchmark_text_extraction.py DRHPS/ASTONEA_LABS_LTD.pdf [more.pdf ...]
+    python benchmark_text_extraction.py DRHPS/*.pdf --max-pages 200 --json results.json
+"""
+
+import argparse
+import difflib
+import json
+import statistics
+import sys
+import time
+
+from DRHP_ai_processing.text_extraction_backends import (
+    TEXT_EXTRACTION_BACKENDS,
+    get_text_backend,
+)
+
+BASELINE_BACKEND = "pdfplumber"
+
+
+def extract_all(backend_name: str, pdf_path: str, max_pages: int | None):
+    """Extract every page with one backend; returns (texts, seconds, tables_skipped)."""
+    backend = get_text_backend(backend_name)
+    start = time.perf_counter()
+    doc = backend.open(pdf_path)
+    try:
+        total = backend.page_count(doc)
+        if max_pages:
+            total = min(total, max_pages)
+        texts = []
+        for page_no in range(1, total + 1):
+            try:
+                texts.append(backend.page_text(doc, page_no))
+            except Exception as e:
+                print(f"⚠️ {backend_name} failed on page {page_no}: {e}")
+                texts.append("")
+    finally:
+        backend.close(doc)
+    return texts, time.perf_counter() - start, backend.table_pages_skipped
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Token-level similarity in [0, 1], insensitive to whitespace/line breaks."""
+    a_tokens, b_tokens = a.split(), b.split()
+    if not a_tokens and not b_tokens:
+        return 1.0
+    return difflib.SequenceMatcher(None, a_tokens, b_tokens, autojunk=False).ratio()
+
+
+def benchmark_pdf(pdf_path: str, max_pages: int | None) -> dict:
+    print(f"\n📄 {pdf_path}")
+    print("=" * 60)
+
+    texts, results = {}, {}
+    for name in TEXT_EXTRACTION_BACKENDS:
+        texts[name], seconds, tables_skipped = extract_all(name, pdf_path, max_pages)
+        pages = len(texts[name])
+        results[name] = {
+            "pages": pages,
+            "seconds": round(seconds, 3),
+            "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+            "table_pages_skipped": tables_skipped,
+        }
+        print(
+            f"⏱️ {name:<10} {pages} pages in {seconds:.2f}s "
+            f"→ {results[name]['pages_per_sec']} pages/sec "
+            f"(table extraction skipped on {tables_skipped} pages)"
+        )
+
+    baseline = texts[BASELINE_BACKEND]
+    for name in TEXT_EXTRACTION_BACKENDS:
+        if name == BASELINE_BACKEND:
+            continue
+        scores = [text_similarity(a, b) for a, b in zip(baseline, texts[name])]
+        worst = sorted(range(len(scores)), key=scores.__getitem__)[:5]
+        results[name]["similarity_to_baseline"] = {
+            "mean": round(statistics.mean(scores), 4) if scores else None,
+            "median": round(statistics.median(scores), 4) if scores else None,
+            "min": round(min(scores), 4) if scores else None,
+            "worst_pages": [
+                {"page": i + 1, "similarity": round(scores[i], 4)} for i in worst
+            ],
+        }
+        sim = results[name]["similarity_to_baseline"]
+        speedup = (
+            results[BASELINE_BACKEND]["seconds"] / results[name]["seconds"]
+            if results[name]["seconds"]
+            else float("inf")
+        )
+        print(
+            f"📊 {name} vs {BASELINE_BACKEND}: {speedup:.1f}x faster, similarity "
+            f"mean {sim['mean']} / median {sim['median']} / min {sim['min']}"
+        )
+        print(
+            "   worst pages: "
+            + ", ".join(f"p{w['page']}={w['similarity']}" for w in sim["worst_pages"])
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf_paths", nargs="+", help="PDF files to benchmark")
+    parser.add_argument(
+        "--max-pages", type=int, default=None, help="Only benchmark the first N pages"
+    )
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    all_results = {}
+    for pdf_path in args.pdf_paths:
+        try:
+            all_results[pdf_path] = benchmark_pdf(pdf_path, args.max_pages)
+        except Exception as e:
+            print(f"❌ Failed to benchmark {pdf_path}: {e}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\n💾 Results saved to {args.json}")
+
+    return 0 if all_results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
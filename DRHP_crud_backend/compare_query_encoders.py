@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compare inference-free (tokenizer + IDF) query encoding with full SPLADE
+query encoding, for the sparse leg of hybrid search.
+
+Pages from the given pages JSON files are encoded once with full SPLADE, as
+the "sparse" index holds them. Every template query is then encoded both
+ways and the pages ranked by sparse dot product. Taking the SPLADE query
+ranking as the reference we report, per encoder:
+    overlap@k   share of SPLADE's top-k pages also in the IDF top-k
+    top1@k      how often SPLADE's best page is in the IDF top-k
+    latency     p50 / p99 query encoding time (SPLADE includes the HTTP call)
+
+Usage:
+    python compare_query_encoders.py 1726054206064_451_pages.json
+    python compare_query_encoders.py pages.json --weights idf.npz --top-k 5 --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from app.utils.splade_client import splade_sparse, splade_sparse_batch
+from DRHP_ai_processing.query_sparse_encoder import (
+    QuerySparseEncoder,
+    build_query_weights,
+    iter_page_texts,
+    load_tokenizer,
+)
+
+
+def load_queries(template_path: str) -> list[str]:
+    """"Search Query" and "<section> <topic>" (as get_drhp_content_direct builds it)."""
+    with open(template_path, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    queries = []
+    for section, items in template.items():
+        for item in items:
+            if item.get("Search Query"):
+                queries.append(item["Search Query"])
+            if item.get("Topics"):
+                queries.append(f"{section} {item['Topics']}".strip())
+    return list(dict.fromkeys(queries))
+
+
+def rank(index: dict, query: dict, top_k: int) -> list[int]:
+    """Top-k page indices by sparse dot product over an inverted index."""
+    scores = defaultdict(float)
+    for token_id, weight in query.items():
+        for page, page_weight in index.get(token_id, ()):
+            scores[page] += weight * page_weight
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages_json", nargs="+", help="Pages JSON files")
+    parser.add_argument("--template", default="drhp_search_template.json")
+    parser.add_argument("--weights", default=None, help="IDF table (default: built from the pages)")
+    parser.add_argument("--url", default=os.getenv("SPARSE_EMBEDDING_URL"), help="SPLADE /embed URL")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--json", default=None, help="Write the results here")
+    args = parser.parse_args()
+
+    pages = [text for text in iter_page_texts(args.pages_json) if text.strip()]
+    queries = load_queries(args.template)
+    print(f"📄 {len(pages)} pages, {len(queries)} queries")
+
+    if args.weights:
+        encoder = QuerySparseEncoder.load(args.weights)
+    else:
+        tokenizer = load_tokenizer()
+        encoder = QuerySparseEncoder(tokenizer, build_query_weights(pages, tokenizer)[0])
+
+    start = time.perf_counter()
+    index = defaultdict(list)
+    for page, vector in enumerate(splade_sparse_batch(pages, url=args.url)):
+        for token_id, weight in vector.items():
+            index[token_id].append((page, weight))
+    print(f"🔢 Encoded pages with SPLADE in {time.perf_counter() - start:.1f}s")
+
+    latencies = {"splade": [], "idf": []}
+    nnz = {"splade": [], "idf": []}
+    overlaps, top1_hits = [], []
+    for query in queries:
+        splade_vec, ms = timed(lambda text: splade_sparse(text, url=args.url), query)
+        latencies["splade"].append(ms)
+        idf_vec, ms = timed(encoder.encode, query)
+        latencies["idf"].append(ms)
+        nnz["splade"].append(len(splade_vec))
+        nnz["idf"].append(len(idf_vec))
+
+        reference = rank(index, splade_vec, args.top_k)
+        candidate = set(rank(index, idf_vec, args.top_k))
+        if not reference:
+            continue
+        overlaps.append(len(candidate.intersection(reference)) / len(reference))
+        top1_hits.append(reference[0] in candidate)
+
+    results = {
+        "pages": len(pages),
+        "queries": len(queries),
+        "top_k": args.top_k,
+        f"overlap@{args.top_k}": round(float(np.mean(overlaps)), 4) if overlaps else None,
+        f"top1@{args.top_k}": round(float(np.mean(top1_hits)), 4) if top1_hits else None,
+        "encoders": {
+            name: {
+                "latency_ms_p50": round(float(np.percentile(latencies[name], 50)), 4),
+                "latency_ms_p99": round(float(np.percentile(latencies[name], 99)), 4),
+                "nnz_mean": round(float(np.mean(nnz[name])), 1),
+            }
+            for name in latencies
+        },
+    }
+
+    print("\n📊 Query encoders (SPLADE ranking as reference)")
+    print("=" * 60)
+    for name, stats in results["encoders"].items():
+        print(
+            f"{name:<8} p50 {stats['latency_ms_p50']:>9.4f} ms  p99 {stats['latency_ms_p99']:>9.4f} ms  "
+            f"{stats['nnz_mean']:>6.1f} tokens/query"
+        )
+    print(
+        f"IDF vs SPLADE: overlap@{args.top_k} {results[f'overlap@{args.top_k}']}, "
+        f"top1@{args.top_k} {results[f'top1@{args.top_k}']}"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Compare page-text token counts between the "append" and "masked" table modes.
+
+For every PDF given, the chosen backend extracts every page in both modes
+(one document open per mode, same as a chunked worker) and we report the
+tokens each mode would send to embeddings / LLM context, for the whole
+document and for the pages that have tables.
+
+Usage:
+    python compare_table_modes.py DRHPS/ASTONEA_LABS_LTD.pdf [more.pdf ...]
+    python compare_table_modes.py DRHPS/*.pdf --backend pymupdf --json results.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from DRHP_ai_processing.text_extraction_backends import (
+    DEFAULT_TEXT_BACKEND,
+    TABLE_MODES,
+    TEXT_EXTRACTION_BACKENDS,
+    get_text_backend,
+)
+from DRHP_ai_processing.token_counting import count_tokens
+
+
+def extract_all(backend_name: str, table_mode: str, pdf_path: str, max_pages: int | None):
+    """Extract every page in one table mode; returns (texts, seconds, chars_masked)."""
+    backend = get_text_backend(backend_name, table_mode)
+    start = time.perf_counter()
+    doc = backend.open(pdf_path)
+    try:
+        total = backend.page_count(doc)
+        if max_pages:
+            total = min(total, max_pages)
+        texts = []
+        for page_no in range(1, total + 1):
+            try:
+                texts.append(backend.page_text(doc, page_no))
+            except Exception as e:
+                print(f"⚠️ {backend_name}/{table_mode} failed on page {page_no}: {e}")
+                texts.append("")
+    finally:
+        backend.close(doc)
+    return texts, time.perf_counter() - start, backend.table_chars_masked
+
+
+def compare_pdf(pdf_path: str, backend_name: str, max_pages: int | None) -> dict:
+    print(f"\n📄 {pdf_path} ({backend_name})")
+    print("=" * 60)
+
+    tokens, results = {}, {}
+    for mode in TABLE_MODES:
+        texts, seconds, chars_masked = extract_all(backend_name, mode, pdf_path, max_pages)
+        tokens[mode] = [count_tokens(text) for text in texts]
+        results[mode] = {
+            "pages": len(texts),
+            "seconds": round(seconds, 3),
+            "tokens": sum(tokens[mode]),
+            "table_chars_masked": chars_masked,
+        }
+
+    # pages where the two modes differ are the ones with extracted tables
+    table_pages = [
+        i for i, (a, m) in enumerate(zip(tokens["append"], tokens["masked"])) if a != m
+    ]
+    for mode in TABLE_MODES:
+        results[mode]["table_page_tokens"] = sum(tokens[mode][i] for i in table_pages)
+        print(
+            f"🔢 {mode:<7} {results[mode]['tokens']} tokens "
+            f"({results[mode]['table_page_tokens']} on {len(table_pages)} table pages) "
+            f"in {results[mode]['seconds']:.2f}s"
+        )
+
+    saved = results["append"]["tokens"] - results["masked"]["tokens"]
+    saved_on_tables = results["append"]["table_page_tokens"] - results["masked"]["table_page_tokens"]
+    results["table_pages"] = len(table_pages)
+    results["tokens_saved"] = saved
+    results["tokens_saved_pct"] = round(100 * saved / max(results["append"]["tokens"], 1), 2)
+    results["table_page_tokens_saved_pct"] = round(
+        100 * saved_on_tables / max(results["append"]["table_page_tokens"], 1), 2
+    )
+    print(
+        f"📊 masked saves {saved} tokens ({results['tokens_saved_pct']}% of the document, "
+        f"{results['table_page_tokens_saved_pct']}% on table pages)"
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf_paths", nargs="+", help="PDF files to compare")
+    parser.add_argument(
+        "--backend",
+        default=DEFAULT_TEXT_BACKEND,
+        choices=sorted(TEXT_EXTRACTION_BACKENDS),
+        help="Text extraction backend",
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=None, help="Only compare the first N pages"
+    )
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    all_results = {}
+    for pdf_path in args.pdf_paths:
+        try:
+            all_results[pdf_path] = compare_pdf(pdf_path, args.backend, args.max_pages)
+        except Exception as e:
+            print(f"❌ Failed to compare {pdf_path}: {e}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\n💾 Results saved to {args.json}")
+
+    return 0 if all_results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,20 +30,26 @@ from typing import List, Optional, Tuple, Dict, Any
 from dotenv import load_dotenv
 from pathlib import Path
 import uuid
-import requests
 import boto3
 
 load_dotenv()
 
 from DRHP_ai_processing.page_processor_local import process_pdf_local
+from DRHP_ai_processing.vision_images import page_to_vision_image
+from DRHP_ai_processing.page_enrichment import (
+    enrich_hits,
+    enrichment_stats,
+    is_lazy,
+)
+from DRHP_ai_processing.embedding_batcher import embed_texts
+from DRHP_ai_processing.embedding_cache import cached_embedding, embedding_cache_stats
+from app.utils.splade_client import splade_sparse, splade_sparse_batch
+from DRHP_ai_processing.query_sparse_encoder import query_sparse
 from qdrant_client import QdrantClient, models as qmodels
 from baml_client import b
-from baml_py import Collector, Image
+from baml_py import Collector
 import pdfplumber
 import fitz
-import numpy as np
-import cv2
-import base64
 import re
 from openai import OpenAI
 
@@ -175,36 +181,41 @@ class PDFToQdrantProcessor:
             self.logger.error(f"❌ Failed to initialize clients: {e}")
             raise
 
+    def _create_embedding(self, text: str) -> List[float]:
+        response = self.openai_client.embeddings.create(
+            model=Config.OPENAI_MODEL, input=text
+        )
+        return response.data[0].embedding
+
     def _generate_openai_embedding(self, text: str) -> List[float]:
-        """Generate dense embedding using OpenAI"""
+        """Generate dense embedding using OpenAI (through the embedding cache)"""
         try:
-            response = self.openai_client.embeddings.create(
-                model=Config.OPENAI_MODEL, input=text
-            )
-            return response.data[0].embedding
+            return cached_embedding(text, Config.OPENAI_MODEL, self._create_embedding)
         except Exception as e:
             self.logger.error(f"❌ Error generating OpenAI embedding: {e}")
             raise
 
     def _generate_sparse_embedding(self, text: str) -> qmodels.SparseVector:
         """Generate sparse embedding using SPLADE service"""
-        try:
-            response = requests.post(
-                Config.SPARSE_EMBEDDING_URL, json={"text": text}, timeout=10
-            )
-            response.raise_for_status()
-            sparse_dict = response.json() or {}
+        sparse_dict = splade_sparse(text, url=Config.SPARSE_EMBEDDING_URL)
+        return qmodels.SparseVector(
+            indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+        )
 
-            if sparse_dict:
-                indices = [int(k) for k in sparse_dict.keys()]
-                values = [float(v) for v in sparse_dict.values()]
-                return qmodels.SparseVector(indices=indices, values=values)
-            else:
-                return qmodels.SparseVector(indices=[], values=[])
+    def _generate_sparse_embeddings(self, texts: List[str]) -> List[qmodels.SparseVector]:
+        """Sparse embeddings for many texts via the SPLADE service's batch endpoint"""
+        return [
+            qmodels.SparseVector(
+                indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+            )
+            for sparse_dict in splade_sparse_batch(texts, url=Config.SPARSE_EMBEDDING_URL)
+        ]
 
-        except Exception as e:
-            self.logger.error(f"❌ Error generating sparse embedding: {e}")
-            return qmodels.SparseVector(indices=[], values=[])
+    def _sparse_text(self, page_info: dict) -> str:
+        """Facts + queries, or the page content for pages not enriched yet"""
+        return self._combine_facts_and_queries(page_info) or page_info.get(
+            "page_content", ""
+        )
 
     def _combine_facts_and_queries(self, page_info: dict) -> str:
         """Combine only facts and queries for sparse embedding"""
@@ -225,28 +236,36 @@ class PDFToQdrantProcessor:
         return " ".join(parts)
 
     def _generate_hybrid_embeddings(
-        self, page_info: dict
+        self,
+        page_info: dict,
+        dense_vector: Optional[List[float]] = None,
+        sparse_vector: Optional[qmodels.SparseVector] = None,
     ) -> Tuple[List[float], qmodels.SparseVector]:
         """
         Generate both dense and sparse embeddings for a page
 
         Strategy:
         - Dense embedding: Uses page content only (for semantic understanding)
-        - Sparse embedding: Uses facts + queries only (for keyword matching)
+        - Sparse embedding: Uses facts + queries only (for keyword matching);
+          pages not enriched yet (lazy enrichment) use their content until
+          DRHPSearcher back-fills facts/queries on retrieval
 
         Args:
             page_info: Dictionary containing page data with 'page_content', 'facts', 'queries'
+            dense_vector: Precomputed dense embedding (batched upserts), if any
+            sparse_vector: Precomputed sparse embedding (batched upserts), if any
 
         Returns:
             Tuple of (dense_vector, sparse_vector)
         """
         # Generate dense embedding for page content only (semantic understanding)
         dense_text = page_info.get("page_content", "")
-        dense_vector = self._generate_openai_embedding(dense_text)
+        if dense_vector is None:
+            dense_vector = self._generate_openai_embedding(dense_text)
 
         # Generate sparse embedding for facts + queries only (keyword matching)
-        facts_queries_text = self._combine_facts_and_queries(page_info)
-        sparse_vector = self._generate_sparse_embedding(facts_queries_text)
+        if sparse_vector is None:
+            sparse_vector = self._generate_sparse_embedding(self._sparse_text(page_info))
 
         return dense_vector, sparse_vector
 
@@ -292,38 +311,6 @@ Please provide a comprehensive answer based on the context above."""
             self.logger.error(f"❌ Error generating LLM answer: {e}")
             return f"Error generating answer: {str(e)}"
 
-    def pdf_page_to_cv2_image(
-        self, pdf_path: str, page_num: int, dpi: int = 200
-    ) -> np.ndarray:
-        """Convert PDF page to cv2 image"""
-        try:
-            doc = fitz.open(pdf_path)
-            page = doc.load_page(page_num - 1)
-            pix = page.get_pixmap(dpi=dpi)
-            img_np = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
-                (pix.height, pix.width, pix.n)
-            )
-            if pix.n == 4:
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGBA2BGR)
-            else:
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-            doc.close()
-            return img_np
-        except Exception as e:
-            self.logger.error(f"Error converting PDF page {page_num} to image: {e}")
-            raise
-
-    def img_to_bytes(self, cv2_img: np.ndarray) -> bytes:
-        """Convert cv2 image to bytes"""
-        try:
-            success, buf = cv2.imencode(".png", cv2_img)
-            if not success:
-                raise ValueError("Failed to encode image")
-            return buf.tobytes()
-        except Exception as e:
-            self.logger.error(f"Error converting image to bytes: {e}")
-            raise
-
     def detect_toc_page(
         self, pdf_path: str, max_pages_to_check: int = 20
     ) -> Optional[dict]:
@@ -344,14 +331,16 @@ Please provide a comprehensive answer based on the context above."""
                 try:
                     self.logger.debug(f"Checking page {page_num} for TOC...")
 
-                    # Convert page to image
-                    cv2_img = self.pdf_page_to_cv2_image(pdf_path, page_num)
-                    img_bytes = self.img_to_bytes(cv2_img)
-                    b64 = base64.b64encode(img_bytes).decode()
-                    baml_img = Image.from_base64("image/png", b64)
+                    # Convert page to image (small grayscale render for detection)
+                    with fitz.open(pdf_path) as doc:
+                        page = doc.load_page(page_num - 1)
+                        baml_img = page_to_vision_image(page, "toc_detect")
+
+                        # Check if this is a TOC page using BAML
+                        toc_result = b.ExtractTableOfContents(baml_img)
+                        if toc_result.isTocPage:
+                            baml_img = page_to_vision_image(page, "toc_content")
 
-                    # Check if this is a TOC page using BAML
-                    toc_result = b.ExtractTableOfContents(baml_img)
                     if toc_result.isTocPage:
                         self.logger.info(f"✅ TOC detected at page {page_num}")
 
@@ -608,24 +597,38 @@ Please provide a comprehensive answer based on the context above."""
                     "toc_text": metadata.get("toc_text", ""),
                 }
 
-            # Process pages in batches
+            # Dense embeddings for all non-empty pages in token-budgeted batches
+            pages = [
+                (page_no, page_info)
+                for page_no, page_info in pages_data.items()
+                if page_no != "_metadata"
+                and page_info.get("page_content", "").strip()
+            ]
+            dense_vectors = embed_texts(
+                self.openai_client,
+                [page_info["page_content"] for _, page_info in pages],
+                model=Config.OPENAI_MODEL,
+                stats=self.stats,
+            )
+            # Sparse embeddings through the SPLADE batch endpoint
+            sparse_vectors = self._generate_sparse_embeddings(
+                [self._sparse_text(page_info) for _, page_info in pages]
+            )
+
             all_points = []
             pages_processed = 0
 
-            for page_no, page_info in pages_data.items():
-                # Skip metadata
-                if page_no == "_metadata":
-                    continue
-
+            for (page_no, page_info), dense_vector, sparse_vector in zip(
+                pages, dense_vectors, sparse_vectors
+            ):
                 try:
-                    content = page_info.get("page_content", "")
-                    if not content.strip():
-                        self.logger.debug(f"Skipping empty page {page_no}")
-                        continue
+                    content = page_info["page_content"]
+                    if dense_vector is None:
+                        raise RuntimeError("dense embedding failed")
 
-                    # Generate hybrid embeddings
+                    # Both embeddings come from the batches above
                     dense_vector, sparse_vector = self._generate_hybrid_embeddings(
-                        page_info
+                        page_info, dense_vector=dense_vector, sparse_vector=sparse_vector
                     )
 
                     # Create point ID
@@ -644,6 +647,9 @@ Please provide a comprehensive answer based on the context above."""
                             "page_number_drhp": page_info.get("page_number_drhp", ""),
                             "facts": page_info.get("facts", []),
                             "queries": page_info.get("queries", []),
+                            "enriched": bool(
+                                page_info.get("facts") or page_info.get("queries")
+                            ),
                             "is_toc_page": (
                                 toc_info is not None
                                 and int(page_no) == toc_info.get("page_number")
@@ -804,36 +810,26 @@ class DRHPSearcher:
             self.logger.error(f"❌ Failed to initialize search clients: {e}")
             raise
 
+    def _create_embedding(self, text: str) -> List[float]:
+        response = self.openai_client.embeddings.create(
+            model=Config.OPENAI_MODEL, input=text
+        )
+        return response.data[0].embedding
+
     def _generate_dense_embedding(self, text: str) -> List[float]:
-        """Generate dense embedding using OpenAI"""
+        """Generate dense embedding using OpenAI (through the embedding cache)"""
         try:
-            response = self.openai_client.embeddings.create(
-                model=Config.OPENAI_MODEL, input=text
-            )
-            return response.data[0].embedding
+            return cached_embedding(text, Config.OPENAI_MODEL, self._create_embedding)
         except Exception as e:
             self.logger.error(f"❌ Error generating dense embedding: {e}")
             return [0.0] * Config.DENSE_VECTOR_SIZE
 
     def _generate_sparse_embedding(self, text: str) -> qmodels.SparseVector:
         """Generate sparse embedding using SPLADE service"""
-        try:
-            response = requests.post(
-                Config.SPARSE_EMBEDDING_URL, json={"text": text}, timeout=10
-            )
-            response.raise_for_status()
-            sparse_dict = response.json() or {}
-
-            if sparse_dict:
-                indices = [int(k) for k in sparse_dict.keys()]
-                values = [float(v) for v in sparse_dict.values()]
-                return qmodels.SparseVector(indices=indices, values=values)
-            else:
-                return qmodels.SparseVector(indices=[], values=[])
-
-        except Exception as e:
-            self.logger.error(f"❌ Error generating sparse embedding: {e}")
-            return qmodels.SparseVector(indices=[], values=[])
+        sparse_dict = splade_sparse(text, url=Config.SPARSE_EMBEDDING_URL)
+        return qmodels.SparseVector(
+            indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+        )
 
     def _generate_llm_answer(self, prompt: str, context: str) -> str:
         """
@@ -892,6 +888,19 @@ Please provide a comprehensive answer based on the context above."""
 
         return None
 
+    def _generate_query_sparse_embedding(self, query: str) -> qmodels.SparseVector:
+        """Sparse query vector; in-process IDF weights when DRHP_QUERY_SPARSE_MODE=idf"""
+        sparse_dict = query_sparse(query, url=Config.SPARSE_EMBEDDING_URL)
+        return qmodels.SparseVector(
+            indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+        )
+
+    def _sparse_from_enrichment(self, enrichment: dict) -> qmodels.SparseVector:
+        """Sparse vector over facts + queries, as PDFToQdrantProcessor indexes them"""
+        return self._generate_sparse_embedding(
+            " ".join(str(x) for x in enrichment["facts"] + enrichment["queries"])
+        )
+
     def hybrid_search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Perform hybrid search using dense and sparse embeddings with RRF fusion
@@ -908,7 +917,7 @@ Please provide a comprehensive answer based on the context above."""
 
             # Generate embeddings
             dense_vec = self._generate_dense_embedding(query)
-            sparse_vec = self._generate_sparse_embedding(query)
+            sparse_vec = self._generate_query_sparse_embedding(query)
 
             # Perform hybrid search with RRF fusion
             results = self.qdrant.query_points(
@@ -929,11 +938,24 @@ Please provide a comprehensive answer based on the context above."""
             # Unwrap results
             if isinstance(results, tuple):
                 results = results[0]
+            points = [self._unwrap_point(point) for point in results]
+
+            # Generate facts/queries only for pages that actually get retrieved
+            if is_lazy():
+                try:
+                    enrich_hits(
+                        self.qdrant,
+                        self.collection_name,
+                        points,
+                        sparse_embed=self._sparse_from_enrichment,
+                        sparse_vector_name=self.sparse_vector_name,
+                    )
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Lazy enrichment failed: {e}")
 
             # Process and format results
             formatted_results = []
-            for point in results:
-                unwrapped_point = self._unwrap_point(point)
+            for unwrapped_point in points:
                 if unwrapped_point and unwrapped_point.payload:
                     formatted_results.append(
                         {
@@ -1034,6 +1056,21 @@ Please provide a comprehensive answer based on the context above."""
                         f"✅ Found {len(results)} results for topic: {topic}"
                     )
 
+            enrichment = enrichment_stats()
+            search_results["enrichment"] = enrichment
+            self.logger.info(
+                f"🧠 Enrichment: {enrichment['pages_enriched']} pages "
+                f"({enrichment['enrichment_cache_hits']} cached, "
+                f"{enrichment['enrichment_llm_calls']} LLM calls)"
+            )
+            cache_stats = embedding_cache_stats()
+            search_results["embedding_cache"] = cache_stats
+            if cache_stats:
+                self.logger.info(
+                    f"♻️ Embedding cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                    f"{cache_stats['bytes_stored'] / 1e6:.1f} MB stored, lookup p50 "
+                    f"{cache_stats['lookup_p50_ms']} ms / p99 {cache_stats['lookup_p99_ms']} ms"
+                )
             return search_results
 
         except Exception as e:
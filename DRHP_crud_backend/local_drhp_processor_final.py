@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import queue
 import threading
 import time
 import traceback
@@ -9,23 +10,45 @@ from typing import List, Optional, Tuple, Dict, Any
 from dotenv import load_dotenv
 from pathlib import Path
 import uuid
-import requests
 
 load_dotenv()
 
-from DRHP_ai_processing.page_processor_local import process_pdf_local
+from DRHP_ai_processing.page_processor_local import process_pdf_local, stream_pdf_pages
+from DRHP_ai_processing.toc_detection import (
+    TOC_CONFIRM_TOP_K,
+    TOC_MIN_CANDIDATE_SCORE,
+    is_conclusive_toc,
+    rank_toc_candidates,
+    toc_entries_from_text,
+)
+from DRHP_ai_processing.vision_images import page_to_vision_image, vision_payload_stats
+from DRHP_ai_processing.extraction_cache import (
+    ExtractionCache,
+    compute_pdf_hash,
+    extractor_key,
+)
+from DRHP_ai_processing.boilerplate import BOILERPLATE_STATS
+from DRHP_ai_processing.embedding_batcher import embed_texts
+from DRHP_ai_processing.embedding_cache import cached_embedding, embedding_cache_stats
+from app.utils.splade_client import splade_sparse
+from DRHP_ai_processing.query_sparse_encoder import query_sparse
 from qdrant_client import QdrantClient, models as qmodels
 from baml_client import b
 from baml_py import Collector, Image
-import pdfplumber
 import fitz
-import numpy as np
-import cv2
-import base64
 import re
 from openai import OpenAI
 from azure_blob_utils import get_blob_storage
 
+# Keep intermediate artifacts (footer strips, pages JSON) in temp/ blobs for debugging
+DEBUG_ARTIFACTS = os.getenv("DRHP_DEBUG_ARTIFACTS", "false").lower() == "true"
+
+# Streaming ingestion: pages buffered between extraction and each sink, and
+# pages handed to a sink (Mongo bulk write / Qdrant upsert) per call
+STREAM_QUEUE_SIZE = 32
+STREAM_BATCH_SIZE = 16
+_STREAM_DONE = object()
+
 
 # Configure comprehensive logging with both file and console handlers
 def setup_logging(company_name: str) -> logging.Logger:
@@ -86,6 +109,9 @@ class LocalDRHPProcessor:
             Collector(name=f"collector-{company_name}-{i}") for i in range(max_workers)
         ]
 
+        # Per-page extraction results keyed by PDF hash + extractor settings
+        self.extraction_cache = ExtractionCache()
+
         # Token counters
         self.input_tokens = 0
         self.output_tokens = 0
@@ -99,6 +125,25 @@ class LocalDRHPProcessor:
             "end_time": None,
             "embeddings_created": False,
             "embeddings_reused": False,
+            "page_numbers_inferred": 0,
+            "page_number_llm_calls": 0,
+            "page_number_llm_calls_avoided": 0,
+            "table_pages_extracted": 0,
+            "table_pages_skipped": 0,
+            "table_chars_masked": 0,
+            "embedding_requests": 0,
+            "embedding_tokens": 0,
+            "embedding_failures": 0,
+            "embedding_cache_hits": 0,
+            "extraction_cache_hits": 0,
+            "extraction_cache_misses": 0,
+            "toc_vision_calls": 0,
+            "ocr_fallback_pages": 0,
+            "ocr_fallback_cache_hits": 0,
+            "boilerplate_lines": 0,
+            "boilerplate_lines_removed": 0,
+            "boilerplate_tokens_removed": 0,
+            "page_tokens_raw": 0,
         }
 
     def _init_qdrant_client(self, max_retries: int = 3):
@@ -125,13 +170,18 @@ class LocalDRHPProcessor:
 
     def _generate_openai_embedding(self, text: str) -> List[float]:
         """
-        Generate embedding using OpenAI's text-embedding-3-small model
+        Generate embedding using OpenAI's text-embedding-3-small model,
+        through the shared embedding cache
         """
-        try:
+
+        def embed(text: str) -> List[float]:
             response = self.openai_client.embeddings.create(
                 model="text-embedding-3-small", input=text
             )
             return response.data[0].embedding
+
+        try:
+            return cached_embedding(text, "text-embedding-3-small", embed)
         except Exception as e:
             self.logger.error(f"❌ Error generating OpenAI embedding: {e}")
             raise
@@ -140,28 +190,23 @@ class LocalDRHPProcessor:
         """
         Generate sparse embedding using the hosted SPLADE service
         """
-        try:
-            sparse_url = os.getenv(
-                "SPARSE_EMBEDDING_URL", "http://52.7.81.94:8010/embed"
-            )
-
-            response = requests.post(sparse_url, json={"text": text}, timeout=10)
-            response.raise_for_status()
-            sparse_dict = response.json() or {}
-
-            if sparse_dict:
-                indices = [int(k) for k in sparse_dict.keys()]
-                values = [float(v) for v in sparse_dict.values()]
-                return qmodels.SparseVector(indices=indices, values=values)
-            else:
-                self.logger.warning(
-                    "Empty sparse embedding response, returning empty vector"
-                )
-                return qmodels.SparseVector(indices=[], values=[])
+        sparse_url = os.getenv("SPARSE_EMBEDDING_URL", "http://52.7.81.94:8010/embed")
+        sparse_dict = splade_sparse(text, url=sparse_url)
+        if not sparse_dict:
+            self.logger.warning("Empty sparse embedding response, returning empty vector")
+        return qmodels.SparseVector(
+            indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+        )
 
-        except Exception as e:
-            self.logger.error(f"❌ Error generating sparse embedding: {e}")
-            return qmodels.SparseVector(indices=[], values=[])
+    def _generate_query_sparse_embedding(self, query: str) -> qmodels.SparseVector:
+        """
+        Sparse query vector; in-process IDF weights when DRHP_QUERY_SPARSE_MODE=idf
+        """
+        sparse_url = os.getenv("SPARSE_EMBEDDING_URL", "http://52.7.81.94:8010/embed")
+        sparse_dict = query_sparse(query, url=sparse_url)
+        return qmodels.SparseVector(
+            indices=list(sparse_dict.keys()), values=list(sparse_dict.values())
+        )
 
     def _combine_text_for_embedding(self, page_info: dict) -> str:
         """
@@ -206,71 +251,83 @@ class LocalDRHPProcessor:
 
         return dense_vector, sparse_vector
 
-    def pdf_page_to_cv2_image(
-        self, pdf_path: str, page_num: int, dpi: int = 200
-    ) -> np.ndarray:
-        """Convert PDF page to cv2 image with error handling"""
-        try:
-            doc = fitz.open(pdf_path)
-            page = doc.load_page(page_num - 1)
-            pix = page.get_pixmap(dpi=dpi)
-            img_np = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
-                (pix.height, pix.width, pix.n)
-            )
-            if pix.n == 4:
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGBA2BGR)
-            else:
-                img_np = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-            doc.close()
-            return img_np
-        except Exception as e:
-            self.logger.error(f"Error converting PDF page {page_num} to image: {e}")
-            raise
-
-    def img_to_bytes(self, cv2_img: np.ndarray) -> bytes:
-        """Convert cv2 image to bytes with error handling"""
-        try:
-            success, buf = cv2.imencode(".png", cv2_img)
-            if not success:
-                raise ValueError("Failed to encode image")
-            return buf.tobytes()
-        except Exception as e:
-            self.logger.error(f"Error converting image to bytes: {e}")
-            raise
-
     def detect_toc_page(
         self, pdf_path: str, company_name: str, max_pages_to_check: int = 20
     ) -> Optional[dict]:
         """
         Detect Table of Contents page and extract TOC content using BAML with comprehensive error handling
+
+        Pages are first ranked from the PDF text layer with no LLM calls. A
+        conclusive text-layer hit is returned directly, with entries parsed from
+        the text. Otherwise only the top TOC_CONFIRM_TOP_K candidates are sent to
+        ExtractTableOfContents, concurrently. If none confirm (or the PDF has no
+        text layer), the remaining pages are checked in concurrent windows of
+        the same size, in page order.
         Returns a dict with page number and TOC content, or None if not found
         """
         self.logger.info("🔍 Detecting Table of Contents page...")
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                pages_to_check = min(max_pages_to_check, total_pages)
-
+            ranked, texts = rank_toc_candidates(pdf_path, max_pages_to_check)
+            pages_to_check = len(texts)
             self.logger.info(f"Checking first {pages_to_check} pages for TOC...")
 
-            for page_num in range(1, pages_to_check + 1):
-                try:
-                    self.logger.debug(f"Checking page {page_num} for TOC...")
-
-                    # Convert page to image
-                    cv2_img = self.pdf_page_to_cv2_image(pdf_path, page_num)
-                    img_bytes = self.img_to_bytes(cv2_img)
-                    b64 = base64.b64encode(img_bytes).decode()
-                    baml_img = Image.from_base64("image/png", b64)
-
-                    # Check if this is a TOC page using BAML
-                    toc_result = b.ExtractTableOfContents(baml_img)
-                    if toc_result.isTocPage:
+            conclusive = [
+                p for p, score in ranked if is_conclusive_toc(texts[p], score)
+            ]
+            if conclusive:
+                page_num = min(conclusive)
+                toc_entries = toc_entries_from_text(texts[page_num])
+                if toc_entries:
+                    self.logger.info(
+                        f"✅ TOC detected at page {page_num} from the text layer "
+                        f"({len(toc_entries)} entries, no vision calls)"
+                    )
+                    return {
+                        "page_number": page_num,
+                        "toc_entries": toc_entries,
+                        "toc_text": texts[page_num].strip(),
+                    }
+
+            candidates = sorted(
+                p for p, score in ranked[:TOC_CONFIRM_TOP_K]
+                if score >= TOC_MIN_CANDIDATE_SCORE
+            )
+            remaining = [p for p in range(1, pages_to_check + 1) if p not in candidates]
+            windows = [candidates] if candidates else []
+            windows += [
+                remaining[i : i + TOC_CONFIRM_TOP_K]
+                for i in range(0, len(remaining), TOC_CONFIRM_TOP_K)
+            ]
+
+            with fitz.open(pdf_path) as doc:
+                for window in windows:
+                    images = {}
+                    for page_num in window:
+                        try:
+                            images[page_num] = self.pdf_page_to_baml_image(
+                                doc, page_num, "toc_detect"
+                            )
+                        except Exception as e:
+                            self.logger.warning(
+                                f"Error checking TOC for page {page_num}: {e}"
+                            )
+                    confirmed = self._confirm_toc_pages(images)
+                    for page_num in sorted(confirmed):
                         self.logger.info(f"✅ TOC detected at page {page_num}")
 
-                        # Extract TOC content
-                        toc_content_result = b.ExtractTocContent(baml_img)
+                        # Extract TOC content (needs a sharper render than detection)
+                        try:
+                            toc_content_result = b.ExtractTocContent(
+                                self.pdf_page_to_baml_image(doc, page_num, "toc_content")
+                            )
+                        except Exception as e:
+                            self.logger.warning(
+                                f"Error extracting TOC content for page {page_num}: {e}"
+                            )
+                            continue
+                        finally:
+                            self.stats["toc_vision_calls"] += 1
 
                         return {
                             "page_number": page_num,
@@ -278,10 +335,6 @@ class LocalDRHPProcessor:
                             "toc_text": toc_content_result.toc_text,
                         }
 
-                except Exception as e:
-                    self.logger.warning(f"Error checking TOC for page {page_num}: {e}")
-                    continue
-
             self.logger.warning(
                 f"❌ No TOC page detected in first {pages_to_check} pages"
             )
@@ -291,6 +344,38 @@ class LocalDRHPProcessor:
             self.logger.error(f"Error in TOC detection: {e}")
             return None
 
+    def pdf_page_to_baml_image(
+        self, doc: fitz.Document, page_num: int, call_type: str
+    ) -> Image:
+        """
+        Render a page of an already open document for a BAML vision call, with
+        the resolution/codec of its vision_images profile ("toc_detect", ...).
+        """
+        return page_to_vision_image(doc.load_page(page_num - 1), call_type)
+
+    def _confirm_toc_pages(self, images: Dict[int, Image]) -> List[int]:
+        """Run ExtractTableOfContents on all pages concurrently; returns the TOC pages."""
+        if not images:
+            return []
+        confirmed = []
+        with ThreadPoolExecutor(max_workers=len(images)) as executor:
+            futures = {
+                executor.submit(b.ExtractTableOfContents, img): page_num
+                for page_num, img in images.items()
+            }
+            for future in as_completed(futures):
+                page_num = futures[future]
+                self.stats["toc_vision_calls"] += 1
+                try:
+                    if future.result().isTocPage:
+                        confirmed.append(page_num)
+                except Exception as e:
+                    self.logger.warning(f"Error checking TOC for page {page_num}: {e}")
+        self.logger.info(
+            f"🔍 Vision TOC check on pages {sorted(images)}: confirmed {sorted(confirmed)}"
+        )
+        return confirmed
+
     def process_pdf_locally(
         self,
         pdf_path: str,
@@ -298,42 +383,56 @@ class LocalDRHPProcessor:
         dpi: int = 200,
         threshold: int = 245,
         max_workers: int = 5,
+        text_backend: Optional[str] = None,
+        debug_artifacts: Optional[bool] = None,
     ) -> str:
         """
         Step 1: Process PDF locally using page_processor with comprehensive error handling
-        Returns: Azure blob name of the output JSON file (for internal use only)
+        text_backend selects the page text extractor ("pdfplumber" / "pymupdf"), see
+        DRHP_ai_processing.text_extraction_backends.
+        debug_artifacts (default: DRHP_DEBUG_ARTIFACTS env var) saves the footer strips
+        and uploads them plus the pages JSON to Azure Blob Storage under temp/ for inspection.
+        A PDF already in the extraction cache (same bytes and extractor settings) skips
+        text extraction, OCR and TOC detection entirely.
+        Returns: Local path of the output JSON file (the caller removes it when done)
         """
         self.logger.info(f"📄 Starting PDF processing: {pdf_path}")
         self.stats["start_time"] = time.time()
 
-        blob_storage = get_blob_storage()
-        temp_blobs_to_cleanup = []
+        if debug_artifacts is None:
+            debug_artifacts = DEBUG_ARTIFACTS
         company_id = company_name.replace(" ", "_")
+        import tempfile
+        import shutil
+
         try:
+            pdf_hash, cache_key, cached = self._load_cached_extraction(
+                pdf_path, dpi, threshold, text_backend
+            )
+            if cached:
+                fd, output_json_path = tempfile.mkstemp(
+                    prefix=f"{company_id}_", suffix="_pages.json"
+                )
+                pages = cached["pages"]
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            os.path.basename(pdf_path): {
+                                str(pno): pages[pno] for pno in sorted(pages)
+                            }
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                self.add_toc_to_json(output_json_path, cached["toc_page"])
+                return output_json_path
+
             # Detect TOC page first
             toc_page = self.detect_toc_page(pdf_path, company_name)
 
-            # Prepare temp blob names
-            json_blob_name = (
-                f"temp/{company_id}/temp_pages_json/{company_id}_pages.json"
-            )
-            temp_img_dir_blob_prefix = f"temp/{company_id}/temp_stripped_bottom_images/"
-
             # Call process_pdf (local-only, no MongoDB)
             self.logger.info("🔄 Processing PDF pages...")
-            import tempfile
-            import shutil
-
             with tempfile.TemporaryDirectory() as temp_dir:
-                temp_company_dir = os.path.join(temp_dir, company_id)
-                os.makedirs(temp_company_dir, exist_ok=True)
-                temp_pages_json_dir = os.path.join(temp_company_dir, "temp_pages_json")
-                temp_stripped_img_dir = os.path.join(
-                    temp_company_dir, "temp_stripped_bottom_images"
-                )
-                os.makedirs(temp_pages_json_dir, exist_ok=True)
-                os.makedirs(temp_stripped_img_dir, exist_ok=True)
-
                 # Patch os.getcwd() to temp_dir for process_pdf_local
                 orig_cwd = os.getcwd()
                 os.chdir(temp_dir)
@@ -344,6 +443,9 @@ class LocalDRHPProcessor:
                         dpi=dpi,
                         threshold=threshold,
                         max_workers=max_workers,
+                        stats=self.stats,
+                        text_backend=text_backend,
+                        save_strips=debug_artifacts,
                     )
                 finally:
                     os.chdir(orig_cwd)
@@ -351,6 +453,13 @@ class LocalDRHPProcessor:
                 self.logger.info(
                     f"✅ PDF processing complete. Tokens - in: {total_in}, out: {total_out}"
                 )
+                self._log_vision_payloads()
+
+                temp_company_dir = os.path.join(temp_dir, company_name)
+                temp_pages_json_dir = os.path.join(temp_company_dir, "temp_pages_json")
+                temp_stripped_img_dir = os.path.join(
+                    temp_company_dir, "temp_stripped_bottom_images"
+                )
 
                 # Find the output JSON file
                 json_files = [
@@ -367,51 +476,309 @@ class LocalDRHPProcessor:
 
                 # Add TOC information to the JSON
                 self.add_toc_to_json(local_json_path, toc_page)
+                self._cache_pages_json(pdf_hash, cache_key, local_json_path, toc_page)
+
+                if debug_artifacts:
+                    self._upload_debug_artifacts(
+                        company_id, local_json_path, temp_stripped_img_dir
+                    )
+
+                # Move the JSON out of the temp dir so it outlives this call
+                fd, output_json_path = tempfile.mkstemp(
+                    prefix=f"{company_id}_", suffix="_pages.json"
+                )
+                os.close(fd)
+                shutil.move(local_json_path, output_json_path)
+                return output_json_path
+
+        except Exception as e:
+            self.logger.error(f"❌ Error in PDF processing: {e}")
+            self.logger.error(traceback.format_exc())
+            raise
+
+    def _load_cached_extraction(
+        self,
+        pdf_path: str,
+        dpi: int,
+        threshold: int,
+        text_backend: Optional[str],
+        pdf_hash: Optional[str] = None,
+    ) -> Tuple[str, str, Optional[dict]]:
+        """
+        Look the PDF up in the extraction cache by content hash + extractor settings.
+        Returns (pdf_hash, cache_key, cached) where cached is None on a miss.
+        """
+        pdf_hash = pdf_hash or compute_pdf_hash(pdf_path)
+        cache_key = extractor_key(dpi, threshold, text_backend)
+        cached = self.extraction_cache.load(pdf_hash, cache_key)
+        if cached:
+            self.stats["extraction_cache_hits"] += len(cached["pages"])
+            self.stats.update(cached["stats"])
+            self.logger.info(
+                f"♻️ Extraction cache hit for {pdf_hash[:12]}… ({cache_key}): "
+                f"{len(cached['pages'])} pages, skipping extraction, OCR and TOC detection"
+            )
+        else:
+            with fitz.open(pdf_path) as doc:
+                self.stats["extraction_cache_misses"] += doc.page_count
+            self.logger.info(f"🔄 Extraction cache miss for {pdf_hash[:12]}… ({cache_key})")
+        return pdf_hash, cache_key, cached
+
+    def _cache_pages_json(
+        self, pdf_hash: str, cache_key: str, json_path: str, toc_page: Optional[dict]
+    ) -> None:
+        """Store the pages of a freshly written pages JSON in the extraction cache."""
+        writer = None
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            pages = data[list(data.keys())[0]]
+            writer = self.extraction_cache.writer(pdf_hash, cache_key)
+            for page_no in sorted((k for k in pages if k != "_metadata"), key=int):
+                writer.add_page(int(page_no), pages[page_no])
+            writer.commit(toc_page, self._document_stats(self.stats))
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to cache extraction results: {e}")
+            if writer is not None:
+                writer.abort()
+
+    @staticmethod
+    def _document_stats(stats: dict) -> dict:
+        """Per-document counters worth keeping with a cached extraction."""
+        return {key: stats[key] for key in BOILERPLATE_STATS if key in stats}
+
+    def _upload_debug_artifacts(
+        self, company_id: str, json_path: str, strips_dir: str
+    ) -> None:
+        """Upload the pages JSON and footer strip PNGs to temp/ blobs (debug only)."""
+        blob_storage = get_blob_storage()
+        json_blob_name = f"temp/{company_id}/temp_pages_json/{company_id}_pages.json"
+        temp_img_dir_blob_prefix = f"temp/{company_id}/temp_stripped_bottom_images/"
 
-                # Upload JSON to Azure Blob Storage (internal use only, do not expose URL)
+        try:
+            blob_storage.upload_file(json_path, json_blob_name)
+            self.logger.info(f"🐞 Uploaded debug JSON to Azure: {json_blob_name}")
+        except Exception as e:
+            self.logger.error(f"Failed to upload debug JSON to Azure Blob Storage: {e}")
+
+        if not os.path.exists(strips_dir):
+            return
+        for fname in os.listdir(strips_dir):
+            if fname.lower().endswith(".png"):
+                img_blob_name = f"{temp_img_dir_blob_prefix}{fname}"
                 try:
-                    blob_storage.upload_file(local_json_path, json_blob_name)
-                    self.logger.debug(
-                        f"Uploaded temp JSON to Azure Blob Storage: {json_blob_name} (internal use only)"
+                    blob_storage.upload_file(
+                        os.path.join(strips_dir, fname), img_blob_name
                     )
-                    temp_blobs_to_cleanup.append(json_blob_name)
                 except Exception as e:
                     self.logger.error(
-                        f"Failed to upload temp JSON to Azure Blob Storage: {e}"
+                        f"Failed to upload debug PNG to Azure Blob Storage: {e}"
                     )
+        self.logger.info(
+            f"🐞 Uploaded debug footer strips to Azure: {temp_img_dir_blob_prefix}"
+        )
 
-                # Upload any PNGs in temp_stripped_bottom_images (internal use only)
-                if os.path.exists(temp_stripped_img_dir):
-                    for fname in os.listdir(temp_stripped_img_dir):
-                        if fname.lower().endswith(".png"):
-                            local_img_path = os.path.join(temp_stripped_img_dir, fname)
-                            img_blob_name = f"{temp_img_dir_blob_prefix}{fname}"
-                            try:
-                                blob_storage.upload_file(local_img_path, img_blob_name)
-                                self.logger.debug(
-                                    f"Uploaded temp PNG to Azure Blob Storage: {img_blob_name} (internal use only)"
-                                )
-                                temp_blobs_to_cleanup.append(img_blob_name)
-                            except Exception as e:
-                                self.logger.error(
-                                    f"Failed to upload temp PNG to Azure Blob Storage: {e}"
-                                )
-
-                # Return the Azure blob name of the JSON file (for internal use only)
-                return json_blob_name
+    def process_pdf_streaming(
+        self,
+        pdf_path: str,
+        company_name: str,
+        company_id: str,
+        page_sink=None,
+        embed: bool = True,
+        dpi: int = 200,
+        threshold: int = 245,
+        max_workers: int = 5,
+        text_backend: Optional[str] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        queue_size: int = STREAM_QUEUE_SIZE,
+        pdf_hash: Optional[str] = None,
+    ) -> dict:
+        """
+        Extract the PDF and ingest pages while extraction is still running,
+        instead of writing the whole-document JSON first.
+
+        Each completed page from stream_pdf_pages() is pushed into bounded
+        queues consumed by:
+          - `page_sink(batch)`: caller-supplied writer for a list of
+            (page_no, page_info), e.g. a Mongo bulk insert (skipped if None)
+          - the embedding stage: dense embeddings + Qdrant upsert per batch into
+            self.collection_name (skipped if embed=False)
+        A full queue blocks extraction, so memory stays bounded by the queue
+        and batch sizes rather than by the document. TOC detection runs
+        alongside. Raises the first error hit by any stage.
+
+        Pages (and the TOC) are replayed from the extraction cache when this
+        PDF was already extracted with the same settings; otherwise they are
+        written to it as they stream. Pass `pdf_hash` if the caller already
+        computed the SHA-256.
+
+        Returns: {"pages_extracted", "pages_embedded", "toc_page", "tokens_in", "tokens_out"}
+        """
+        self.logger.info(f"📄 Starting streaming PDF processing: {pdf_path}")
+        self.stats["start_time"] = time.time()
 
-        except Exception as e:
-            self.logger.error(f"❌ Error in PDF processing: {e}")
-            self.logger.error(traceback.format_exc())
+        if embed:
+            self.ensure_qdrant_collection()
+
+        def embed_batch(batch):
+            # str page keys, same as the JSON-based upsert payloads
+            points = self._pages_to_points(
+                [(str(page_no), page_info) for page_no, page_info in batch],
+                company_name,
+                company_id,
+            )
+            if points:
+                self.qdrant.upsert(collection_name=self.collection_name, points=points)
+                result["pages_embedded"] += len(points)
+                self.logger.info(
+                    f"✅ Upserted {len(points)} pages to Qdrant ({result['pages_embedded']} so far)"
+                )
+
+        result = {
+            "pages_extracted": 0,
+            "pages_embedded": 0,
+            "toc_page": None,
+            "tokens_in": 0,
+            "tokens_out": 0,
+        }
+        sinks = []
+        if page_sink is not None:
+            sinks.append(("mongo", page_sink))
+        if embed:
+            sinks.append(("qdrant", embed_batch))
+
+        # Load the cache before the stage threads start, so a failure here
+        # cannot leave them blocked on their queues
+        pdf_hash, cache_key, cached = self._load_cached_extraction(
+            pdf_path, dpi, threshold, text_backend, pdf_hash
+        )
+        cache_writer = None
+        toc_executor = ThreadPoolExecutor(max_workers=1)
+        run_stats = {}
+        if cached:
+            pages = cached["pages"]
+            page_stream = ((pno, pages[pno]) for pno in sorted(pages))
+        else:
+            toc_future = toc_executor.submit(
+                self.detect_toc_page, pdf_path, company_name
+            )
+            page_stream = stream_pdf_pages(
+                pdf_path,
+                dpi=dpi,
+                threshold=threshold,
+                max_workers=max_workers,
+                stats=run_stats,
+                text_backend=text_backend,
+            )
+            try:
+                cache_writer = self.extraction_cache.writer(pdf_hash, cache_key)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Extraction results will not be cached: {e}")
+
+        errors = []
+        stage_queues = []
+        stage_threads = []
+        for name, handle_batch in sinks:
+            q = queue.Queue(maxsize=queue_size)
+            t = threading.Thread(
+                target=self._drain_stage,
+                args=(name, q, handle_batch, batch_size, errors),
+                name=f"stream-{name}",
+                daemon=True,
+            )
+            t.start()
+            stage_queues.append(q)
+            stage_threads.append(t)
+
+        try:
+            for page_no, page_info in page_stream:
+                if errors:
+                    break
+                for q in stage_queues:
+                    q.put((page_no, page_info))
+                if cache_writer is not None:
+                    cache_writer.add_page(page_no, page_info)
+                result["pages_extracted"] += 1
+        except BaseException:
+            if cache_writer is not None:
+                cache_writer.abort()
             raise
         finally:
-            # Clean up temp blobs from Azure after use
-            for blob_name in temp_blobs_to_cleanup:
+            for q in stage_queues:
+                q.put(_STREAM_DONE)
+            for t in stage_threads:
+                t.join()
+            toc_executor.shutdown(wait=True)
+
+        if errors:
+            if cache_writer is not None:
+                cache_writer.abort()
+            stage, error = errors[0]
+            self.logger.error(f"❌ Streaming stage '{stage}' failed: {error}")
+            raise error
+
+        if cached:
+            result["toc_page"] = cached["toc_page"]
+        else:
+            result["toc_page"] = toc_future.result()
+            if cache_writer is not None:
                 try:
-                    blob_storage.delete_blob(blob_name)
-                    self.logger.debug(f"Deleted temp blob from Azure: {blob_name}")
+                    cache_writer.commit(
+                        result["toc_page"], self._document_stats(run_stats)
+                    )
                 except Exception as e:
-                    self.logger.warning(f"Failed to delete temp blob from Azure: {e}")
+                    self.logger.warning(f"⚠️ Failed to cache extraction results: {e}")
+                    cache_writer.abort()
+        result["tokens_in"] = run_stats.pop("ocr_tokens_in", 0)
+        result["tokens_out"] = run_stats.pop("ocr_tokens_out", 0)
+        self.stats.update(run_stats)
+        self.stats["pages_processed"] = result["pages_embedded"]
+        if embed:
+            self.stats["embeddings_created"] = True
+            self.stats["embeddings_reused"] = False
+
+        self.logger.info(
+            f"✅ Streaming processing complete: {result['pages_extracted']} pages extracted, "
+            f"{result['pages_embedded']} embedded. Tokens - in: {result['tokens_in']}, out: {result['tokens_out']}"
+        )
+        self._log_vision_payloads()
+        return result
+
+    def _log_vision_payloads(self):
+        """Summarise image bytes sent to BAML vision calls so far, per call type."""
+        payloads = vision_payload_stats()
+        if not payloads:
+            return
+        self.logger.info(
+            "📦 Vision payloads: "
+            + ", ".join(
+                f"{call_type} {p['calls']} calls / {p['bytes'] / 1024:.1f} KB"
+                for call_type, p in sorted(payloads.items())
+            )
+        )
+
+    def _drain_stage(self, name, stage_queue, handle_batch, batch_size, errors):
+        """
+        Consume (page_no, page_info) items from a streaming queue and hand them
+        to `handle_batch` in lists of `batch_size`. After a failure the stage
+        keeps draining (without handling) so extraction never blocks on it.
+        """
+        batch = []
+        while True:
+            item = stage_queue.get()
+            done = item is _STREAM_DONE
+            if not done:
+                batch.append(item)
+            if batch and (done or len(batch) >= batch_size):
+                if not errors:
+                    try:
+                        handle_batch(batch)
+                    except Exception as e:
+                        self.logger.error(traceback.format_exc())
+                        errors.append((name, e))
+                batch = []
+            if done:
+                return
 
     def add_toc_to_json(self, json_path: str, toc_page: Optional[dict]):
         """Add TOC page information and content to the JSON file with error handling"""
@@ -644,50 +1011,17 @@ class LocalDRHPProcessor:
             # Ensure collection exists with proper structure
             self.ensure_qdrant_collection()
 
-            # Upsert each page
-            points = []
-            pages_processed = 0
-
-            for page_no, page_info in pages_data.items():
-                # Skip metadata
-                if page_no == "_metadata":
-                    continue
-
-                try:
-                    content = page_info.get("page_content", "")
-                    if not content.strip():
-                        self.logger.debug(f"Skipping empty page {page_no}")
-                        continue
-
-                    # Generate dense embedding only
-                    dense_vector = self._generate_openai_embedding(content)
-
-                    # Create a valid point ID using UUID
-                    point_id = str(
-                        uuid.uuid5(uuid.NAMESPACE_DNS, f"{company_name}_{page_no}")
-                    )
-
-                    points.append(
-                        qmodels.PointStruct(
-                            id=point_id,
-                            vector={"dense": dense_vector},
-                            payload={
-                                "company_id": company_id,
-                                "company_name": company_name,
-                                "page_number_pdf": page_no,
-                                "page_content": content,
-                                "page_number_drhp": page_info.get(
-                                    "page_number_drhp", ""
-                                ),
-                            },
-                        )
-                    )
-                    pages_processed += 1
-
-                except Exception as e:
-                    self.logger.error(f"❌ Error processing page {page_no}: {e}")
-                    self.stats["errors"] += 1
-                    continue
+            # Embed all pages in batched requests, then upsert them
+            points = self._pages_to_points(
+                [
+                    (page_no, page_info)
+                    for page_no, page_info in pages_data.items()
+                    if page_no != "_metadata"
+                ],
+                company_name,
+                company_id,
+            )
+            pages_processed = len(points)
 
             if points:
                 self.qdrant.upsert(collection_name=self.collection_name, points=points)
@@ -702,6 +1036,73 @@ class LocalDRHPProcessor:
             self.logger.error(f"❌ Error creating embeddings: {e}")
             raise
 
+    def _pages_to_points(
+        self, pages: List[Tuple[Any, dict]], company_name: str, company_id: str
+    ) -> List[qmodels.PointStruct]:
+        """
+        Build dense-only Qdrant points for (page_no, page_info) pages, with the
+        embeddings created in token-budgeted batches. Empty pages are skipped;
+        pages whose embedding failed are counted as errors.
+        """
+        pages = [
+            (page_no, page_info)
+            for page_no, page_info in pages
+            if page_info.get("page_content", "").strip()
+        ]
+        vectors = embed_texts(
+            self.openai_client,
+            [page_info["page_content"] for _, page_info in pages],
+            stats=self.stats,
+        )
+        points = []
+        for (page_no, page_info), vector in zip(pages, vectors):
+            if vector is None:
+                self.logger.error(f"❌ No embedding for page {page_no}")
+                self.stats["errors"] += 1
+                continue
+            points.append(
+                self._page_to_point(
+                    page_no, page_info, company_name, company_id, dense_vector=vector
+                )
+            )
+        return points
+
+    def _page_to_point(
+        self,
+        page_no,
+        page_info: dict,
+        company_name: str,
+        company_id: str,
+        dense_vector: Optional[List[float]] = None,
+    ) -> Optional[qmodels.PointStruct]:
+        """
+        Build the dense-only Qdrant point for one page, or None for empty pages.
+        The embedding is created here unless `dense_vector` is given.
+        """
+        content = page_info.get("page_content", "")
+        if not content.strip():
+            self.logger.debug(f"Skipping empty page {page_no}")
+            return None
+
+        # Generate dense embedding only
+        if dense_vector is None:
+            dense_vector = self._generate_openai_embedding(content)
+
+        # Create a valid point ID using UUID
+        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{company_name}_{page_no}"))
+
+        return qmodels.PointStruct(
+            id=point_id,
+            vector={"dense": dense_vector},
+            payload={
+                "company_id": company_id,
+                "company_name": company_name,
+                "page_number_pdf": page_no,
+                "page_content": content,
+                "page_number_drhp": page_info.get("page_number_drhp", ""),
+            },
+        )
+
     def build_sophisticated_query(
         self,
         section_name: str,
@@ -752,7 +1153,9 @@ class LocalDRHPProcessor:
             try:
                 # Generate hybrid embeddings for the search query
                 dense_query_vector = self._generate_openai_embedding(search_query)
-                sparse_query_vector = self._generate_sparse_embedding(search_query)
+                sparse_query_vector = self._generate_query_sparse_embedding(
+                    search_query
+                )
 
                 self.logger.debug(
                     f"📊 Generated embeddings - Dense: {len(dense_query_vector)}, Sparse: {len(sparse_query_vector.indices)}"
@@ -1160,6 +1563,25 @@ class LocalDRHPProcessor:
                 "end_time": None,
                 "embeddings_created": False,
                 "embeddings_reused": False,
+                "page_numbers_inferred": 0,
+                "page_number_llm_calls": 0,
+                "page_number_llm_calls_avoided": 0,
+                "table_pages_extracted": 0,
+                "table_pages_skipped": 0,
+                "table_chars_masked": 0,
+                "embedding_requests": 0,
+                "embedding_tokens": 0,
+                "embedding_failures": 0,
+                "embedding_cache_hits": 0,
+                "extraction_cache_hits": 0,
+                "extraction_cache_misses": 0,
+                "toc_vision_calls": 0,
+                "ocr_fallback_pages": 0,
+                "ocr_fallback_cache_hits": 0,
+                "boilerplate_lines": 0,
+                "boilerplate_lines_removed": 0,
+                "boilerplate_tokens_removed": 0,
+                "page_tokens_raw": 0,
             }
 
             # Check if JSON file already exists
@@ -1385,6 +1807,33 @@ def main():
         )
         print(f"📄 Pages Processed: {processor.stats['pages_processed']}")
         print(f"❌ Errors: {processor.stats['errors']}")
+        print(
+            f"🔢 Page-number LLM calls avoided: {processor.stats['page_number_llm_calls_avoided']}"
+        )
+        print(
+            f"📊 Table extraction skipped on {processor.stats['table_pages_skipped']} pages"
+        )
+        print(
+            f"♻️ Extraction cache: {processor.stats['extraction_cache_hits']} page hits, "
+            f"{processor.stats['extraction_cache_misses']} page misses"
+        )
+        print(
+            f"🧹 Boilerplate stripped: {processor.stats['boilerplate_tokens_removed']} of "
+            f"{processor.stats['page_tokens_raw']} page tokens"
+        )
+        print(
+            f"🔢 Embeddings: {processor.stats['embedding_tokens']} tokens in "
+            f"{processor.stats['embedding_requests']} requests, "
+            f"{processor.stats['embedding_failures']} failed, "
+            f"{processor.stats['embedding_cache_hits']} served from cache"
+        )
+        cache_stats = embedding_cache_stats()
+        if cache_stats:
+            print(
+                f"♻️ Embedding cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                f"{cache_stats['bytes_stored'] / 1e6:.1f} MB stored, lookup p50 "
+                f"{cache_stats['lookup_p50_ms']} ms / p99 {cache_stats['lookup_p99_ms']} ms"
+            )
         print(
             f"⏱️ Processing Time: {processor.stats.get('total_processing_time', 0):.2f} seconds"
         )
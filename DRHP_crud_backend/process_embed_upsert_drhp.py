@@ -15,10 +15,10 @@ from mongoengine import (
     ListField,
 )
 from local_drhp_processor_final import LocalDRHPProcessor
+from DRHP_ai_processing.extraction_cache import compute_pdf_hash
 from baml_client import b
 from datetime import datetime, timedelta, timezone
 import json
-import hashlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from qdrant_client import QdrantClient
 import pytz
@@ -79,18 +79,6 @@ def validate_env():
     logger.info("All required environment variables are set.")
 
 
-def compute_pdf_hash(pdf_path):
-    BUF_SIZE = 65536
-    sha256 = hashlib.sha256()
-    with open(pdf_path, "rb") as f:
-        while True:
-            data = f.read(BUF_SIZE)
-            if not data:
-                break
-            sha256.update(data)
-    return sha256.hexdigest()
-
-
 def get_or_create_company(company_details, pdf_path):
     unique_id = company_details.corporate_identity_number
     try:
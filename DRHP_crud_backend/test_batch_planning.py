@@ -0,0 +1,59 @@
+"""
+Work splitting for text extraction (plan_page_chunks in
+DRHP_ai_processing/page_processor_local.py) and for embedding requests
+(plan_embedding_batches in DRHP_ai_processing/embedding_batcher.py).
+
+    python -m pytest test_batch_planning.py
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from DRHP_ai_processing.embedding_batcher import (  # noqa: E402
+    EMBED_MAX_ITEMS_PER_REQUEST,
+    plan_embedding_batches,
+)
+
+
+@pytest.fixture(scope="module")
+def page_processor_local():
+    return pytest.importorskip("DRHP_ai_processing.page_processor_local")
+
+
+@pytest.mark.parametrize("total_pages, max_workers", [(100, 4), (1000, 4), (37, 16), (5, 8)])
+def test_page_chunks_cover_every_page_once(page_processor_local, total_pages, max_workers):
+    workers, chunks = page_processor_local.plan_page_chunks(total_pages, max_workers)
+    assert 1 <= workers <= max_workers
+    pages = [p for first, last in chunks for p in range(first, last + 1)]
+    assert pages == list(range(1, total_pages + 1))
+    # every range but the last is worth its own document open
+    assert all(
+        last - first + 1 >= page_processor_local.MIN_PAGES_PER_CHUNK for first, last in chunks[:-1]
+    )
+
+
+def test_page_chunks_balance_long_documents(page_processor_local):
+    workers, chunks = page_processor_local.plan_page_chunks(1000, 4)
+    assert workers == 4
+    assert len(chunks) == workers * page_processor_local.CHUNKS_PER_WORKER
+
+
+def test_short_document_is_one_chunk(page_processor_local):
+    assert page_processor_local.plan_page_chunks(5, 8) == (1, [(1, 5)])
+
+
+def test_embedding_batches_token_budget():
+    assert plan_embedding_batches([40, 40, 40], token_budget=100) == [[0, 1], [2]]
+    # an input over the budget goes alone
+    assert plan_embedding_batches([10, 150, 10], token_budget=100) == [[0], [1], [2]]
+
+
+def test_embedding_batches_item_limit():
+    assert plan_embedding_batches([1] * 5, max_items=2) == [[0, 1], [2, 3], [4]]
+    # never more inputs per request than the API accepts
+    batches = plan_embedding_batches([1] * (EMBED_MAX_ITEMS_PER_REQUEST + 1), max_items=10**6)
+    assert [len(b) for b in batches] == [EMBED_MAX_ITEMS_PER_REQUEST, 1]
+
+
+def test_no_embedding_batches():
+    assert plan_embedding_batches([]) == []
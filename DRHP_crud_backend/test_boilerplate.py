@@ -0,0 +1,72 @@
+"""
+Repeated header/footer detection and stripping (DRHP_ai_processing/boilerplate.py).
+
+    python -m pytest test_boilerplate.py
+"""
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from DRHP_ai_processing.boilerplate import (  # noqa: E402
+    MIN_BOILERPLATE_PAGES,
+    band_lines,
+    detect_boilerplate,
+    normalize_line,
+    strip_boilerplate,
+)
+
+A4 = fitz.Rect(0, 0, 595, 842)
+HEADER = "Acme Limited - Draft Red Herring Prospectus"
+
+
+def line_words(text, y, line_no=0):
+    """get_text("words") tuples for one line of text at height y."""
+    return [
+        (72 + 60 * i, y, 126 + 60 * i, y + 10, w, 0, line_no, i)
+        for i, w in enumerate(text.split())
+    ]
+
+
+def test_normalize_line():
+    assert normalize_line("  Page 12 of  480 ") == normalize_line("page 7 of 481") == "page#of#"
+
+
+def test_band_lines_only_top_and_bottom():
+    words = line_words(HEADER, 20) + line_words("Body text of the page", 400, 1) + line_words("12", 820, 2)
+    assert band_lines(words, A4) == {normalize_line(HEADER), "#"}
+    assert band_lines([], A4) == set()
+
+
+def test_detect_boilerplate():
+    header = normalize_line(HEADER)
+    pages = [{header, "#"} for _ in range(MIN_BOILERPLATE_PAGES)]
+    pages.append({header, normalize_line("Capital Structure")})
+    pages.append(None)  # scanned page, no text layer
+    assert detect_boilerplate(pages) == {header, "#"}
+
+
+def test_short_documents_have_no_boilerplate():
+    header = normalize_line(HEADER)
+    assert detect_boilerplate([{header}] * (MIN_BOILERPLATE_PAGES - 1) + [None] * 10) == set()
+
+
+def test_strip_boilerplate():
+    boilerplate = {normalize_line(HEADER), "#"}
+    text = f"{HEADER}\nOur Business\nWe sell 12\n12\nunits.\n14"
+    cleaned, removed = strip_boilerplate(text, boilerplate)
+    # a short key ("#") is only stripped from the edges of the page
+    assert cleaned == "Our Business\nWe sell 12\n12\nunits."
+    assert removed == [HEADER, "14"]
+
+
+def test_appended_sections_are_kept():
+    boilerplate = {normalize_line(HEADER)}
+    text = f"{HEADER}\nBody\n\n[TABLES]\n{HEADER}"
+    cleaned, _ = strip_boilerplate(text, boilerplate)
+    assert cleaned == f"Body\n\n[TABLES]\n{HEADER}"
+
+
+def test_page_of_only_boilerplate():
+    boilerplate = {normalize_line(HEADER), "#"}
+    assert strip_boilerplate(f"{HEADER}\n\n17\n", boilerplate) == ("", [HEADER, "17"])
+    assert strip_boilerplate("Body", set()) == ("Body", [])
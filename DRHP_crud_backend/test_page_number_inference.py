@@ -0,0 +1,79 @@
+"""
+Printed page numbers fitted from the text layer
+(DRHP_ai_processing/page_number_inference.py).
+
+    python -m pytest test_page_number_inference.py
+"""
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from DRHP_ai_processing.page_number_inference import (  # noqa: E402
+    MAX_FILL_GAP,
+    fit_page_numbers,
+    footer_number_candidates,
+    infer_page_numbers,
+)
+
+A4 = fitz.Rect(0, 0, 595, 842)
+
+
+def footer_words(*words, y=820):
+    """get_text("words") tuples for one footer line."""
+    return [(100 + 40 * i, y, 130 + 40 * i, y + 10, w, 0, 0, i) for i, w in enumerate(words)]
+
+
+def test_footer_candidates():
+    assert footer_number_candidates(footer_words("12"), A4) == {12}
+    assert footer_number_candidates(footer_words("-", "12", "-"), A4) == {12}
+    assert footer_number_candidates(footer_words("Page", "12"), A4) == {12}
+    # body text and roman numerals are not candidates
+    assert footer_number_candidates(footer_words("12", y=400), A4) == set()
+    assert footer_number_candidates(footer_words("xii"), A4) == set()
+    assert footer_number_candidates([], A4) == set()
+
+
+def test_run_with_constant_offset():
+    candidates = {p: {p + 4} for p in range(1, 11)}
+    assert fit_page_numbers(candidates) == {p: p + 4 for p in range(1, 11)}
+
+
+def test_missing_footer_inside_run_is_filled():
+    candidates = {p: {p + 4} for p in range(1, 11)}
+    candidates[5] = set()
+    candidates[6] = set()
+    assert fit_page_numbers(candidates) == {p: p + 4 for p in range(1, 11)}
+
+
+def test_long_gap_is_not_filled():
+    gap = range(5, 5 + MAX_FILL_GAP + 1)
+    candidates = {p: (set() if p in gap else {p + 4}) for p in range(1, 16)}
+    assert not set(gap) & set(fit_page_numbers(candidates))
+
+
+def test_roman_front_matter_needs_ocr():
+    # i-iv front matter (no numeric candidates), then the body restarts at 1
+    candidates = {
+        p: footer_number_candidates(footer_words(roman), A4)
+        for p, roman in enumerate(("i", "ii", "iii", "iv"), start=1)
+    }
+    candidates.update({p: {p - 4} for p in range(5, 15)})
+    page_numbers, ambiguous = infer_page_numbers(candidates)
+    assert ambiguous == [1, 2, 3, 4]
+    assert page_numbers == {p: str(p - 4) for p in range(5, 15)}
+
+
+def test_runs_with_different_offsets_are_not_bridged():
+    candidates = {p: {p + 4} for p in range(1, 8)}
+    candidates.update({p: set() for p in range(8, 10)})
+    candidates.update({p: {p - 9} for p in range(10, 17)})  # annexure restarts at 1
+    fitted = fit_page_numbers(candidates)
+    assert 8 not in fitted and 9 not in fitted
+    assert fitted[7] == 11 and fitted[10] == 1
+
+
+def test_unsupported_number_is_ignored():
+    candidates = {p: {p + 4} for p in range(1, 11)}
+    candidates[5] = {2024}  # a year in the footer, no neighbour agrees
+    fitted = fit_page_numbers(candidates)
+    assert fitted[5] == 9  # filled from the run instead
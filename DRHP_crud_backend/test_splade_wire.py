@@ -0,0 +1,64 @@
+"""
+Round trip of the SPLADE binary wire format: encoded by the service
+(splade_service/app/wire.py) and decoded by the backend client
+(app/utils/splade_client.py), which keep their own copies of the layout.
+
+    python -m pytest test_splade_wire.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("requests")
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "splade_service", "app")
+)
+
+from wire import MEDIA_TYPE, pack, prune  # noqa: E402
+from app.utils import splade_client  # noqa: E402
+from app.utils.splade_client import decode_sparse  # noqa: E402
+
+VECTORS = [
+    {2054: 1.25, 101: 0.5, 7592: 2.875},
+    {},
+    {0: 0.001, 30521: 3.5},
+]
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 1e-6), ("float16", 2e-3)])
+def test_round_trip(dtype, tolerance):
+    decoded = decode_sparse(pack(VECTORS, dtype))
+    assert len(decoded) == len(VECTORS)
+    for original, result in zip(VECTORS, decoded):
+        assert list(result) == list(original)
+        for token_id, weight in original.items():
+            assert result[token_id] == pytest.approx(weight, rel=tolerance, abs=tolerance)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_empty(dtype):
+    assert decode_sparse(pack([], dtype)) == []
+    assert decode_sparse(pack([{}, {}], dtype)) == [{}, {}]
+
+
+def test_large_vector():
+    rng = np.random.default_rng(0)
+    vector = dict(zip(rng.choice(30522, 2000, replace=False).tolist(), rng.random(2000).tolist()))
+    (decoded,) = decode_sparse(pack([vector], "float32"))
+    assert decoded.keys() == vector.keys()
+
+
+def test_layout_constants_match():
+    assert splade_client._MEDIA_TYPE == MEDIA_TYPE
+    with pytest.raises(ValueError):
+        decode_sparse(b"XXXX" + pack(VECTORS)[4:])
+
+
+def test_prune():
+    weights = {1: 0.2, 2: 1.5, 3: 0.05, 4: 0.9}
+    assert prune(weights) == weights
+    assert prune(weights, top_k=2) == {2: 1.5, 4: 0.9}
+    assert prune(weights, min_weight=0.1) == {1: 0.2, 2: 1.5, 4: 0.9}
@@ -0,0 +1,49 @@
+"""
+TOC entries read from a page's text layer (DRHP_ai_processing/toc_detection.py).
+
+    python -m pytest test_toc_detection.py
+"""
+import pytest
+
+pytest.importorskip("fitz")
+
+from DRHP_ai_processing.toc_detection import (  # noqa: E402
+    is_conclusive_toc,
+    score_toc_text,
+    toc_entries_from_text,
+)
+
+TOC_PAGE = """TABLE OF CONTENTS
+SECTION I: GENERAL
+DEFINITIONS AND ABBREVIATIONS .................. 1
+FORWARD LOOKING STATEMENTS ..................... 17
+SECTION II: RISK FACTORS
+RISK FACTORS ……… 19
+OUR BUSINESS 112
+CAPITAL STRUCTURE
+84
+"""
+
+
+def test_entries():
+    assert toc_entries_from_text(TOC_PAGE) == [
+        "DEFINITIONS AND ABBREVIATIONS - 1",
+        "FORWARD LOOKING STATEMENTS - 17",
+        "RISK FACTORS - 19",
+        "OUR BUSINESS - 112",
+        "CAPITAL STRUCTURE - 84",  # two-column layout: number on its own line
+    ]
+
+
+def test_no_entries():
+    assert toc_entries_from_text("") == []
+    assert toc_entries_from_text("SECTION I: GENERAL\nOur business is selling scooters.") == []
+    # a bare number without a title before it (e.g. the page's own number)
+    assert toc_entries_from_text("ii") == []
+    assert toc_entries_from_text("12") == []
+
+
+def test_toc_page_is_conclusive():
+    assert is_conclusive_toc(TOC_PAGE, score_toc_text(TOC_PAGE))
+    body = "OUR BUSINESS\nWe manufacture electric scooters in Hosur.\n" * 5
+    assert not is_conclusive_toc(body, score_toc_text(body))
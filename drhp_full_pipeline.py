@@ -3,8 +3,6 @@ import sys
 import logging
 import glob
 import time
-import json
-import hashlib
 import base64
 from datetime import datetime
 from dotenv import load_dotenv
@@ -34,6 +32,8 @@ from DRHP_crud_backend.baml_client import b
 from DRHP_crud_backend.DRHP_ai_processing.note_checklist_processor import (
     DRHPNoteChecklistProcessor,
 )
+from DRHP_ai_processing.page_processor_local import extract_front_matter_text
+from DRHP_ai_processing.extraction_cache import compute_pdf_hash
 from qdrant_client import QdrantClient
 
 
@@ -76,6 +76,8 @@ class Page(Document):
     page_number_pdf = IntField(required=True)
     page_number_drhp = IntField()
     page_content = StringField()
+    # text as extracted; page_content has repeated headers/footers stripped
+    page_content_raw = StringField()
 
 
 class ChecklistOutput(Document):
@@ -100,6 +102,13 @@ class FinalMarkdown(Document):
     markdown = StringField(required=True)
 
 
+class PdfFingerprint(Document):
+    meta = {"db_alias": "core", "collection": "pdf_fingerprints"}
+    pdf_hash = StringField(required=True, unique=True)
+    company_id = ReferenceField(Company, required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+
+
 # Utility functions
 def validate_env():
     required_vars = ["OPENAI_API_KEY", "QDRANT_URL", "DRHP_MONGODB_URI"]
@@ -135,6 +144,28 @@ def get_latest_checklist():
     return latest
 
 
+def get_company_by_pdf_hash(pdf_hash):
+    fingerprint = PdfFingerprint.objects(pdf_hash=pdf_hash).first()
+    if not fingerprint:
+        return None
+    company_doc = fingerprint.company_id
+    if not isinstance(company_doc, Company):
+        # Company was deleted without its fingerprint; drop the stale entry
+        fingerprint.delete()
+        return None
+    return company_doc
+
+
+def save_pdf_fingerprint(company_doc, pdf_hash):
+    try:
+        PdfFingerprint.objects(pdf_hash=pdf_hash).update_one(
+            set__company_id=company_doc, upsert=True
+        )
+        logger.info(f"Recorded PDF hash {pdf_hash[:12]}… for {company_doc.name}")
+    except Exception as e:
+        logger.warning(f"Failed to record PDF hash for {company_doc.name}: {e}")
+
+
 def get_or_create_company(company_details, pdf_path):
     unique_id = company_details.corporate_identity_number
     try:
@@ -156,6 +187,22 @@ def get_or_create_company(company_details, pdf_path):
             raise
 
 
+def parse_page_number_drhp(page_number_drhp_val, page_no):
+    # Handle empty strings, None, and other invalid values
+    if (
+        page_number_drhp_val is not None
+        and page_number_drhp_val != ""
+        and str(page_number_drhp_val).strip()
+    ):
+        try:
+            return int(page_number_drhp_val)
+        except (ValueError, TypeError):
+            logger.warning(
+                f"Could not convert page_number_drhp '{page_number_drhp_val}' to int for page {page_no}, setting to None"
+            )
+    return None
+
+
 def save_page_safe(company_doc, page_no, page_info, saved_pages, failed_pages):
     try:
         # Check for duplicate page
@@ -165,27 +212,16 @@ def save_page_safe(company_doc, page_no, page_info, saved_pages, failed_pages):
             )
             saved_pages.append(page_no)
             return
-        page_number_drhp_val = page_info.get("page_number_drhp", None)
-        # Handle empty strings, None, and other invalid values
-        if (
-            page_number_drhp_val is not None
-            and page_number_drhp_val != ""
-            and str(page_number_drhp_val).strip()
-        ):
-            try:
-                page_number_drhp_val = int(page_number_drhp_val)
-            except (ValueError, TypeError):
-                logger.warning(
-                    f"Could not convert page_number_drhp '{page_number_drhp_val}' to int for page {page_no}, setting to None"
-                )
-                page_number_drhp_val = None
-        else:
-            page_number_drhp_val = None
         Page(
             company_id=company_doc,
             page_number_pdf=int(page_no),
-            page_number_drhp=page_number_drhp_val,
+            page_number_drhp=parse_page_number_drhp(
+                page_info.get("page_number_drhp", None), page_no
+            ),
             page_content=page_info.get("page_content", ""),
+            page_content_raw=page_info.get(
+                "page_content_raw", page_info.get("page_content", "")
+            ),
         ).save()
         saved_pages.append(page_no)
     except Exception as e:
@@ -193,6 +229,36 @@ def save_page_safe(company_doc, page_no, page_info, saved_pages, failed_pages):
         failed_pages.append(page_no)
 
 
+def save_pages_bulk(company_doc, page_batch, saved_pages, failed_pages):
+    """
+    Insert a batch of streamed (page_no, page_info) pages with one bulk write.
+    Falls back to per-page save_page_safe if the bulk insert fails.
+    """
+    page_docs = [
+        Page(
+            company_id=company_doc,
+            page_number_pdf=int(page_no),
+            page_number_drhp=parse_page_number_drhp(
+                page_info.get("page_number_drhp", None), page_no
+            ),
+            page_content=page_info.get("page_content", ""),
+            page_content_raw=page_info.get(
+                "page_content_raw", page_info.get("page_content", "")
+            ),
+        )
+        for page_no, page_info in page_batch
+    ]
+    try:
+        Page.objects.insert(page_docs, load_bulk=False)
+        saved_pages.extend(page_no for page_no, _ in page_batch)
+    except Exception as e:
+        logger.warning(
+            f"Bulk insert of {len(page_docs)} pages failed ({e}), saving one by one."
+        )
+        for page_no, page_info in page_batch:
+            save_page_safe(company_doc, page_no, page_info, saved_pages, failed_pages)
+
+
 def cleanup_company_and_pages(company_doc):
     try:
         Page.objects(company_id=company_doc).delete()
@@ -266,6 +332,8 @@ def delete_company_and_related_data(company_doc, qdrant_url):
         ChecklistOutput.objects(company_id=company_doc).delete()
         # Delete markdown
         FinalMarkdown.objects(company_id=company_doc).delete()
+        # Delete PDF fingerprints
+        PdfFingerprint.objects(company_id=company_doc).delete()
 
         # Delete company
         company_doc.delete()
@@ -431,6 +499,9 @@ CHECKLIST_PATH = os.path.join(
     "IPO_Notes_Checklist_AI_Final_prod_updated.xlsx",
 )
 
+# Number of leading pages read to identify the company before full extraction
+FRONT_MATTER_PAGES = 10
+
 
 def main(pdf_path):
     load_dotenv()
@@ -443,21 +514,7 @@ def main(pdf_path):
     MONGODB_URI = os.getenv("DRHP_MONGODB_URI")
     DB_NAME = os.getenv("DRHP_DB_NAME", "DRHP_NOTES")
 
-    # --- Azure Blob Storage integration ---
     blob_storage = get_blob_storage()
-    pdf_blob_url = None
-    pdf_blob_name = None
-    try:
-        import uuid
-
-        unique_id = str(uuid.uuid4())
-        pdf_filename = os.path.basename(pdf_path)
-        pdf_blob_name = f"pdfs/{unique_id}_{pdf_filename}"
-        pdf_blob_url = blob_storage.upload_file(pdf_path, pdf_blob_name)
-        logger.info(f"PDF uploaded to Azure Blob Storage: {pdf_blob_url}")
-    except Exception as e:
-        logger.error(f"Failed to upload input PDF to Azure Blob Storage: {e}")
-        sys.exit(1)
 
     try:
         from mongoengine import disconnect
@@ -469,52 +526,49 @@ def main(pdf_path):
         logger.error(f"[MONGODB CONNECTION ERROR] {e}")
         sys.exit(1)
 
-    # Download the PDF from blob storage for processing (if needed)
-    import tempfile
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-        blob_storage.download_file(pdf_blob_name, temp_file.name)
-        temp_pdf_path = temp_file.name
-
-    if not os.path.exists(temp_pdf_path):
-        logger.error(f"PDF file not found: {temp_pdf_path}")
+    if not os.path.exists(pdf_path):
+        logger.error(f"PDF file not found: {pdf_path}")
         sys.exit(1)
-    # Step 1: Extract company details from PDF (first 10 pages)
+
+    # Step 1: Front matter stage - identify the company from the PDF hash or
+    # the first few pages before committing to a full extraction run
     try:
-        processor = LocalDRHPProcessor(
-            qdrant_url=QDRANT_URL,
-            collection_name=None,
-            max_workers=5,
-            company_name=None,
-        )
-        json_path = processor.process_pdf_locally(temp_pdf_path, "TEMP_COMPANY")
-        logger.info(f"PDF processed and extracted to: {json_path}")
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        pdf_name = list(data.keys())[0]
-        pages = data[pdf_name]
-        first_pages_text = "\n".join(
-            [
-                pages[str(i)].get("page_content", "")
-                for i in range(1, 11)
-                if str(i) in pages
-            ]
+        pdf_hash = compute_pdf_hash(pdf_path)
+        logger.info(f"PDF SHA256 hash: {pdf_hash}")
+    except Exception as e:
+        logger.error(f"[PDF HASH ERROR] {e}")
+        sys.exit(1)
+
+    company_details = None
+    company_doc = get_company_by_pdf_hash(pdf_hash)
+    if company_doc:
+        logger.info(
+            f"PDF hash matches existing company {company_doc.name} ({company_doc.id}), skipping company extraction."
         )
-        company_details = b.ExtractCompanyDetails(first_pages_text)
-        logger.info(f"Fetched company details: {company_details}")
-        unique_id = company_details.corporate_identity_number
-        company_name = company_details.name
-        if not company_name or not unique_id:
-            logger.error(
-                "BAML did not return a valid company name or unique identifier."
+        unique_id = company_doc.corporate_identity_number
+        company_name = company_doc.name
+    else:
+        try:
+            first_pages_text = extract_front_matter_text(pdf_path, FRONT_MATTER_PAGES)
+            logger.info(
+                f"Extracted first {FRONT_MATTER_PAGES} pages for company extraction. Length: {len(first_pages_text)}"
             )
+            company_details = b.ExtractCompanyDetails(first_pages_text)
+            logger.info(f"Fetched company details: {company_details}")
+            unique_id = company_details.corporate_identity_number
+            company_name = company_details.name
+            if not company_name or not unique_id:
+                logger.error(
+                    "BAML did not return a valid company name or unique identifier."
+                )
+                sys.exit(1)
+        except Exception as e:
+            logger.error(f"[COMPANY EXTRACTION ERROR] {e}")
             sys.exit(1)
-    except Exception as e:
-        logger.error(f"[COMPANY EXTRACTION ERROR] {e}")
-        sys.exit(1)
+        company_doc = Company.objects(corporate_identity_number=unique_id).first()
+
     # Step 2: Check for duplicates in MongoDB and Qdrant
     qdrant_collection = f"drhp_notes_{company_name.replace(' ', '_').upper()}"
-    company_doc = Company.objects(corporate_identity_number=unique_id).first()
     checklist_path = CHECKLIST_PATH
     checklist_name = os.path.basename(checklist_path)
     checklist_done = (
@@ -556,57 +610,90 @@ def main(pdf_path):
             print(f"⚠️  PDF generation failed: {pdf_error}")
 
         return markdown
-    # If company does not exist, create it
-    if not company_doc:
-        company_doc, _ = get_or_create_company(
-            company_details, pdf_blob_url or pdf_path
-        )
-    # If pages do not exist, upsert them
-    if not pages_done:
-        saved_pages = []
-        failed_pages = []
-        page_items = [(k, v) for k, v in pages.items() if k != "_metadata"]
+    # Step 3: Full extraction, only when pages or embeddings are missing.
+    # Pages are streamed straight into Mongo and Qdrant as they are extracted.
+    if not pages_done or not qdrant_done:
+        # --- Azure Blob Storage integration ---
+        pdf_blob_name = None
+        pdf_blob_url = None
+        try:
+            import uuid
 
-        def is_int_str(s):
-            try:
-                int(s)
-                return True
-            except Exception:
-                return False
-
-        page_items = [(k, v) for k, v in page_items if is_int_str(k)]
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [
-                executor.submit(
-                    save_page_safe, company_doc, k, v, saved_pages, failed_pages
-                )
-                for k, v in page_items
-            ]
-            for future in as_completed(futures):
-                pass
-        logger.info(
-            f"Saved {len(saved_pages)} pages, failed to save {len(failed_pages)} pages."
-        )
-        if failed_pages:
-            logger.error(f"Failed pages: {failed_pages}")
-            cleanup_company_and_pages(company_doc)
+            blob_id = str(uuid.uuid4())
+            pdf_filename = os.path.basename(pdf_path)
+            pdf_blob_name = f"pdfs/{blob_id}_{pdf_filename}"
+            pdf_blob_url = blob_storage.upload_file(pdf_path, pdf_blob_name)
+            logger.info(f"PDF uploaded to Azure Blob Storage: {pdf_blob_url}")
+        except Exception as e:
+            logger.error(f"Failed to upload input PDF to Azure Blob Storage: {e}")
+            sys.exit(1)
+
+        # Download the PDF from blob storage for processing (if needed)
+        import tempfile
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+            blob_storage.download_file(pdf_blob_name, temp_file.name)
+            temp_pdf_path = temp_file.name
+
+        if not os.path.exists(temp_pdf_path):
+            logger.error(f"PDF file not found: {temp_pdf_path}")
             sys.exit(1)
-    # If Qdrant collection does not exist, upsert
-    if not qdrant_done:
+
+        # The company must exist before pages can reference it
+        if not company_doc:
+            company_doc, _ = get_or_create_company(company_details, pdf_blob_url)
+
+        saved_pages = []
+        failed_pages = []
         try:
-            processor.collection_name = qdrant_collection
-            processor.upsert_pages_to_qdrant(
-                json_path, company_name, str(company_doc.id)
+            processor = LocalDRHPProcessor(
+                qdrant_url=QDRANT_URL,
+                collection_name=qdrant_collection,
+                max_workers=5,
+                company_name=None,
+            )
+            result = processor.process_pdf_streaming(
+                temp_pdf_path,
+                company_name,
+                str(company_doc.id),
+                page_sink=(
+                    None
+                    if pages_done
+                    else lambda batch: save_pages_bulk(
+                        company_doc, batch, saved_pages, failed_pages
+                    )
+                ),
+                embed=not qdrant_done,
+                pdf_hash=pdf_hash,
             )
             logger.info(
-                f"Embeddings upserted to Qdrant collection: {qdrant_collection}"
+                f"PDF streamed: {result['pages_extracted']} pages extracted, "
+                f"{result['pages_embedded']} embedded into {qdrant_collection}"
             )
         except Exception as e:
-            logger.error(f"[QDRANT UPSERT ERROR] {e}")
+            logger.error(f"[PDF PROCESSING ERROR] {e}")
             cleanup_company_and_pages(company_doc)
             sys.exit(1)
+        finally:
+            try:
+                os.remove(temp_pdf_path)
+            except OSError:
+                pass
+
+        if not pages_done:
+            logger.info(
+                f"Saved {len(saved_pages)} pages, failed to save {len(failed_pages)} pages."
+            )
+            if failed_pages:
+                logger.error(f"Failed pages: {failed_pages}")
+                cleanup_company_and_pages(company_doc)
+                sys.exit(1)
+    else:
+        logger.info(
+            "Pages and embeddings already exist. Skipping full PDF extraction."
+        )
+    # Pages and embeddings exist now, so re-uploads of this exact PDF can skip extraction
+    save_pdf_fingerprint(company_doc, pdf_hash)
     # If checklist not done, process checklist
     if not checklist_done:
         try:
@@ -655,13 +742,6 @@ def main(pdf_path):
     except Exception as e:
         logger.error(f"[MARKDOWN GENERATION ERROR] {e}")
         sys.exit(1)
-    finally:
-        # Cleanup JSON
-        try:
-            os.remove(json_path)
-            logger.info(f"Cleaned up extracted JSON: {json_path}")
-        except Exception as e:
-            logger.warning(f"Failed to clean up JSON file: {e}")
 
 
 if __name__ == "__main__":
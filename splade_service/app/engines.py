@@ -0,0 +1,216 @@
+import os
+import json
+import logging
+from collections import defaultdict
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForMaskedLM
+
+logger = logging.getLogger(__name__)
+
+
+MAX_LENGTH = 512
+# Long-document mode: inputs over MAX_LENGTH tokens are split into windows of
+# MAX_LENGTH tokens overlapping by WINDOW_STRIDE, and the weights max-pooled
+# across windows. At most MAX_WINDOWS evenly spaced windows per text keep the
+# per-page cost bounded; 1 restores plain truncation.
+MAX_WINDOWS = int(os.getenv("SPLADE_MAX_WINDOWS", "4"))
+WINDOW_STRIDE = int(os.getenv("SPLADE_WINDOW_STRIDE", "64"))
+# Windows per forward pass
+FORWARD_BATCH_SIZE = int(os.getenv("SPLADE_FORWARD_BATCH_SIZE", "32"))
+MODEL_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+# "auto" picks the engine recommended by benchmark_engines.py (written next to
+# the ONNX files at build time) and falls back to eager PyTorch
+ENGINES = ("torch", "onnx", "onnx-int8")
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model_int8.onnx"}
+REPORT_FILE = "engine_report.json"
+
+
+def model_dir(model_id: str) -> str:
+    """Where model_download.py put the snapshot (and the onnx/ exports)."""
+    return os.getenv("MODEL_DIR", f"/opt/hf_cache/{model_id}")
+
+
+def onnx_dir(model_id: str) -> str:
+    return os.path.join(model_dir(model_id), "onnx")
+
+
+def model_source(model_id: str) -> str:
+    local = model_dir(model_id)
+    return local if os.path.isdir(local) else model_id
+
+
+def default_threads() -> int:
+    """Intra-op threads per worker: the CPUs shared out across uvicorn workers."""
+    if os.getenv("SPLADE_THREADS"):
+        return int(os.getenv("SPLADE_THREADS"))
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def to_sparse_dicts(weights: np.ndarray) -> list:
+    """(batch, vocab) pooled SPLADE weights -> one {token_id: weight} per row."""
+    results = []
+    for row in weights:
+        nz = np.flatnonzero(row)
+        results.append({int(i): float(row[i]) for i in nz})
+    return results
+
+
+def select_windows(mapping: list, count: int) -> list:
+    """
+    (window, text) pairs to encode: every window of a text, or MAX_WINDOWS
+    of them evenly spaced from its first to its last window.
+    """
+    by_text = defaultdict(list)
+    for window, text in enumerate(mapping):
+        by_text[text].append(window)
+    selected = []
+    for text in range(count):
+        windows = by_text[text]
+        if len(windows) > MAX_WINDOWS:
+            picks = np.linspace(0, len(windows) - 1, MAX_WINDOWS).round().astype(int)
+            windows = [windows[i] for i in picks]
+        selected.extend((window, text) for window in windows)
+    return selected
+
+
+class Engine:
+    """
+    Shared tokenization, windowing and pooling; subclasses provide
+    _forward(padded features) -> (windows, vocab) pooled SPLADE weights.
+    """
+
+    tensor_type = "np"
+
+    def __init__(self):
+        self.windows = 0
+        self.texts_capped = 0
+
+    def encode_batch(self, sentences: list) -> list:
+        """
+        One {token_id: weight} per sentence. Windows of all sentences are
+        encoded together in padded batches of FORWARD_BATCH_SIZE, padding
+        masked out, and max-pooled per sentence, so each result equals
+        encoding the sentence on its own.
+        """
+        long_mode = MAX_WINDOWS > 1
+        encoded = self.tok(
+            sentences,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            stride=WINDOW_STRIDE if long_mode else 0,
+            return_overflowing_tokens=long_mode,
+        )
+        mapping = encoded.get("overflow_to_sample_mapping") or list(range(len(sentences)))
+        selected = select_windows(mapping, len(sentences))
+        self.windows += len(selected)
+        self.texts_capped += sum(
+            n > MAX_WINDOWS for n in np.bincount(mapping, minlength=len(sentences))
+        )
+        selected.sort(key=lambda item: len(encoded["input_ids"][item[0]]))
+
+        pooled = None
+        keys = [k for k in MODEL_INPUTS if k in encoded and k in self.input_names]
+        for start in range(0, len(selected), FORWARD_BATCH_SIZE):
+            chunk = selected[start : start + FORWARD_BATCH_SIZE]
+            features = self.tok.pad(
+                {k: [encoded[k][window] for window, _ in chunk] for k in keys},
+                return_tensors=self.tensor_type,
+            )
+            weights = self._forward(features)
+            if pooled is None:
+                pooled = np.zeros((len(sentences), weights.shape[1]), dtype=np.float32)
+            for row, (_, text) in zip(weights, chunk):
+                np.maximum(pooled[text], row, out=pooled[text])
+        if pooled is None:
+            return [{} for _ in sentences]
+        return to_sparse_dicts(pooled)
+
+
+class TorchEngine(Engine):
+    """Eager PyTorch AutoModelForMaskedLM, as the service always ran."""
+
+    name = "torch"
+    tensor_type = "pt"
+    input_names = MODEL_INPUTS
+
+    def __init__(self, model_id: str, device=None, threads=None):
+        super().__init__()
+        torch.set_num_threads(threads or default_threads())
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        source = model_source(model_id)
+        self.tok = AutoTokenizer.from_pretrained(source)
+        self.model = AutoModelForMaskedLM.from_pretrained(source).to(self.device)
+        self.model.eval()
+
+    def _forward(self, features) -> np.ndarray:
+        with torch.no_grad():
+            features = features.to(self.device)
+            logits = self.model(**features).logits                # (batch, seq_len, vocab)
+            mask = features["attention_mask"].unsqueeze(-1)       # (batch, seq_len, 1)
+            sparse = torch.relu(logits) * mask                    # ReLU keeps sparsity
+            weights = torch.max(sparse, dim=1).values             # max-pooling
+            return weights.float().cpu().numpy()
+
+
+class OnnxEngine(Engine):
+    """
+    ONNX Runtime session over the graph exported by model_download.py, which
+    already includes the ReLU / mask / max-pooling, so it returns
+    (batch, vocab) weights. "onnx-int8" is the dynamically quantized export.
+    """
+
+    def __init__(self, model_id: str, name: str = "onnx", threads=None):
+        import onnxruntime as ort
+
+        super().__init__()
+        self.name = name
+        path = os.path.join(onnx_dir(model_id), ONNX_FILES[name])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run model_download.py --export-onnx")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or default_threads()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tok = AutoTokenizer.from_pretrained(model_source(model_id))
+
+    def _forward(self, features) -> np.ndarray:
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in features.items()}
+        return self.session.run(None, feeds)[0]
+
+
+def read_report(model_id: str):
+    path = os.path.join(onnx_dir(model_id), REPORT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_engine_name(model_id: str, requested: str) -> str:
+    if requested != "auto":
+        if requested not in ENGINES:
+            raise ValueError(f"Unknown SPLADE_ENGINE {requested!r}; expected auto or one of {ENGINES}")
+        return requested
+    report = read_report(model_id)
+    recommended = (report or {}).get("recommended", "torch")
+    if recommended in ONNX_FILES and not os.path.exists(
+        os.path.join(onnx_dir(model_id), ONNX_FILES[recommended])
+    ):
+        return "torch"
+    return recommended
+
+
+def load_engine(model_id: str, requested: str = "auto", threads=None):
+    name = resolve_engine_name(model_id, requested)
+    logger.info(f"SPLADE engine: {name} (requested {requested})")
+    if name == "torch":
+        return TorchEngine(model_id, threads=threads)
+    return OnnxEngine(model_id, name=name, threads=threads)
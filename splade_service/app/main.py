@@ -1,43 +1,207 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
-from transformers import AutoTokenizer, AutoModelForMaskedLM
-import torch
+from collections import deque
+from typing import List, Literal, Optional
+import asyncio
+import time
 import os
 
+from engines import MAX_WINDOWS, WINDOW_STRIDE, load_engine
+from wire import MEDIA_TYPE, pack, prune
+
 
 
 MODEL_ID = os.getenv("MODEL_ID")
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# torch | onnx | onnx-int8 | auto (engine recommended by benchmark_engines.py)
+SPLADE_ENGINE = os.getenv("SPLADE_ENGINE", "auto")
+# Concurrent requests are coalesced into one padded forward pass of at most
+# MAX_BATCH_SIZE texts, waiting at most BATCH_WINDOW_MS for a batch to fill
+MAX_BATCH_SIZE = int(os.getenv("SPLADE_MAX_BATCH_SIZE", "32"))
+BATCH_WINDOW_MS = float(os.getenv("SPLADE_BATCH_WINDOW_MS", "5"))
+# Texts accepted by one /embed_batch call
+MAX_TEXTS_PER_REQUEST = int(os.getenv("SPLADE_MAX_TEXTS_PER_REQUEST", "1024"))
+# Server-side pruning defaults, overridable per request: keep the TOP_K
+# heaviest tokens (0 = all) with weight >= MIN_WEIGHT
+TOP_K = int(os.getenv("SPLADE_TOP_K", "0"))
+MIN_WEIGHT = float(os.getenv("SPLADE_MIN_WEIGHT", "0"))
+# Samples kept for the /metrics percentiles
+METRICS_WINDOW = 10_000
 
 app = FastAPI(title="SPLADE sparse-embedding service")
 
-class EmbedRequest(BaseModel):
+class EncodeOptions(BaseModel):
+    top_k: Optional[int] = None          # default SPLADE_TOP_K
+    min_weight: Optional[float] = None   # default SPLADE_MIN_WEIGHT
+    # "binary": packed int32 indices + float values (see wire.py)
+    format: Literal["json", "binary"] = "json"
+    dtype: Literal["float32", "float16"] = "float32"
+
+class EmbedRequest(EncodeOptions):
     text: str
 
+class EmbedBatchRequest(EncodeOptions):
+    texts: List[str]
+
 @app.on_event("startup")
-def load_model():
-    global tok, model
-    tok = AutoTokenizer.from_pretrained(MODEL_ID)
-    model = AutoModelForMaskedLM.from_pretrained(MODEL_ID).to(DEVICE)
-    model.eval()
+async def load_model():
+    global engine, batcher
+    engine = load_engine(MODEL_ID, SPLADE_ENGINE)
+    batcher = MicroBatcher()
+    batcher.start()
+
+def splade_encode_batch(sentences: List[str]):
+    return engine.encode_batch(sentences)
 
 def splade_encode(sentence: str):
-    with torch.no_grad():
-        encoded = tok(sentence, return_tensors="pt", truncation=True, max_length=512).to(DEVICE)
-        out = model(**encoded).logits[0]          # (seq_len, vocab)
-        weights = torch.max(out, dim=0).values     # max-pooling
-        sparse = torch.nn.functional.relu(weights) # ReLU keeps sparsity
-        nz = sparse.nonzero().squeeze().tolist()
-        return {int(i): float(sparse[i]) for i in nz}
+    return splade_encode_batch([sentence])[0]
+
+
+def _percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent requests on an asyncio queue and runs them
+    through splade_encode_batch together: a batch closes when it holds
+    MAX_BATCH_SIZE texts or BATCH_WINDOW_MS after its first text arrived.
+    Texts are sorted by length inside a batch to keep padding low. The model
+    runs in a worker thread, one batch at a time, so the event loop keeps
+    accepting requests while a batch is encoded.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self.queue_wait_ms = deque(maxlen=METRICS_WINDOW)
+        self.forward_ms = deque(maxlen=METRICS_WINDOW)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, text: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + BATCH_WINDOW_MS / 1000
+        while len(batch) < MAX_BATCH_SIZE:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            batch.sort(key=lambda item: len(item[0]))
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    None, splade_encode_batch, [text for text, _, _ in batch]
+                )
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+
+            self.batches += 1
+            self.texts += len(batch)
+            self.batch_sizes.append(len(batch))
+            self.forward_ms.append((finished - started) * 1000)
+            for (_, future, enqueued), result in zip(batch, results):
+                self.queue_wait_ms.append((started - enqueued) * 1000)
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "queue_depth": self.queue.qsize(),
+            "batch_size_mean": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "batch_size_p50": _percentile(self.batch_sizes, 50),
+            "batch_size_max": max(self.batch_sizes, default=0),
+            "queue_wait_ms_p50": round(_percentile(self.queue_wait_ms, 50), 3),
+            "queue_wait_ms_p99": round(_percentile(self.queue_wait_ms, 99), 3),
+            "forward_ms_p50": round(_percentile(self.forward_ms, 50), 3),
+            "forward_ms_p99": round(_percentile(self.forward_ms, 99), 3),
+            "max_batch_size": MAX_BATCH_SIZE,
+            "batch_window_ms": BATCH_WINDOW_MS,
+            "engine": engine.name,
+            "windows": engine.windows,
+            "texts_windows_capped": engine.texts_capped,
+            "max_windows": MAX_WINDOWS,
+            "top_k": TOP_K,
+            "min_weight": MIN_WEIGHT,
+        }
+
+
+def _respond(req: EncodeOptions, vectors: list):
+    top_k = TOP_K if req.top_k is None else req.top_k
+    min_weight = MIN_WEIGHT if req.min_weight is None else req.min_weight
+    if top_k or min_weight:
+        vectors = [prune(v, top_k, min_weight) for v in vectors]
+    if req.format == "binary":
+        return Response(content=pack(vectors, req.dtype), media_type=MEDIA_TYPE)
+    return vectors
+
 
 @app.post("/embed")
-def embed(req: EmbedRequest):
+async def embed(req: EmbedRequest):
     if not req.text.strip():
         raise HTTPException(400, "Empty text")
-    return splade_encode(req.text)
+    result = _respond(req, [await batcher.submit(req.text)])
+    return result if isinstance(result, Response) else result[0]
+
+
+@app.post("/embed_batch")
+async def embed_batch(req: EmbedBatchRequest):
+    """Sparse vectors for a list of texts, in order; empty texts get {}."""
+    if len(req.texts) > MAX_TEXTS_PER_REQUEST:
+        raise HTTPException(413, f"At most {MAX_TEXTS_PER_REQUEST} texts per request")
+    vectors = await asyncio.gather(
+        *(
+            batcher.submit(text) if text.strip() else asyncio.sleep(0, result={})
+            for text in req.texts
+        )
+    )
+    return _respond(req, vectors)
+
+
+# Batch-size / queue-wait metrics of the micro-batcher (per worker process)
+@app.get("/metrics")
+def metrics():
+    return batcher.metrics()
+
+
+# Everything besides the request options that changes the vectors, so clients
+# can key vectors they store (e.g. compiled checklists) on it
+@app.get("/info")
+def info():
+    return {
+        "model": MODEL_ID,
+        "engine": engine.name,
+        "max_windows": MAX_WINDOWS,
+        "window_stride": WINDOW_STRIDE,
+    }
 
 
 # ✅ Health check endpoint
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
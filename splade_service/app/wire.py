@@ -0,0 +1,55 @@
+import heapq
+import struct
+
+import numpy as np
+
+
+# Compact binary sparse-vector format (little-endian), one payload per response:
+#   magic   4s   b"SPLD"
+#   version u8   1
+#   dtype   u8   0 = float32, 1 = float16 values
+#   pad     u16
+#   count   u32  number of vectors
+#   nnz     u32 * count
+#   indices i32 * sum(nnz)   all vectors' token ids, back to back
+#   values  f32|f16 * sum(nnz)
+# Decoded by app/utils/splade_client.py in the backend; keep the two in sync.
+MEDIA_TYPE = "application/x-splade-sparse"
+MAGIC = b"SPLD"
+VERSION = 1
+DTYPES = {"float32": (0, np.float32), "float16": (1, np.float16)}
+HEADER = struct.Struct("<4sBBHI")
+
+
+def prune(weights: dict, top_k: int = 0, min_weight: float = 0.0) -> dict:
+    """
+    Drop weights below min_weight, then keep the top_k heaviest (0 = all).
+    The remaining entries stay in token-id order.
+    """
+    if min_weight > 0:
+        weights = {t: w for t, w in weights.items() if w >= min_weight}
+    if top_k and len(weights) > top_k:
+        keep = set(heapq.nlargest(top_k, weights, key=weights.get))
+        weights = {t: w for t, w in weights.items() if t in keep}
+    return weights
+
+
+def pack(vectors: list, dtype: str = "float32") -> bytes:
+    """[{token_id: weight}, ...] -> one binary payload (see the layout above)."""
+    code, np_dtype = DTYPES[dtype]
+    nnz = np.fromiter((len(v) for v in vectors), dtype="<u4", count=len(vectors))
+    total = int(nnz.sum())
+    indices = np.fromiter(
+        (t for v in vectors for t in v.keys()), dtype="<i4", count=total
+    )
+    values = np.fromiter(
+        (w for v in vectors for w in v.values()), dtype=np.float32, count=total
+    ).astype(np.dtype(np_dtype).newbyteorder("<"))
+    return b"".join(
+        (
+            HEADER.pack(MAGIC, VERSION, code, 0, len(vectors)),
+            nnz.tobytes(),
+            indices.tobytes(),
+            values.tobytes(),
+        )
+    )
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Parity check and latency/throughput benchmark of the SPLADE engines
+(torch, onnx, onnx-int8), used to pick the service's default engine.
+
+Every engine encodes the same texts. The ONNX engines are compared with the
+PyTorch sparse outputs:
+    top-k overlap   share of the k heaviest PyTorch tokens also in the engine's top k
+    weight error    max absolute weight difference, and L1 error relative to PyTorch
+    cosine          cosine similarity of the two sparse vectors
+and timed for single-text latency (p50/p99) and batched throughput.
+
+The fastest engine whose mean top-k overlap and cosine clear the thresholds
+is written as "recommended" to <model dir>/onnx/engine_report.json, which
+SPLADE_ENGINE=auto reads at startup.
+
+Usage:
+    MODEL_ID=naver/splade-cocondenser-ensembledistil python benchmark_engines.py
+    python benchmark_engines.py --texts-file pages.txt --batch-size 16 --no-write
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, "app"))  # run from splade_service/
+sys.path.insert(0, here)                       # copied next to engines.py (/app)
+
+from engines import (  # noqa: E402
+    ENGINES,
+    ONNX_FILES,
+    REPORT_FILE,
+    load_engine,
+    onnx_dir,
+)
+
+MIN_TOPK_OVERLAP = 0.95
+MIN_COSINE = 0.99
+
+SAMPLE_TEXTS = [
+    "The Company was incorporated as a private limited company under the Companies Act, 1956.",
+    "Revenue from operations increased by 23.4% to ₹ 1,245.67 million in Fiscal 2024.",
+    "Our Promoters hold 72.5% of the pre-Offer paid-up equity share capital of our Company.",
+    "Objects of the Offer: repayment of borrowings, funding capital expenditure and general corporate purposes.",
+    "There are 14 outstanding criminal proceedings and 3 tax proceedings involving our Subsidiaries.",
+    "The Book Running Lead Managers to the Offer are Axis Capital Limited and ICICI Securities Limited.",
+    "EBITDA margin declined from 18.2% to 15.9% primarily due to higher raw material costs.",
+    "Risk Factors: we depend on a limited number of customers for a significant portion of our revenue.",
+]
+
+
+def make_texts(n: int) -> list:
+    """Mixed-length texts (one to eight sample sentences) for benchmarking."""
+    texts = []
+    for i in range(n):
+        k = 1 + i % 8
+        texts.append(" ".join(SAMPLE_TEXTS[(i + j) % len(SAMPLE_TEXTS)] for j in range(k)))
+    return texts
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def run_engine(engine, texts, batch_size: int, latency_samples: int) -> dict:
+    engine.encode_batch(texts[:2])  # warm-up
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        engine.encode_batch([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        outputs.extend(engine.encode_batch(texts[i : i + batch_size]))
+    seconds = time.perf_counter() - start
+    return {
+        "latency_ms_p50": round(percentile(latencies, 50), 2),
+        "latency_ms_p99": round(percentile(latencies, 99), 2),
+        "throughput_texts_per_s": round(len(texts) / seconds, 2),
+        "outputs": outputs,
+    }
+
+
+def parity(reference: list, candidate: list, k: int) -> dict:
+    overlaps, cosines, max_errors, rel_l1 = [], [], [], []
+    for ref, cand in zip(reference, candidate):
+        ref_top = sorted(ref, key=ref.get, reverse=True)[:k]
+        cand_top = set(sorted(cand, key=cand.get, reverse=True)[:k])
+        overlaps.append(len(cand_top.intersection(ref_top)) / max(len(ref_top), 1))
+
+        keys = set(ref) | set(cand)
+        diffs = [abs(ref.get(t, 0.0) - cand.get(t, 0.0)) for t in keys]
+        max_errors.append(max(diffs, default=0.0))
+        rel_l1.append(sum(diffs) / max(sum(abs(v) for v in ref.values()), 1e-9))
+
+        dot = sum(ref[t] * cand[t] for t in set(ref) & set(cand))
+        norm = np.sqrt(sum(v * v for v in ref.values())) * np.sqrt(sum(v * v for v in cand.values()))
+        cosines.append(dot / norm if norm else 1.0)
+    return {
+        "topk_overlap_mean": round(float(np.mean(overlaps)), 4),
+        "topk_overlap_min": round(float(np.min(overlaps)), 4),
+        "cosine_mean": round(float(np.mean(cosines)), 5),
+        "weight_abs_error_max": round(float(np.max(max_errors)), 4),
+        "weight_rel_l1_mean": round(float(np.mean(rel_l1)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model-id", default=os.getenv("MODEL_ID"), help="HF model id")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--texts-file", default=None, help="One text per line")
+    parser.add_argument("--num-texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads")
+    parser.add_argument("--report", default=None, help="Report path (default: next to the ONNX files)")
+    parser.add_argument("--no-write", action="store_true", help="Print only, do not write the report")
+    args = parser.parse_args()
+    if not args.model_id:
+        parser.error("MODEL_ID / --model-id not set")
+
+    if args.texts_file:
+        with open(args.texts_file, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()][: args.num_texts]
+    else:
+        texts = make_texts(args.num_texts)
+
+    engines = ["torch"] + [e for e in args.engines if e != "torch"]
+    results = {}
+    for name in engines:
+        if name in ONNX_FILES and not os.path.exists(
+            os.path.join(onnx_dir(args.model_id), ONNX_FILES[name])
+        ):
+            print(f"⚠️ Skipping {name}: not exported (model_download.py --export-onnx)")
+            continue
+        print(f"\n🔄 {name}: {len(texts)} texts, batch size {args.batch_size}")
+        engine = load_engine(args.model_id, name, threads=args.threads)
+        results[name] = run_engine(engine, texts, args.batch_size, args.latency_samples)
+        del engine
+
+    reference = results["torch"]["outputs"]
+    for name, result in results.items():
+        result["parity"] = parity(reference, result.pop("outputs"), args.top_k)
+        result["passes_parity"] = (
+            result["parity"]["topk_overlap_mean"] >= MIN_TOPK_OVERLAP
+            and result["parity"]["cosine_mean"] >= MIN_COSINE
+        )
+        print(
+            f"📊 {name:<10} p50 {result['latency_ms_p50']:>8.2f} ms  p99 {result['latency_ms_p99']:>8.2f} ms  "
+            f"{result['throughput_texts_per_s']:>8.2f} texts/s  "
+            f"top-{args.top_k} overlap {result['parity']['topk_overlap_mean']:.4f}  "
+            f"cosine {result['parity']['cosine_mean']:.5f}  "
+            f"max |Δw| {result['parity']['weight_abs_error_max']:.4f}"
+            + ("" if result["passes_parity"] else "  ❌ parity")
+        )
+
+    recommended = max(
+        (name for name, r in results.items() if r["passes_parity"]),
+        key=lambda name: results[name]["throughput_texts_per_s"],
+    )
+    print(f"\n✅ Recommended engine: {recommended}")
+
+    report = {
+        "model_id": args.model_id,
+        "recommended": recommended,
+        "thresholds": {"topk_overlap_mean": MIN_TOPK_OVERLAP, "cosine_mean": MIN_COSINE},
+        "settings": {
+            "texts": len(texts),
+            "batch_size": args.batch_size,
+            "top_k": args.top_k,
+            "threads": args.threads,
+        },
+        "engines": results,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if not args.no_write:
+        path = args.report or os.path.join(onnx_dir(args.model_id), REPORT_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
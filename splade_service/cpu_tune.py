@@ -3,5 +3,6 @@ import torch
 
 # On CPU boxes, limit PyTorch to 1 thread per worker so it doesn't fight
 # with Gunicorn’s worker processes.
+# (At runtime the engines set their own intra-op threads, see SPLADE_THREADS.)
 torch.set_num_threads(1)
 print("✅ PyTorch set_num_threads(1)")
@@ -1,18 +1,102 @@
 #!/usr/bin/env python3
+"""
+Download the SPLADE model snapshot into /opt/hf_cache/<model> and, with
+--export-onnx, export it to ONNX for the onnx / onnx-int8 engines:
+
+    python3 model_download.py                       # download only (build stage)
+    python3 model_download.py --export-onnx --skip-download [--no-quantize]
+
+The exported graph includes SPLADE's ReLU / attention-mask / max-pooling, so
+it maps token ids straight to (batch, vocab) weights:
+    <model dir>/onnx/model.onnx        fp32
+    <model dir>/onnx/model_int8.onnx   dynamic int8 quantization of the above
+"""
 import os
 import sys
-from huggingface_hub import snapshot_download
+import argparse
 
 model = os.getenv("MODEL_ID")
 if not model:
     print("ERROR: MODEL_ID not set", file=sys.stderr)
     sys.exit(1)
 
-# download the full repo into /opt/hf_cache/<model>
-snapshot_download(
-    repo_id=model,
-    local_dir=f"/opt/hf_cache/{model}",
-    local_dir_use_symlinks=False
-)
+local_dir = os.getenv("MODEL_DIR", f"/opt/hf_cache/{model}")
+ONNX_OPSET = 17
+
+
+def download():
+    from huggingface_hub import snapshot_download
+
+    # download the full repo into /opt/hf_cache/<model>
+    snapshot_download(
+        repo_id=model,
+        local_dir=local_dir,
+        local_dir_use_symlinks=False
+    )
+
+    print(f"✅ Downloaded {model} into {local_dir}")
+
+
+def export_onnx(quantize: bool):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForMaskedLM
+
+    class SpladePooled(torch.nn.Module):
+        """MaskedLM logits -> ReLU -> zero padding -> max over tokens."""
+
+        def __init__(self, mlm):
+            super().__init__()
+            self.mlm = mlm
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            kwargs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                kwargs["token_type_ids"] = token_type_ids
+            logits = self.mlm(**kwargs).logits
+            sparse = torch.relu(logits) * attention_mask.unsqueeze(-1).to(logits.dtype)
+            return torch.max(sparse, dim=1).values
+
+    onnx_dir = os.path.join(local_dir, "onnx")
+    os.makedirs(onnx_dir, exist_ok=True)
+    fp32_path = os.path.join(onnx_dir, "model.onnx")
+
+    tok = AutoTokenizer.from_pretrained(local_dir)
+    mlm = AutoModelForMaskedLM.from_pretrained(local_dir).eval()
+    sample = tok(["export sample", "a second, longer export sample"], return_tensors="pt", padding=True)
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes["weights"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            SpladePooled(mlm),
+            tuple(sample[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["weights"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    print(f"✅ Exported ONNX model to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(onnx_dir, "model_int8.onnx")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✅ Quantized (dynamic int8) ONNX model to {int8_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download / export the SPLADE model")
+    parser.add_argument("--export-onnx", action="store_true", help="Export the model to ONNX")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 export")
+    parser.add_argument(
+        "--skip-download", action="store_true", help="Use the snapshot already in the model dir"
+    )
+    args = parser.parse_args()
 
-print(f"✅ Downloaded {model} into /opt/hf_cache/{model}")
+    if not args.skip_download:
+        download()
+    if args.export_onnx:
+        export_onnx(quantize=not args.no_quantize)